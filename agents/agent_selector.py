@@ -1,22 +1,19 @@
 import re
 import os
-import requests
 from typing import Optional, Tuple
-from langchain.agents import AgentExecutor, create_structured_chat_agent
-from langchain_core.tools import StructuredTool
-from langchain.memory import ConversationBufferMemory
-from memory.json_memory import JSONMemory
-from langchain_openai import ChatOpenAI
-from langchain import hub
-from langchain.prompts import ChatPromptTemplate
+from memory.session_memory import SessionMemory, bind_session
 from pydantic import BaseModel
+from tools.registry import get_llm, get_or_create
 from tools.utils import get_current_time
-from tools.detect_intent import detect_intent
+from tools.detect_intent import detect_intent, fast_intent_classifier, INTENT_FAST_PATH_THRESHOLD
+from tools.location_extractor import prefetch_flight_fields
 from agents.flight_search_agent import extract_flight_details
 from agents.flight_selection_agent import flight_selection_agent
 from agents.flight_query_agent import flight_query_agent
 from agents.confirm_booking_agent import confirm_booking_agent
-from agents.passenger_details_agent import collect_passenger_details, extract_passenger_details
+from agents.passenger_details_agent import (collect_passenger_details, collect_all_passenger_details,
+                                            extract_all_passenger_details, required_fields_for)
+from agents.passenger_document_agent import upload_passenger_document
 from agents.smart_assistant_agent import smart_assistant_agent
 from dotenv import load_dotenv
 
@@ -25,19 +22,14 @@ from dotenv import load_dotenv
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# ✅ Initialize GPT-4o Model
-llm = ChatOpenAI(model="gpt-4o")
-
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")  # Set the data folder inside the project
 
-# Ensure the 'data' folder exists
-os.makedirs(DATA_DIR, exist_ok=True)
+# ✅ Intents answered by extract_flight_details
+FLIGHT_SEARCH_INTENTS = {"flight_booking", "providing_date", "providing_location"}
 
-# ✅ Memory for conversation history
-memory = ConversationBufferMemory(memory_key="chat_history", return_messages=True)
-passenger_memory = JSONMemory(os.path.join(DATA_DIR, "passenger_data.json"))
-flight_memory = JSONMemory(os.path.join(DATA_DIR, "flight_search_data.json"))
+passenger_memory = SessionMemory(os.path.join(DATA_DIR, "passenger_data.json"))
+flight_memory = SessionMemory(os.path.join(DATA_DIR, "flight_search_data.json"))
 
 # ✅ Define Schemas for Structured Tools
 class TimeInputSchema(BaseModel):
@@ -60,93 +52,25 @@ class PassengerDetailsInputSchema(BaseModel):
     passport_number: str
 
 class PassengerDetailsAgent:
-    def __init__(self):
-        self.ocr_data = None
-        self.nid_ocr_data = None
-
-    def process_passport_ocr(self, passport_file: Tuple[str, bytes, str]):
+    def process_passport_ocr(self, passport_file: Tuple[str, bytes, str], passenger_index: Optional[int] = None):
         """
-        Process the passport OCR and extract details.
+        Queues the passport for OCR (see agents.passenger_document_agent); the extracted details
+        are saved to the passenger record in the background. Returns the upload job.
         """
-        try:
-            file_name, file_content, content_type = passport_file  # Extract file details
-
-            # ✅ Send the correct file format for OCR API
-            response = requests.post(
-                "https://ocr.ibos.io/passport_ocr",
-                files={"file": (file_name, file_content, content_type)}
-            )
-
-            if response.status_code == 200:
-                self.ocr_data = response.json()
-                return self._auto_fill_passenger_data()
-            else:
-                return "❌ There was an issue processing the passport. Please enter details manually."
-
-        except Exception as e:
-            return f"⚠️ Error processing passport: {e}"
+        return self._queue_document("passport", passport_file, passenger_index)
 
-    def process_nid_ocr(self, nid_file: Tuple[str, bytes, str]):
+    def process_nid_ocr(self, nid_file: Tuple[str, bytes, str], passenger_index: Optional[int] = None):
         """
-        Process the NID OCR and extract details.
+        Queues the NID for OCR; the extracted details are saved to the passenger record in the background.
         """
-        try:
-            file_name, file_content, content_type = nid_file  # Extract file details
-
-            # ✅ Send the correct file format for OCR API
-            response = requests.post(
-                "https://ocr.ibos.io/nid_ocr",
-                files={"file": (file_name, file_content, content_type)}
-            )
+        return self._queue_document("nid", nid_file, passenger_index)
 
-            if response.status_code == 200:
-                self.nid_ocr_data = response.json()
-                return self._auto_fill_passenger_nid_data()
-            else:
-                return "❌ There was an issue processing the NID. Please enter details manually."
-
-        except Exception as e:
-            return f"⚠️ Error processing NID: {e}"
-
-    def _auto_fill_passenger_data(self):
-        """
-        Auto-fill passenger data from OCR-extracted passport details.
-        """
-        if not self.ocr_data:
-            return "❌ No OCR data available."
-
-        # Example: Extract fields from OCR data
-        first_name = self.ocr_data.get("first_name")
-        last_name = self.ocr_data.get("last_name")
-        passport_number = self.ocr_data.get("passport_number")
-
-        # ✅ Call Passenger Details Agent to save the extracted data
-        return collect_passenger_details(
-            passenger_index=0,  # Replace with the correct passenger index
-            first_name=first_name,
-            last_name=last_name,
-            passport_number=passport_number
-        )
-
-    def _auto_fill_passenger_nid_data(self):
-        """
-        Auto-fill passenger data from OCR-extracted NID details.
-        """
-        if not self.nid_ocr_data:
-            return "❌ No OCR data available."
-
-        # Example: Extract fields from OCR data
-        first_name = self.nid_ocr_data.get("first_name")
-        last_name = self.nid_ocr_data.get("last_name")
-        nid_number = self.nid_ocr_data.get("nid_number")
-
-        # ✅ Call Passenger Details Agent to save the extracted data
-        return collect_passenger_details(
-            passenger_index=0,  # Replace with the correct passenger index
-            first_name=first_name,
-            last_name=last_name,
-            passport_number=nid_number  # Use NID number as a placeholder
-        )
+    def _queue_document(self, kind, document_file, passenger_index):
+        try:
+            file_name, file_content, content_type = document_file  # Extract file details
+            return upload_passenger_document(kind, file_name, file_content, content_type, passenger_index)
+        except ValueError as e:
+            return {"status": "failed", "response": f"❌ {e}"}
 
     def _prompt_missing_fields(self):
         """
@@ -167,112 +91,171 @@ class PassengerDetailsAgent:
         passenger_data = passenger_memory.load_data().get("passengers", [])[0]  # Replace with the correct passenger index
         return [field for field in required_fields if not passenger_data.get(field)]
 
-# ✅ Define Structured Tools
-tools = [
-    StructuredTool(
-        name="Time",
-        func=get_current_time,
-        description="Provides the current time.",
-        args_schema=TimeInputSchema
-    ),
-    StructuredTool(
-        name="FlightSearch",
-        func=extract_flight_details,
-        description="Collects flight search details dynamically.",
-        args_schema=FlightSearchInputSchema
-    ),
-    StructuredTool(
-        name="PassengerDetails",
-        func=collect_passenger_details,
-        description="Collects passenger details dynamically.",
-        args_schema=PassengerDetailsInputSchema
-    )
-]
-
-# ✅ Load structured chat prompt
-try:
-    prompt = hub.pull("hwchase17/structured-chat-agent")
-except:
-    prompt = ChatPromptTemplate.from_messages([
-        ("system", "You are a friendly AI assistant."),
-        ("user", "{input}")
-    ])
-
-# ✅ Create Agents
-greet_agent = create_structured_chat_agent(llm=llm, tools=[], prompt=prompt)
-flight_search_agent = create_structured_chat_agent(llm=llm, tools=[tools[1]], prompt=prompt)
-passenger_details_agent = create_structured_chat_agent(llm=llm, tools=[tools[2]], prompt=prompt)
+# ✅ Bundled copy of the "hwchase17/structured-chat-agent" hub prompt (no network pull at startup)
+STRUCTURED_CHAT_SYSTEM = """Respond to the human as helpfully and accurately as possible. You have access to the following tools:
+
+{tools}
+
+Use a json blob to specify a tool by providing an action key (tool name) and an action_input key (tool input).
+
+Valid "action" values: "Final Answer" or {tool_names}
+
+Provide only ONE action per $JSON_BLOB, as shown:
+
+```
+{{
+  "action": $TOOL_NAME,
+  "action_input": $INPUT
+}}
+```
+
+Follow this format:
+
+Question: input question to answer
+Thought: consider previous and subsequent steps
+Action:
+```
+$JSON_BLOB
+```
+Observation: action result
+... (repeat Thought/Action/Observation N times)
+Thought: I know what to respond
+Action:
+```
+{{
+  "action": "Final Answer",
+  "action_input": "Final response to human"
+}}
+
+Begin! Reminder to ALWAYS respond with a valid json blob of a single action. Use tools if necessary. Respond directly if appropriate. Format is Action:```$JSON_BLOB```then Observation"""
+
+STRUCTURED_CHAT_HUMAN = """{input}
+
+{agent_scratchpad}
+ (reminder to respond in a JSON blob no matter what)"""
+
+
+def get_tools():
+    """Structured tools for the LangChain agents (built on first use)."""
+    def create():
+        from langchain_core.tools import StructuredTool
+        return [
+            StructuredTool(
+                name="Time",
+                func=get_current_time,
+                description="Provides the current time.",
+                args_schema=TimeInputSchema
+            ),
+            StructuredTool(
+                name="FlightSearch",
+                func=extract_flight_details,
+                description="Collects flight search details dynamically.",
+                args_schema=FlightSearchInputSchema
+            ),
+            StructuredTool(
+                name="PassengerDetails",
+                func=collect_passenger_details,
+                description="Collects passenger details dynamically.",
+                args_schema=PassengerDetailsInputSchema
+            )
+        ]
+    return get_or_create(("tools",), create)
+
+
+def get_structured_chat_prompt():
+    def create():
+        from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+        return ChatPromptTemplate.from_messages([
+            ("system", STRUCTURED_CHAT_SYSTEM),
+            MessagesPlaceholder("chat_history", optional=True),
+            ("human", STRUCTURED_CHAT_HUMAN),
+        ])
+    return get_or_create(("prompt", "structured-chat-agent"), create)
+
+
+def get_agent(name):
+    """
+    Returns the "greet", "flight_search" or "passenger_details" structured chat agent,
+    creating it (and the LangChain imports it needs) on first use.
+    """
+    def create():
+        from langchain.agents import create_structured_chat_agent
+        agent_tools = {"greet": [], "flight_search": [get_tools()[1]], "passenger_details": [get_tools()[2]]}[name]
+        return create_structured_chat_agent(llm=get_llm(), tools=agent_tools, prompt=get_structured_chat_prompt())
+    return get_or_create(("agent", name), create)
 
 def select_agent(user_input, user_id, file_upload=None):
     from app import log_conversation
     """
     Dynamically selects the appropriate agent based on LLM intent classification.
     """
-    # Step 1: Detect Intent
-    intent = detect_intent(user_input)
-
-    if intent == "greeting":
-        response = "👋 Hello! How can I assist you today?"
-
-    elif intent == "flight_booking":
-        response = extract_flight_details(user_input)
-
-
-    elif intent == "providing_date":
-        response = extract_flight_details(user_input)
-
-    elif intent == "providing_location":
-        response = extract_flight_details(user_input)
-
-    elif intent == "passenger_details":
-        # ✅ Load flight search data to determine number of passengers and flight type
-        flight_details = flight_memory.load_data() or {}
-        num_adults = flight_details.get("num_adults", 1)
-        num_children = flight_details.get("num_children", 0)
-        total_passengers = num_adults + num_children
-        flight_type = flight_details.get("flight_type", "domestic")  # Default to domestic if not specified
-        # ✅ Load existing passenger data
-        passenger_details = passenger_memory.load_data() or {"passengers": []}
-        # ✅ Define required fields based on flight type
-        if flight_type == "domestic":
-            required_fields = ["title", "gender", "first_name", "last_name", "email", "phone", "dob"]
-        else:
-            required_fields = ["title", "gender", "first_name", "last_name", "email", "phone", "dob", "passport_number",
-                               "nationality", "date_of_issue", "date_of_expiry"]
-        # ✅ Find the next passenger with missing details
-        passenger_index = 0
-        for i, passenger in enumerate(passenger_details.get("passengers", [])):
-            if not all(passenger.get(field) for field in required_fields):
-                passenger_index = i
-                break
+    # ✅ Bind per-user state so agents read and write this session only
+    with bind_session(user_id):
+        # Step 1: Detect Intent
+        # ✅ If this looks like a search turn that still needs the LLM classifier,
+        # run the flight field extraction concurrently instead of after it
+        guess, confidence = fast_intent_classifier.classify(user_input)
+        if guess in FLIGHT_SEARCH_INTENTS and confidence < INTENT_FAST_PATH_THRESHOLD:
+            prefetch_flight_fields(user_input)
+        intent = detect_intent(user_input)
+
+        if intent == "greeting":
+            response = "👋 Hello! How can I assist you today?"
+
+        elif intent == "flight_booking":
+            response = extract_flight_details(user_input)
+
+
+        elif intent == "providing_date":
+            response = extract_flight_details(user_input)
+
+        elif intent == "providing_location":
+            response = extract_flight_details(user_input)
+
+        elif intent == "passenger_details":
+            # ✅ Load flight search data to determine number of passengers and flight type
+            flight_details = flight_memory.load_data() or {}
+            num_adults = flight_details.get("num_adults", 1)
+            num_children = flight_details.get("num_children", 0)
+            total_passengers = num_adults + num_children
+            flight_type = flight_details.get("flight_type", "domestic")  # Default to domestic if not specified
+            # ✅ Load existing passenger data
+            passenger_details = passenger_memory.load_data() or {"passengers": []}
+            # ✅ Define required fields based on flight type
+            required_fields = required_fields_for(flight_type)
+            # ✅ Find the next passenger with missing details
+            passenger_index = 0
+            for i, passenger in enumerate(passenger_details.get("passengers", [])):
+                if not all(passenger.get(field) for field in required_fields):
+                    passenger_index = i
+                    break
+            else:
+                if len(passenger_details.get("passengers", [])) >= total_passengers:
+                    response = "✅ All passengers' details have already been collected."
+                passenger_index = len(passenger_details.get("passengers", []))
+            # ✅ Extract Passenger Data (one message may describe several passengers, or paste a whole table)
+            try:
+                extracted_passengers = extract_all_passenger_details(user_input) or [{}]
+                # ✅ Call Passenger Details Agent with flight type, filling consecutive passengers in one write
+                response = collect_all_passenger_details(extracted_passengers, flight_type, start_index=passenger_index)
+            except ValueError as e:
+                response = f"❌ {e}"
+
+        elif intent == "flight_query":
+            response = flight_query_agent(user_input)
+
+        elif intent == "flight_selection":
+            response = flight_selection_agent(user_input)
+
+        elif intent == "confirm_booking" or intent == "booking_confirmation":
+            print("🚀 Calling confirm_booking_agent...")
+            response = confirm_booking_agent()
+
+        elif intent == "other":
+            response = smart_assistant_agent(user_input, user_id)
+
         else:
-            if len(passenger_details.get("passengers", [])) >= total_passengers:
-                response = "✅ All passengers' details have already been collected."
-            passenger_index = len(passenger_details.get("passengers", []))
-        # ✅ Extract Passenger Data
-        extracted_data = extract_passenger_details(user_input)
-        # ✅ Call Passenger Details Agent with flight type
-        response = collect_passenger_details(
-            passenger_index=passenger_index,
-            flight_type=flight_type,
-            **extracted_data  # Pass all extracted fields as keyword arguments
-        )
-
-    elif intent == "flight_query":
-        response = flight_query_agent(user_input)
-
-    elif intent == "flight_selection":
-        response = flight_selection_agent(user_input)
-
-    elif intent == "confirm_booking" or intent == "booking_confirmation":
-        print("🚀 Calling confirm_booking_agent...")
-        response = confirm_booking_agent()
-
-    elif intent == "other":
-        response = smart_assistant_agent(user_input, user_id)
-
-    else:
-        response = "🤔 I'm not sure how to handle that. You can ask about flights, passenger details, or check the time."
+            response = "🤔 I'm not sure how to handle that. You can ask about flights, passenger details, or check the time."
 
     # ✅ Log the conversation
     log_conversation(user_id, user_input, response)
@@ -1,61 +1,65 @@
 import json
 import os
-import openai
 import requests
-from memory.json_memory import JSONMemory
+from memory.session_memory import SessionMemory
+from tools.supplier_client import get_supplier_client
+from tools.streaming import emit_progress, generate_chat_completion
+from tools.supplier_payloads import (
+    UpdateTravellersRequest, Traveller, CreateBookingRequest, BookingDetailsRequest, PaymentRequest
+)
 from dotenv import load_dotenv
 load_dotenv()
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")  # Set the data folder inside the project
 
-# Ensure the 'data' folder exists
-os.makedirs(DATA_DIR, exist_ok=True)
-
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# ✅ Define file paths
-SELECTED_FLIGHT_FILE = os.path.join(DATA_DIR,"selected_flight.json")
-PASSENGER_DATA_FILE = os.path.join(DATA_DIR,"passenger_data.json")
-
-# ✅ Load Passenger Data
-passenger_memory = JSONMemory(os.path.join(DATA_DIR, "passenger_data.json"))
-passenger_memory_info = passenger_memory.load_data() or {}
-passenger_data = passenger_memory_info.get("passengers", [])
-
-# ✅ Load Selected Flight Data
-selected_flight = JSONMemory(os.path.join(DATA_DIR, "selected_flight.json"))
-selected_flight_info = selected_flight.load_data() or {}
-booking_tracking_id = selected_flight_info.get("booking_tracking_id", "UNKNOWN_TRACKING_ID")
-headers = {
-    "Accept": "application/json",
-    "Content-Type": "application/json",
-    "apikey": os.getenv("API_KEY"),
-    "secretecode": os.getenv("SECRET_CODE")
-}
-
-if passenger_memory_info:
-    first_passenger_data = passenger_memory_info.get("passengers", [])[0]
-    name = first_passenger_data.get("first_name", "") + " "+first_passenger_data.get("last_name", "")
-    email = first_passenger_data.get("email", "UNKNOWN_EMAIL")
-    contact = first_passenger_data.get("phone", "UNKNOWN_Contact")
-else:
-    name = "UNKNOWN"
-    email = "UNKNOWN"
-    contact = "UNKNOWN"
+passenger_memory = SessionMemory(os.path.join(DATA_DIR, "passenger_data.json"))
+selected_flight = SessionMemory(os.path.join(DATA_DIR, "selected_flight.json"))
+
+
+def load_booking_state():
+    """
+    Reads the current session's passengers and selected flight at booking time
+    (never at import, so a worker always books with the session's latest data).
+    """
+    passenger_memory_info = passenger_memory.load_data() or {}
+    passengers = passenger_memory_info.get("passengers", [])
+    selected_flight_info = selected_flight.load_data() or {}
+
+    if passengers:
+        first_passenger_data = passengers[0]
+        name = (first_passenger_data.get("first_name") or "") + " " + (first_passenger_data.get("last_name") or "")
+        email = first_passenger_data.get("email", "UNKNOWN_EMAIL")
+        contact = first_passenger_data.get("phone", "UNKNOWN_Contact")
+    else:
+        name = "UNKNOWN"
+        email = "UNKNOWN"
+        contact = "UNKNOWN"
+
+    return {
+        "passengers": passengers,
+        "selected_flight": selected_flight_info,
+        "booking_tracking_id": selected_flight_info.get("booking_tracking_id", "UNKNOWN_TRACKING_ID"),
+        "name": name,
+        "email": email,
+        "contact": contact,
+    }
 
 
 def confirm_booking_agent():
-    passenger_details_payload = get_passenger_details_payload()
+    booking = load_booking_state()
+    passenger_details_payload = get_passenger_details_payload(booking)
     update_travelers_response = update_travelers(passenger_details_payload)
     if update_travelers_response:
         return update_travelers_response  # Return error message if traveler update fails
     print("Step 2: Creating booking...")
-    booking_data = create_booking(passenger_details_payload)
+    booking_data = create_booking(passenger_details_payload, booking)
     if isinstance(booking_data, str):  # If an error message is returned
         return booking_data
     print("Step 3: Fetching booking details...")
-    booking_details = fetch_booking_details()
+    booking_details = fetch_booking_details(booking)
 
-    response = initiate_payment_request(passenger_details_payload, booking_details)
+    response = initiate_payment_request(passenger_details_payload, booking_details, booking)
     return response
 
 def calculate_pax_type(dob):
@@ -76,7 +80,7 @@ def calculate_pax_type(dob):
     except ValueError:
         return "ADT"  # Default to adult if DOB is invalid
 
-def get_passenger_details_payload():
+def get_passenger_details_payload(booking):
     """
     Generates a structured payload for booking confirmation,
     including flight and passenger details.
@@ -91,7 +95,7 @@ def get_passenger_details_payload():
     }
     passenger_details_payload = []
     # ✅ Assign pax_id starting from 1
-    for index, passenger in enumerate(passenger_data, start=1):
+    for index, passenger in enumerate(booking["passengers"], start=1):
         pax_type = calculate_pax_type(passenger.get("dob", "1990-01-01"))
 
         # ✅ Extract document details if available
@@ -101,40 +105,38 @@ def get_passenger_details_payload():
         passport_copy = passenger.get("passport_copy", default_data["passport_copy"])
 
         # ✅ Build passenger structure
-        complete_passenger_data = {
-            "pax_id": index,  # ✅ pax_id now starts from 1 and increments
-            "pax_type": pax_type,
-            "title": passenger.get("title", "N/A"),
-            "gender": passenger.get("gender", "N/A"),
-            "first_name": passenger.get("first_name", "N/A"),
-            "last_name": passenger.get("last_name", "N/A"),
-            "email": passenger.get("email", "N/A"),
-            "contact_number": passenger.get("phone", "N/A"),
-            "dob": passenger.get("dob", "1990-01-01"),
-            "doc_country": default_data["doc_country"],
-            "doc_no": doc_no,
-            "doc_dateofexpiry": doc_dateofexpiry,
-            "doc_dateofissue": doc_dateofissue,
-            "passport_copy": passport_copy
-        }
+        complete_passenger_data = Traveller(
+            pax_id=index,  # ✅ pax_id now starts from 1 and increments
+            pax_type=pax_type,
+            title=passenger.get("title", "N/A"),
+            gender=passenger.get("gender", "N/A"),
+            first_name=passenger.get("first_name", "N/A"),
+            last_name=passenger.get("last_name", "N/A"),
+            email=passenger.get("email", "N/A"),
+            contact_number=passenger.get("phone", "N/A"),
+            dob=passenger.get("dob", "1990-01-01"),
+            doc_country=default_data["doc_country"],
+            doc_no=doc_no,
+            doc_dateofexpiry=doc_dateofexpiry,
+            doc_dateofissue=doc_dateofissue,
+            passport_copy=passport_copy,
+        )
 
         passenger_details_payload.append(complete_passenger_data)
 
     # ✅ Build Final Booking Payload
-    final_payload = {
-        "booking_tracking_id": booking_tracking_id,
-        "member_id": "2",
-        "save_pax": "yes",
-        "flight_details": selected_flight_info,  # ✅ FIXED: Use Dictionary Instead of JSONMemory Object
-        "passenger": passenger_details_payload
-    }
+    final_payload = UpdateTravellersRequest(
+        booking_tracking_id=booking["booking_tracking_id"],
+        flight_details=booking["selected_flight"],  # ✅ FIXED: Use Dictionary Instead of JSONMemory Object
+        passenger=passenger_details_payload,
+    )
     return final_payload
 
 def update_travelers(passenger_details_payload):
     print("Step 1: Updating traveler information...")
-    url = "https://serviceapi.innotraveltech.com/flight/update-travellers"
+    emit_progress("🧍 Saving traveller details…")
     try:
-        response = requests.post(url, headers=headers, json=passenger_details_payload)
+        response = get_supplier_client().post("update_travellers", json=passenger_details_payload)
         print(f"Update Travelers API Response: {response.status_code}, {response.text}")
         response.raise_for_status()
         data = response.json()
@@ -147,22 +149,19 @@ def update_travelers(passenger_details_payload):
         print(f"Error during traveler update: {e}")
         return "An error occurred while updating travelers. Please try again."
 
-def create_booking(passenger_details_payload):
+def create_booking(passenger_details_payload, booking):
     print("Step 2: Creating booking...")
-    create_booking_url = "https://serviceapi.innotraveltech.com/flight/create-booking"
-    payload = {
-        "booking_tracking_id": booking_tracking_id,
-        "member_id": passenger_details_payload.get("member_id", "2"),
-        "isd_code": "880",
-        "contact_no": contact,
-        "email_address": email,
-        "payment_type": "onlinepayment",
-        "isPartialPay": "yes",
-        "redirect_url": "https://showkat.innovatedemo.com/inno-travel-tech/custom_modal.html"
-    }
+    emit_progress("🧾 Creating your booking…")
+    payload = CreateBookingRequest(
+        booking_tracking_id=booking["booking_tracking_id"],
+        member_id=passenger_details_payload.member_id,
+        contact_no=booking["contact"],
+        email_address=booking["email"],
+        redirect_url="https://showkat.innovatedemo.com/inno-travel-tech/custom_modal.html",
+    )
 
     try:
-        response = requests.post(create_booking_url, headers=headers, json=payload)
+        response = get_supplier_client().post("create_booking", json=payload)
         response.raise_for_status()
         booking_data = response.json()
         if booking_data.get("status") != "success":
@@ -174,22 +173,17 @@ def create_booking(passenger_details_payload):
         print(f"Create Booking API Error: {e}")
         return "An error occurred while creating booking. Please try again."
 
-def fetch_booking_details():
+def fetch_booking_details(booking):
     """
     Step 3: Fetch booking details.
     """
     # booking_id = booking_data.get("booking_id", "")
     booking_details = {}
-    print(booking_tracking_id)
-    booking_details_url = "https://serviceapi.innotraveltech.com/flight/booking-details"
-    payload = {
-        "tracking_id": booking_tracking_id,
-        "booking_id": "",
-        "member_id": "1"
-    }
+    print(booking["booking_tracking_id"])
+    payload = BookingDetailsRequest(tracking_id=booking["booking_tracking_id"])
 
     try:
-        response = requests.post(booking_details_url, headers=headers, json=payload)
+        response = get_supplier_client().post("booking_details", json=payload)
         response.raise_for_status()
         booking_details = response.json()
         if response.status_code != 200:
@@ -203,31 +197,25 @@ def fetch_booking_details():
         print(f"Fetch Booking Details API Error: {e}")
         return "An error occurred while fetching booking details."
 
-def initiate_payment_request(passenger_details_payload, booking_details):
+def initiate_payment_request(passenger_details_payload, booking_details, booking):
     print("Step 4: Initiating payment request...")
-    payment_request_url = "https://checkout.innotraveltech.com/request"
-    payload = {
-        "ftm_partner_id": "1",
-        "member_id": "1",
-        "tracking_id": booking_tracking_id,
-        "collection_type": "payment_link",
-        "payment_link_valid": "2030-10-12 23:10",
-        "payment_link_base_url": "https://agent.inno.com/online-payment",
-        "currency": "USD",
-        "amount": "1",
-        "redirect_url": "https://showkat.innovatedemo.com/inno-travel-tech/custom_modal.html",
-        "email": email,
-        "name": name,
-        "isd_code": "880",
-        "contact_number": contact,
-        "service_details": "Flight booking confirmation and payment",
-        "booking_data": {}
-    }
-
-    print(f"Payment Request Payload: {payload}")
+    emit_progress("💳 Preparing your payment link…")
+    payload = PaymentRequest(
+        tracking_id=booking["booking_tracking_id"],
+        payment_link_valid="2030-10-12 23:10",
+        payment_link_base_url="https://agent.inno.com/online-payment",
+        amount="1",
+        redirect_url="https://showkat.innovatedemo.com/inno-travel-tech/custom_modal.html",
+        email=booking["email"],
+        name=booking["name"],
+        contact_number=booking["contact"],
+        service_details="Flight booking confirmation and payment",
+    )
+
+    print(f"Payment Request Payload: {payload.to_dict()}")
 
     try:
-        response = requests.post(payment_request_url, headers=headers, json=payload)
+        response = get_supplier_client().post("payment_request", json=payload)
         print(f"Payment Request Response: {response.status_code}, {response.text}")
         response.raise_for_status()
 
@@ -237,7 +225,7 @@ def initiate_payment_request(passenger_details_payload, booking_details):
 
         payment_link = payment_data.get("payment_link")
         ## Step 5: Generate Confirmation Message via OpenAI
-        extracted_info = generate_booking_confirmation_message(passenger_details_payload, booking_details, payment_link)
+        extracted_info = generate_booking_confirmation_message(passenger_details_payload.to_dict(), booking_details, payment_link)
         return extracted_info
     except requests.exceptions.RequestException as e:
         raise Exception(f"Payment Request API Error: {e}")
@@ -254,7 +242,6 @@ def generate_booking_confirmation_message(passenger_details_payload, booking_det
     Returns:
         str: A structured, friendly, and clear booking confirmation message.
     """
-    client = openai.OpenAI(api_key=OPENAI_API_KEY)
     # ✅ System message for context
     system_message = """
     You are a professional and friendly flight booking assistant. A flight reservation has been successfully completed,
@@ -323,16 +310,13 @@ def generate_booking_confirmation_message(passenger_details_payload, booking_det
 
     # ✅ Generate response using OpenAI's latest API format
     try:
-        response = client.chat.completions.create(
+        confirmation_message = generate_chat_completion(
             model="gpt-4",
             messages=[
                 {"role": "system", "content": system_message},
                 {"role": "user", "content": user_prompt}
             ]
-        )
-
-        # ✅ Extract response content
-        confirmation_message = response.choices[0].message.content.strip()
+        ).strip()
         print("✅ Booking Confirmation Generated!")
         print(confirmation_message)
         return confirmation_message
@@ -1,40 +1,181 @@
 import json
 import os
-from langchain_openai import ChatOpenAI
+import re
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
+from tools.streaming import generate_text
+from tools.airports import find_airports, get_airport_index
+from tools.flight_index import load_flight_index, format_duration, format_time
 
 # ✅ Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# ✅ Initialize LLM Model
-llm = ChatOpenAI(model="gpt-4o", openai_api_key=OPENAI_API_KEY)
-
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-FLIGHT_LIST_FILE = os.path.join(DATA_DIR, "flight_list.json")
+# ✅ Cap on flights sent to the LLM, so prompt size no longer grows with the result count
+FLIGHT_QUERY_MAX_ROWS = int(os.getenv("FLIGHT_QUERY_MAX_ROWS", "8"))
+
+QUERY_TOPICS = [
+    ("cheapest", re.compile(r"\b(cheap\w*|lowest|least expensive|budget|affordable|low cost)\b")),
+    ("fastest", re.compile(r"\b(fast\w*|quick\w*|short\w*|how long|duration|travel time|flight time)\b")),
+    ("direct", re.compile(r"\b(direct|non-?stop|layovers?|stops?|connecting|connections?|transit)\b")),
+    ("baggage", re.compile(r"\b(baggage|luggage|bags?|kg|carry-?on)\b")),
+    ("airlines", re.compile(r"\b(airlines?|carriers?)\b")),
+]
+
+def _detect_topic(user_message):
+    """Returns the single local topic the question is about, or None if it is free-form or mixed."""
+    text = user_message.lower()
+    topics = [topic for topic, pattern in QUERY_TOPICS if pattern.search(text)]
+    # "Which airline is cheapest?" is a cheapest question; "airlines" only counts on its own
+    if len(topics) > 1 and "airlines" in topics:
+        topics.remove("airlines")
+    return topics[0] if len(topics) == 1 else None
+
+
+def _join(items):
+    items = list(items)
+    return " and ".join([", ".join(items[:-1]), items[-1]]) if len(items) > 1 else "".join(items)
+
+
+def _place(code):
+    airport = get_airport_index().by_iata.get(code)
+    return f"{airport.city} ({code})" if airport and airport.city else code
+
+
+def _outside_results(user_message, index, named):
+    """
+    The reply for a question about flights the results cannot contain: an airline that is not in
+    them, or a city/airport off the searched route ("cheapest flight to Dubai?" after a Dhaka-Sylhet
+    search). None when the question is about these results.
+    """
+    airlines = index.airlines()
+    missing = [airline for airline in named if airline not in airlines]
+    if missing:
+        return (
+            f"There are no {_join(missing)} flights in your current results, only {_join(airlines)}. "
+            "Tell me if you'd like me to search again."
+        )
+
+    route = index.route_airports()
+    route_cities = {_place(code).split(" (")[0] for code in route}
+    elsewhere = [airport for airport in find_airports(user_message)
+                 if airport.iata not in route and airport.city not in route_cities]
+    if elsewhere:
+        searched = _join(sorted({
+            f"{_place(origin)} to {_place(destination)}"
+            for origin, destination in zip(index.columns["origin"], index.columns["destination"])
+        }))
+        places = _join(f"{airport.city or airport.name} ({airport.iata})" for airport in elsewhere)
+        return (
+            f"Your current results only cover flights from {searched}, so there are no flights for {places} in them. "
+            "Share the new route and I'll search again."
+        )
+    return None
+
+
+def answer_locally(user_message, index):
+    """
+    Answers cheapest/fastest/direct/airline/baggage questions straight from the flight index.
+    Questions about other airlines or routes get a "not in your current results" reply rather than
+    an answer about the flights that are. Returns None when the question needs the LLM.
+    """
+    topic = _detect_topic(user_message)
+    if topic is None:
+        return None
+    positions, named = index.match_airline(user_message)
+    if any(airline not in index.airlines() for airline in named) and any(airline in index.airlines() for airline in named):
+        return None  # ✅ "Emirates or Biman?": a comparison with flights we don't have, leave it to the LLM
+    outside = _outside_results(user_message, index, named)
+    if outside:
+        return outside
+    currency = index.currency
+
+    if topic == "cheapest":
+        best = index.cheapest(positions)
+        if best is None:
+            return None
+        row = index.row(best)
+        date, departure = format_time(row["departure"])
+        same_price = [p for p in positions if index.columns["price"][p] == row["price"]]
+        answer = (
+            f"The cheapest flight available is {row['airline']} ({row['flight_number']}) for {row['price']} {currency}, "
+            f"departing on {date} at {departure}."
+        )
+        if len(same_price) > 1:
+            departures = _join(format_time(index.columns["departure"][p])[1] for p in same_price)
+            answer += f" {len(same_price)} flights share that fare, departing at {departures}."
+        return answer
+
+    if topic == "fastest":
+        best = index.fastest(positions)
+        if best is None:
+            return None
+        row = index.row(best)
+        durations = sorted({index.columns["duration"][p] for p in positions if index.columns["duration"][p]})
+        if len(durations) == 1:
+            return f"The flight from {row['origin']} to {row['destination']} takes approximately {format_duration(durations[0])}."
+        _, departure = format_time(row["departure"])
+        return (
+            f"Flight times range from {format_duration(durations[0])} to {format_duration(durations[-1])}. "
+            f"The quickest option is {row['airline']} ({row['flight_number']}) departing at {departure}, "
+            f"taking {format_duration(row['duration'])} for {row['price']} {currency}."
+        )
+
+    if topic == "direct":
+        direct = index.direct(positions)
+        if len(direct) == len(positions):
+            return f"Good news: all {len(positions)} flights are direct, so there are no layovers."
+        connections = sorted({str(airport) for p in positions for airport in index.columns["connecting_airport"][p]})
+        answer = f"{len(direct)} of the {len(positions)} flights are direct."
+        if connections:
+            answer += f" The others connect via {_join(connections)}."
+        return answer
+
+    if topic == "baggage":
+        allowances = {}
+        for p in positions:
+            allowances.setdefault(index.columns["airline"][p], set()).add(index.columns["baggage"][p] or "N/A")
+        return " ".join(
+            f"{airline} flights include {_join(sorted(titles))} checked baggage allowance." for airline, titles in allowances.items()
+        )
+
+    # airlines
+    fares = []
+    for airline in index.airlines(positions):
+        airline_positions = [p for p in positions if index.columns["airline"][p] == airline]
+        cheapest = index.cheapest(airline_positions)
+        price = f"from {index.columns['price'][cheapest]} {currency}" if cheapest is not None else ""
+        fares.append(f"{airline} ({len(airline_positions)} flights {price})".replace(" )", ")"))
+    return f"Flights are available from {_join(fares)}."
+
+
+def _relevant_flights(user_message, index):
+    """Compact lines for the flights most relevant to the question (mentioned airline first, then by price)."""
+    positions, _ = index.match_airline(user_message)
+    ranked = index.sort_by("price", positions) or positions
+    return "\n".join(index.describe(p) for p in ranked[:FLIGHT_QUERY_MAX_ROWS])
+
 
 def flight_query_agent(user_message: str):
     """
-    Uses LLM (GPT-4) to generate human-like answers for any flight-related query.
+    Answers common flight questions locally from the flight index, and uses the LLM (GPT-4o)
+    with a trimmed flight summary for free-form questions.
     """
 
-    # ✅ Load flight list
-    try:
-        with open(FLIGHT_LIST_FILE, "r") as f:
-            flight_data = json.load(f)
-    except FileNotFoundError:
+    # ✅ Load the compact flight index built at search time
+    index = load_flight_index()
+    if index is None:
         return "❌ No flight data available. Please try again later."
-
-    if isinstance(flight_data, list):
-        flight_list = flight_data
-    else:
-        flight_list = flight_data.get("data", [])
-    if not flight_list:
+    if not len(index):
         return "❌ No flights found."
 
+    local_answer = answer_locally(user_message, index)
+    if local_answer:
+        return local_answer
+
     # ✅ Prepare System Prompt & Context
     system_prompt = "You are an expert travel assistant who answers flight-related questions in a natural, engaging manner."
     context = f"""
@@ -42,8 +183,11 @@ def flight_query_agent(user_message: str):
 
     **User Query:** "{user_message}"
 
-    **Available Flight Data:**
-    {flight_list}
+    **Flight Summary:**
+    {json.dumps(index.summary())}
+
+    **Most Relevant Flights:**
+    {_relevant_flights(user_message, index)}
 
     **How You Should Respond:**
     - If the user asks for the **cheapest flight**, respond:  
@@ -69,8 +213,5 @@ def flight_query_agent(user_message: str):
     - **DO NOT** say "I don't know" — always provide relevant travel insights.
     """
 
-    # ✅ Generate response using LLM
-    response = llm.invoke([HumanMessage(content=context)])
-
-    # ✅ Return the natural language response
-    return response.content.strip()
+    # ✅ Generate response using LLM (streamed token by token on /chat/stream)
+    return generate_text([HumanMessage(content=context)]).strip()
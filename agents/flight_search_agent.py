@@ -1,9 +1,10 @@
 import json
-import openai
 from tools.utils import save_data
-from memory.json_memory import JSONMemory
-from tools.location_extractor import extract_location, extract_date, extract_number, extract_return_date
+from memory.session_memory import SessionMemory
+from tools.airports import get_flight_type as resolve_flight_type
+from tools.location_extractor import extract_flight_fields, extract_journey_type
 from agents.flight_search_api_agent import flight_search_api_agent
+from tools.streaming import generate_chat_completion
 
 import os
 from dotenv import load_dotenv
@@ -13,20 +14,15 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-flight_memory = JSONMemory(os.path.join(DATA_DIR, "flight_search_data.json"))
-FLIGHT_SEARCH_DATA_FILE = os.path.join(DATA_DIR, "flight_search_data.json")
+flight_memory = SessionMemory(os.path.join(DATA_DIR, "flight_search_data.json"))
 pending_flight_data = {}
 pending_passenger_data = {}
 
 def save_flight_data(flight_details):
-    """Ensures the flight search data file exists and saves flight details, overwriting previous data."""
-    # ✅ Ensure the `data/` directory exists
-    os.makedirs(os.path.dirname(FLIGHT_SEARCH_DATA_FILE), exist_ok=True)
-
+    """Saves flight details for the current session, overwriting previous data."""
     try:
         # ✅ Save new flight data, overwriting previous data
-        with open(FLIGHT_SEARCH_DATA_FILE, "w") as f:
-            json.dump(flight_details, f, indent=4)
+        flight_memory.save_data(flight_details)
 
         print("✅ Flight data successfully saved!")
 
@@ -35,30 +31,14 @@ def save_flight_data(flight_details):
 
 def get_flight_type(origin, destination):
     """
-    Determines if the flight is 'domestic' or 'international' based on the origin and destination airports.
+    Determines if the flight is 'domestic' or 'international' based on the origin and destination countries.
     """
-    domestic_airports = {
-        "dhaka": "DAC",
-        "chittagong": "CGP",
-        "sylhet": "ZYL",
-        "coxs bazar": "CXB",
-        "jessore": "JSR",
-        "barishal": "BZL",
-        "rajshahi": "RJH",
-        "saidpur": "SPD",
-    }
-
     if not origin or not destination:  # If either is None, return unknown
         print("⚠️ Missing origin or destination. Flight type undetermined.")
         return "unknown"
 
-    origin_lower = origin.lower().strip()
-    destination_lower = destination.lower().strip()
-
-    is_origin_domestic = origin_lower in domestic_airports
-    is_destination_domestic = destination_lower in domestic_airports
-
-    flight_type = "domestic" if is_origin_domestic and is_destination_domestic else "international"
+    # ✅ Derived from the airports' countries instead of a hardcoded domestic list
+    flight_type = resolve_flight_type(origin, destination)
 
     print(f"🟢 [DEBUG] Flight Type Determined: {flight_type} (Origin: {origin}, Destination: {destination})")
     return flight_type
@@ -85,15 +65,14 @@ def extract_flight_details(user_input: str):
     flight_details.setdefault("num_children", 0)
     flight_details.setdefault("flight_type", None)
     flight_details.setdefault("return_date", None)
-    flight_type = None
-    # ✅ Extract new flight details
-    origin = extract_location(user_input, "from")
-    destination = extract_location(user_input, "to")
-    date_of_travel = extract_date(user_input)
-    return_date = extract_return_date(user_input)
-    # ✅ Extract number of passengers (adults & children) correctly
-    num_adults = extract_number(user_input, "adult") or extract_number(user_input, "adults")
-    num_children = extract_number(user_input, "child") or extract_number(user_input, "children")
+    # ✅ Extract all new flight details in one structured call (spaCy/regex fallback inside)
+    extracted = extract_flight_fields(user_input)
+    origin = extracted["origin"]
+    destination = extracted["destination"]
+    date_of_travel = extracted["date_of_travel"]
+    return_date = extracted["return_date"]
+    num_adults = extracted["num_adults"] or 0
+    num_children = extracted["num_children"] or 0
 
     if num_adults > 0:
         flight_details["num_adults"] = num_adults
@@ -101,29 +80,25 @@ def extract_flight_details(user_input: str):
         flight_details["num_children"] = num_children
 
     # ✅ Extract and update journey type
-    journey_type = extract_journey_type(user_input)
+    journey_type = extracted["journey_type"] or extract_journey_type(user_input)
     if journey_type:
         flight_details["journey_type"] = journey_type
 
     # ✅ Update fields only if new values are found
-    if origin and origin.lower() != "unknown" and origin != 'null':
+    if origin:
         flight_details["origin"] = origin
-    if destination and destination.lower() != "unknown" and destination != 'null':
+    if destination:
         flight_details["destination"] = destination
-    if date_of_travel and date_of_travel.lower() != "unknown" and date_of_travel != None:
+    if date_of_travel:
         flight_details["date_of_travel"] = date_of_travel
-    if return_date and return_date.lower() != "unknown" and return_date != None:  # Update return_date
+    if return_date:  # Update return_date
         flight_details["return_date"] = return_date
 
-    if origin.lower() != "unknown" and origin.lower() !=  None and origin.lower() !=  'null' and destination.lower() != "unknown" and destination.lower() !=  None and destination.lower() !=  'null':
-        flight_type = get_flight_type(origin, destination)
-        flight_details["flight_type"] = flight_type
-
-    if flight_type and flight_type.lower() != "unknown" and flight_type != None:
-        flight_details["flight_type"] = flight_type
-
-    if journey_type and journey_type.lower() != "unknown" and journey_type != None:
-        flight_details["journey_type"] = journey_type
+    # ✅ Derive flight type from the merged route, so it also works when origin and destination arrive in separate turns
+    if flight_details["origin"] and flight_details["destination"]:
+        flight_type = get_flight_type(flight_details["origin"], flight_details["destination"])
+        if flight_type != "unknown":
+            flight_details["flight_type"] = flight_type
 
     print(flight_details)
     # ✅ Identify missing fields AFTER merging new and old values
@@ -151,7 +126,6 @@ def ask_for_missing_details_gpt4(flight_details, missing_details, user_message):
     """
     Uses GPT-4 to generate dynamic, human-like responses asking for missing flight details.
     """
-    client = openai.Client(api_key=OPENAI_API_KEY)
     prompt = (
         f"You are a friendly, helpful AI travel assistant, and you're currently helping a user book a flight."
         f"\n\n### User Message:\n{user_message}"
@@ -163,7 +137,7 @@ def ask_for_missing_details_gpt4(flight_details, missing_details, user_message):
 
     # print(prompt)
     # ✅ Use OpenAI v1.0.0+ API
-    response = client.chat.completions.create(
+    response_text = generate_chat_completion(
         model="gpt-4",
         messages=[
             {"role": "system", "content": "You are a helpful travel assistant."},
@@ -171,26 +145,6 @@ def ask_for_missing_details_gpt4(flight_details, missing_details, user_message):
         ],
         max_tokens=200,
         temperature=0.8,
-    )
-
-    # ✅ Extract and return response text
-    response_text = response.choices[0].message.content.strip()
+    ).strip()  # ✅ Streamed token by token on /chat/stream
     print(response_text)
     return response_text
-
-
-def extract_journey_type(user_input: str) -> str:
-    """
-    Determines the journey type based on keywords.
-    Returns "OneWay" if only one date is mentioned,
-    and "RoundTrip" if words like 'round trip' or a return date is present.
-    """
-    user_input = user_input.lower()
-    # Keywords for round trip
-    round_trip_keywords = ["round trip", "return", "coming back", "two way", "round"]
-    # Check for round trip indicators
-    if any(keyword in user_input for keyword in round_trip_keywords):
-        return "RoundTrip"
-    # If no return date and no round trip indicators, assume OneWay
-    return "OneWay"
-
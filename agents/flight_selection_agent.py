@@ -1,107 +1,88 @@
-import json
 import os
-from langchain_openai import ChatOpenAI
+import re
 from langchain_core.messages import HumanMessage
 from dotenv import load_dotenv
-import requests
+from tools.registry import get_llm
+from memory.session_memory import SessionMemory
+from tools.flight_index import load_flight_index
+from tools.flight_selector import select_flight, selected_flight_record
+from tools.supplier_client import get_supplier_client
+from tools.supplier_payloads import ValidateRequest, ValidateItem
+from tools.streaming import emit_progress
 
 
 # ✅ Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# ✅ Initialize LLM Model
-llm = ChatOpenAI(model="gpt-4o", openai_api_key=OPENAI_API_KEY)
-
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-SELECTED_FLIGHT_FILE = os.path.join(DATA_DIR, "selected_flight.json")
-FLIGHT_LIST_FILE = os.path.join(DATA_DIR, "flight_list.json")
-headers = {
-    "Accept": "application/json",
-    "Content-Type": "application/json",
-    "apikey": os.getenv("API_KEY"),
-    "secretecode": os.getenv("SECRET_CODE")
-}
+selected_flight_memory = SessionMemory(os.path.join(DATA_DIR, "selected_flight.json"))
 
-def flight_selection_agent(user_message: str):
+# ✅ Cap on flights sent to the LLM fallback, so prompt size no longer grows with the result count
+FLIGHT_SELECTION_MAX_ROWS = int(os.getenv("FLIGHT_SELECTION_MAX_ROWS", "8"))
+
+def _select_with_llm(user_message, index, candidates):
     """
-    Uses LLM (GPT-4) to intelligently select a flight based on user input.
-    Saves selected flight details in `selected_flight.json`.
-    Returns the flight_key and tracking_id.
+    Fallback for requests the local selector cannot resolve: the LLM sees one compact,
+    price-ranked line per candidate (at most FLIGHT_SELECTION_MAX_ROWS) and only picks a number.
     """
+    ranked = (index.sort_by("price", candidates) or candidates)[:FLIGHT_SELECTION_MAX_ROWS]
+    context = f"""
+    You are given a numbered list of flights. Select the flight that best matches the user’s query.
 
-    # ✅ Load flight list
-    try:
-        with open(FLIGHT_LIST_FILE, "r") as f:
-            flight_data = json.load(f)
-    except FileNotFoundError:
-        return "❌ No flight data available. Please search for flights first."
+    **User Query:** "{user_message}"
 
-    flight_list = flight_data.get("data", [])
-    if not flight_list:
-        return "❌ No flights found."
+    **Flights:**
+    {chr(10).join(index.describe(p) for p in ranked)}
 
-    # ✅ Extract tracking ID for fallback
-    correct_tracking_id = flight_list[0]["tracking_id"] if flight_list else "UNKNOWN_TRACKING_ID"
+    Return **ONLY** the number after "#" of the selected flight (for example: 3).
+    If no flight matches, return 0. No extra text.
+    """
 
-    # ✅ Prepare System Prompt & Context
-    system_prompt = "You are a flight assistant that selects the best flight based on user queries."
-    context = f"""
-    You are given a list of flights. Select the best flight based on the user’s query.
+    response = get_llm().invoke([HumanMessage(content=context)])
+    match = re.search(r"\d+", response.content)
+    position = int(match.group()) - 1 if match else -1
+    return position if 0 <= position < len(index) else None
 
-    **User Query:** "{user_message}"
 
-    **Flight Data:**
-    {json.dumps(flight_list, indent=2)}
-
-    Your task is to select a flight and return **ONLY a valid JSON** in this format:
-    {{
-        "flight_id": "<selected_flight_id>",
-        "tracking_id": "<tracking_id>",
-        "flight_key": "<flight_key>",
-        "price": <price>,
-        "departure_departure_time": "<departure_time>",
-        "arrival_departure_time": "<arrival_time>",
-        "cabin_class": "<cabin_class>",
-        "carrier_operating": "<carrier>",
-        "connecting_airport": <connecting_airport_list>
-    }}
-
-    **Rules:**
-    - If the user says **"first option"**, return the **first flight**.
-    - If the user says **"second option"**, return the **second flight**.
-    - If the user asks for **cheapest**, return the **lowest price flight**.
-    - If the user asks for **shortest duration**, return the **fastest flight**.
-    - If the user specifies an **airline**, return the flight from that airline.
-    - Always return **valid JSON** only. No extra text.
+def flight_selection_agent(user_message: str):
+    """
+    Selects a flight from the session's flight index based on user input.
+    Ordinals, cheapest/fastest/direct, airline, departure time and cabin class are resolved
+    locally; only ambiguous requests go to the LLM (GPT-4o) with a compact ranked summary.
+    Saves selected flight details in the session's `selected_flight` state.
     """
 
-    # ✅ Generate response using LLM
-    response = llm.invoke([HumanMessage(content=context)])
-    # ✅ Debug: Print raw response to check if it's valid JSON
-    # print("🔍 RAW RESPONSE FROM LLM:", response.content.strip().strip("```json").strip("```"))
-    # ✅ Validate JSON response
-    try:
-        selected_flight = json.loads(response.content.strip().strip("```json").strip("```"))
-        flight_key = selected_flight.get("flight_key")
-        tracking_id = selected_flight.get("tracking_id")
-        validate_flight_response = json.loads(validate_flight(flight_key, tracking_id))
-        booking_tracking_id = validate_flight_response.get("booking_tracking_id")
-        if booking_tracking_id:
-            selected_flight["booking_tracking_id"] = booking_tracking_id
-        else:
-            reason = validate_flight_response.get("reason")
-            return f"Please select another flight. Reason: {reason}"
-    except json.JSONDecodeError:
-        return "❌ Error processing flight selection. Invalid JSON format."
-
-    # ✅ Save selected flight to file
-    os.makedirs(os.path.dirname(SELECTED_FLIGHT_FILE), exist_ok=True)
+    # ✅ Load the compact flight index built at search time
+    index = load_flight_index()
+    if index is None:
+        return "❌ No flight data available. Please search for flights first."
+    if not len(index):
+        return "❌ No flights found."
+
+    position, candidates = select_flight(user_message, index)
+    if position is None:
+        position = _select_with_llm(user_message, index, candidates)
+    if position is None:
+        return "❌ I couldn't tell which flight you meant. Please choose an option number from the list."
+
+    selected_flight = selected_flight_record(index, position)
+    emit_progress("✅ Validating fare…")
+
+    # ✅ Validate the selection with the supplier
+    validate_flight_response = validate_flight(selected_flight["flight_key"], selected_flight["tracking_id"])
+    booking_tracking_id = validate_flight_response.get("booking_tracking_id")
+    if booking_tracking_id:
+        selected_flight["booking_tracking_id"] = booking_tracking_id
+    else:
+        reason = validate_flight_response.get("reason")
+        return f"Please select another flight. Reason: {reason}"
+
+    # ✅ Save selected flight for this session
     if validate_flight_response.get("status") == "success":
-        with open(SELECTED_FLIGHT_FILE, "w") as f:
-            json.dump(selected_flight, f, indent=4)
+        selected_flight_memory.save_data(selected_flight)
 
     return format_flight_details(selected_flight)
 
@@ -127,27 +108,15 @@ def format_flight_details(flight):
 def validate_flight(flight_key, tracking_id):
     """
     Validate the selected flight with the backend system.
+    Returns the supplier's response dict, or a dict with a `reason` if the call failed.
     """
     try:
-        validate_url = "https://serviceapi.innotraveltech.com/flight/validate"
-        validate_payload = {
-            "member_id": "2",
-            "result_type": "general",
-            "data": [
-                {
-                    "tracking_id": tracking_id,
-                    "flight_key": flight_key,
-                    "brand_option": ""
-                }
-            ]
-        }
-        response = requests.post(validate_url, headers=headers, json=validate_payload)
+        validate_payload = ValidateRequest(data=[ValidateItem(tracking_id=tracking_id, flight_key=flight_key)])
+        response = get_supplier_client().post("validate", json=validate_payload)
         response.raise_for_status()
-        validate_data = response.json()
-
-        return json.dumps(validate_data)
+        return response.json()
 
     except Exception as ex:
         print(f"❌ Exception in validate_flight: {ex}")
-        return f"Please select another flight"
+        return {"reason": "The flight could not be validated."}
 
@@ -1,9 +1,15 @@
 import json
 import re
-from memory.json_memory import JSONMemory
+from memory.session_memory import SessionMemory
 from typing import Optional
 import openai
 import os
+from tools.concurrency import run_parallel
+from tools.registry import get_openai_client
+from tools.llm_cache import llm_cached
+from tools.name_gender import predict_gender, TITLE_FOR_GENDER
+from tools.passenger_extractor import PASSENGER_FIELDS
+from tools.passenger_import import parse_passenger_block, read_passenger_file
 # Constants for field names and patterns
 FIRST_NAME = "first_name"
 LAST_NAME = "last_name"
@@ -11,22 +17,18 @@ EMAIL = "email"
 PHONE = "phone"
 PASSPORT_NUMBER = "passport_number"
 PASSENGERS = "passengers"
+DOMESTIC_FIELDS = ["title", "gender", "first_name", "last_name", "email", "phone", "dob"]
+INTERNATIONAL_FIELDS = DOMESTIC_FIELDS + ["passport_number", "nationality", "date_of_issue", "date_of_expiry"]
+MISSING_VALUES = (None, "", "null", "Unknown")
 
-# Updated patterns
-# NAME_PATTERN = r"(?:my name is |^)([A-Za-z]+)[,\s]+([A-Za-z]+)"
-NAME_PATTERN = r"(?:my name is |^)(?P<title>Mr|Mrs|Ms|Dr)\s+(?P<first_name>[A-Za-z]+)\s+(?P<last_name>[A-Za-z]+(?:\s[A-Za-z]+)*)"
-EMAIL_PATTERN = r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b"
-PHONE_PATTERN = r"\b01\d{9}\b"
-PASSPORT_PATTERN = r"\b[A-Z]\d{5,}\b"
+NAME_ANALYSIS_TIMEOUT = float(os.getenv("NAME_ANALYSIS_TIMEOUT", "10"))  # seconds per title/gender lookup
 
 
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")
 
-passenger_memory = JSONMemory(os.path.join(DATA_DIR, "passenger_data.json"))
-flight_memory = JSONMemory(os.path.join(DATA_DIR, "flight_search_data.json"))  # Load flight search data
-
-client = openai.OpenAI()
+passenger_memory = SessionMemory(os.path.join(DATA_DIR, "passenger_data.json"))
+flight_memory = SessionMemory(os.path.join(DATA_DIR, "flight_search_data.json"))  # Load flight search data
 
 def get_total_passengers():
     """Retrieves total number of passengers (adults + children) from flight search data."""
@@ -60,150 +62,156 @@ def initialize_passenger_data(total_passengers: int, flight_type: str):
         passenger_details[PASSENGERS].append(passenger_data)
     return passenger_details
 
+def required_fields_for(flight_type: str):
+    """Fields a passenger needs before booking: international flights add the passport details."""
+    return DOMESTIC_FIELDS if flight_type == "domestic" else INTERNATIONAL_FIELDS
+
 def collect_passenger_details(passenger_index: int, flight_type: str, **kwargs):
     """
     Collects passenger details dynamically and updates the passenger data.
     """
-    # ✅ Load existing passenger data
-    passenger_details = passenger_memory.load_data() or {"passengers": []}
+    return collect_all_passenger_details([kwargs], flight_type, start_index=passenger_index)
 
-    # ✅ Ensure passenger list exists and matches total passengers
+def collect_all_passenger_details(passengers, flight_type: str, start_index: int = 0):
+    """
+    Stores details for consecutive passengers (from `start_index` on) with one load and one save,
+    and returns one status line per passenger: saved, or which required fields are still missing.
+    The load-change-save is a single step per session, so concurrent writers (background OCR
+    fills, a chat turn) never overwrite each other's passengers.
+    """
     total_passengers = get_total_passengers()
-    if len(passenger_details.get("passengers", [])) < total_passengers:
-        passenger_details["passengers"] = [{} for _ in range(total_passengers)]
-
-    # ✅ Ensure passenger_index is within the range
-    if passenger_index >= total_passengers:
-        return f"❌ Passenger index {passenger_index} is out of range."
-
-    # ✅ Fetch the current passenger data
-    passenger_data = passenger_details["passengers"][passenger_index]
 
     # ✅ Define required fields based on flight type
-    if flight_type == "domestic":
-        required_fields = ["title", "gender", "first_name", "last_name", "email", "phone", "dob"]
-    else:
-        required_fields = ["title", "gender", "first_name", "last_name", "email", "phone", "dob", "passport_number", "nationality", "date_of_issue", "date_of_expiry"]
-
-    # ✅ Update fields only if new values are provided
-    for field in required_fields:
-        if kwargs.get(field):
-            passenger_data[field] = kwargs[field]
-
-    # ✅ Save the updated passenger details
-    passenger_memory.save_data(passenger_details)
-
-    # ✅ Identify missing fields
-    missing_fields = [field for field in required_fields if not passenger_data.get(field)]
-
-    if not missing_fields:
-        return f"🛂 Passenger {passenger_index + 1} details saved successfully: {passenger_data}"
-
-    return f"📝 Almost done! Please provide: {', '.join(missing_fields)} for Passenger {passenger_index + 1}."
+    required_fields = required_fields_for(flight_type)
+
+    def merge(passenger_details):
+        # ✅ Ensure passenger list exists and matches total passengers (keeping what was already entered)
+        stored_passengers = passenger_details.setdefault(PASSENGERS, [])
+        stored_passengers.extend({} for _ in range(total_passengers - len(stored_passengers)))
+
+        messages = []
+        for passenger_index, new_data in enumerate(passengers, start=start_index):
+            # ✅ Ensure passenger_index is within the range
+            if passenger_index >= total_passengers:
+                messages.append(f"❌ Passenger index {passenger_index} is out of range.")
+                continue
+
+            # ✅ Update fields only if new values are provided
+            passenger_data = stored_passengers[passenger_index]
+            for field in required_fields:
+                if new_data.get(field):
+                    passenger_data[field] = new_data[field]
+
+            # ✅ Identify missing fields
+            missing_fields = [field for field in required_fields if not passenger_data.get(field)]
+            if not missing_fields:
+                messages.append(f"🛂 Passenger {passenger_index + 1} details saved successfully: {passenger_data}")
+            else:
+                messages.append(f"📝 Almost done! Please provide: {', '.join(missing_fields)} for Passenger {passenger_index + 1}.")
+        return messages
+
+    # ✅ Load, update and save the passenger details in one step (once, however many passengers changed)
+    return "\n".join(passenger_memory.update_data(merge))
+
+def import_passengers(text=None, file=None):
+    """
+    Bulk passenger entry for group bookings: a pasted block (free text, or a table with a header
+    row) or an uploaded CSV/XLSX `file` given as (file_name, content). All passengers are parsed in
+    one pass, checked against the flight type's required fields and stored from Passenger 1 on
+    in a single write. Raises ValueError for unreadable uploads.
+    """
+    flight_type = (flight_memory.load_data() or {}).get("flight_type", "domestic")
+    passengers = read_passenger_file(*file) if file else parse_passenger_block(text)
+    if not passengers:
+        return "❌ No passenger details found. Paste one passenger per line or upload a CSV/XLSX file with a header row."
+    return collect_all_passenger_details(complete_titles_and_genders(passengers), flight_type)
 
 def extract_passenger_details(text):
     """Extracts passenger details (name, email, phone, passport number, etc.) from text."""
-    first_name, last_name, email, phone, passport = None, None, None, None, None
-    title, gender, dob, nationality, date_of_issue, date_of_expiry = None, None, None, None, None, None
-
-    # # Extract name
-    # name_match = re.search(NAME_PATTERN, text, re.IGNORECASE)
-    # if name_match:
-    #     first_name = name_match.group(1).strip()
-    #     last_name = name_match.group(2).strip()
-    # Extract name
-    name_match = re.search(
-        r"(?:my name is\s+)?\b(Mr|Ms|Mrs|Dr)?\b\s*([A-Z][a-z]+)[,\s]+([A-Z][a-z]+)(?:\s+(Mr|Ms|Mrs|Dr))?", text,re.IGNORECASE)
-    if name_match:
-        # Correct title detection (before or after)
-        title = name_match.group(1) or name_match.group(4)  # Handles both title positions
-        first_name = name_match.group(2).strip()
-        last_name = name_match.group(3).strip()
-
-    if title is None or title == "" or title == "null" or title == "Unknown":
-        title = _analyze_title(first_name)
-
-
-
-    # Extract email
-    email_match = re.search(EMAIL_PATTERN, text)
-    if email_match:
-        email = email_match.group(0)
-
-    # Extract phone number
-    phone_match = re.search(PHONE_PATTERN, text)
-    if phone_match:
-        phone = phone_match.group(0)
-
-    # Extract passport number
-    passport_match = re.search(PASSPORT_PATTERN, text)
-    if passport_match:
-        passport = passport_match.group(0)
-
-    # # Extract additional fields (example patterns, adjust as needed)
-    # title_match = re.search(r"\b(Mr|Ms|Mrs|Dr)\b", text, re.IGNORECASE)
-    # if title_match:
-    #     title = title_match.group(0)
-
-    gender_match = re.search(r"\b(Male|Female|Other)\b", text, re.IGNORECASE)
-    if gender_match:
-        gender = gender_match.group(0)
-
-    if gender is None or gender == "" or gender == "null" or gender == "Unknown":
-        gender = _analyze_gender(first_name)
-
-    # Extract date of birth (dob) in YYYY-MM-DD format
-    dob_match = re.search(r"\b(\d{4}-\d{2}-\d{2})\b", text)
-    if dob_match:
-        dob = dob_match.group(0)
-
-    nationality_match = re.search(r"\b[A-Za-z]+\b", text)  # Nationality
-    if nationality_match:
-        nationality = nationality_match.group(0)
-
-    # Add more patterns for date_of_issue and date_of_expiry if needed
-
-    return {
-        "title": title,
-        "gender": gender,
-        "first_name": clean_text(first_name),
-        "last_name": clean_text(last_name),
-        "email": email,
-        "phone": phone,
-        "dob": dob,
-        "passport_number": passport,
-        "nationality": nationality,
-        "date_of_issue": date_of_issue,
-        "date_of_expiry": date_of_expiry
-    }
+    passengers = extract_all_passenger_details(text)
+    return passengers[0] if passengers else dict.fromkeys(PASSENGER_FIELDS)
+
+def extract_all_passenger_details(text):
+    """
+    Extracts every passenger mentioned in the text ("Mr A B a@x.com, Ms C D c@y.com", or a pasted
+    table) in one pass (see tools.passenger_import), then fills in missing titles and genders.
+    """
+    return complete_titles_and_genders(parse_passenger_block(text))
+
+def complete_titles_and_genders(passengers):
+    """Fills missing titles and genders from the first names and cleans the names."""
+    # ✅ Title and gender lookups are independent, so run them concurrently for all passengers at once
+    # (only once a name is known)
+    name_analysis = {}
+    for index, passenger in enumerate(passengers):
+        first_name = passenger["first_name"]
+        if passenger["title"] in MISSING_VALUES and passenger["gender"] in TITLE_FOR_GENDER:
+            passenger["title"] = TITLE_FOR_GENDER[passenger["gender"]]  # e.g. the sex printed on a passport
+        if first_name and passenger["title"] in MISSING_VALUES:
+            name_analysis[(index, "title")] = lambda first_name=first_name: _analyze_title(first_name)
+        if first_name and passenger["gender"] in MISSING_VALUES:
+            name_analysis[(index, "gender")] = lambda first_name=first_name: _analyze_gender(first_name)
+    if name_analysis:
+        analyzed = run_parallel(name_analysis, timeout=NAME_ANALYSIS_TIMEOUT,
+                                defaults={key: "Mr." if key[1] == "title" else "male" for key in name_analysis})
+        for (index, field), value in analyzed.items():
+            passengers[index][field] = value
+
+    for passenger in passengers:
+        passenger["first_name"] = clean_text(passenger["first_name"])
+        passenger["last_name"] = clean_text(passenger["last_name"])
+    return passengers
 
 def _analyze_title(first_name):
     """
-    Determines the title (Mr./Ms.) based on the first name using GPT-4.
+    Determines the title (Mr./Ms.) based on the first name: from the local name table,
+    or with GPT-4 for names it does not know.
     """
     if not first_name or first_name.strip() == "":
         return "Mr."  # Default to Mr. if name is missing or blank
 
+    local_gender = predict_gender(first_name)
+    if local_gender:
+        return TITLE_FOR_GENDER[local_gender]
+
+    try:
+        return _title_from_llm(first_name)  # ✅ Each name costs one API call, ever (see tools.llm_cache)
+    except Exception as e:
+        print(f"Error in _analyze_title: {e}")
+        return "Mr."  # Fallback to Mr. if GPT fails
+
+@llm_cached("name_title")
+def _title_from_llm(first_name):
     prompt = (
         f"Determine whether the following first name belongs to a male or female: {first_name}.\n"
         "Respond only with 'Mr.' for male names and 'Ms.' for female names. "
         "If uncertain, respond with 'Mr.'."
     )
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[{"role": "system", "content": prompt}],
-            max_tokens=5,
-            temperature=0.5,
-        )
-        title = response.choices[0].message.content.strip()
-        return title if title in {"Mr.", "Ms."} else "Mr."  # Default to Mr. if uncertain
-    except Exception as e:
-        print(f"Error in _analyze_title: {e}")
-        return "Mr."  # Fallback to Mr. if GPT fails
+    response = get_openai_client().chat.completions.create(
+        model="gpt-4",
+        messages=[{"role": "system", "content": prompt}],
+        max_tokens=5,
+        temperature=0.5,
+        timeout=NAME_ANALYSIS_TIMEOUT,
+    )
+    title = response.choices[0].message.content.strip()
+    return title if title in {"Mr.", "Ms."} else "Mr."  # Default to Mr. if uncertain
 
 def _analyze_gender(name):
+    """Determines the gender from the local name table, or with GPT-4 for names it does not know."""
+    local_gender = predict_gender(name)
+    if local_gender:
+        return local_gender
+
+    try:
+        return _gender_from_llm(name)  # ✅ Cached per name, like _analyze_title
+    except openai.OpenAIError as e:
+        print(f"OpenAI API Error: {e}")
+        return "male"  # Fallback for API errors
+
+@llm_cached("name_gender")
+def _gender_from_llm(name):
     prompt = f"""
     You are an expert in name-based gender identification.
 
@@ -219,25 +227,21 @@ def _analyze_gender(name):
     {{"gender": "male"}}
     """
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You analyze names and return gender as structured JSON."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=10,
-            temperature=0.5,
-            # response_format={"type": "json_object"},  # ✅ Fixed: Changed "json" to "json_object"
-        )
-
-        response_data = response.choices[0].message.content  # Since response_format is JSON, it's already a dict
-        response_data = json.loads(response_data)
-        return response_data.get("gender", "male")  # Default fallback is "male" if anything goes wrong
+    response = get_openai_client().chat.completions.create(
+        model="gpt-4",
+        messages=[
+            {"role": "system", "content": "You analyze names and return gender as structured JSON."},
+            {"role": "user", "content": prompt}
+        ],
+        max_tokens=10,
+        temperature=0.5,
+        timeout=NAME_ANALYSIS_TIMEOUT,
+        # response_format={"type": "json_object"},  # ✅ Fixed: Changed "json" to "json_object"
+    )
 
-    except openai.OpenAIError as e:
-        print(f"OpenAI API Error: {e}")
-        return "male"  # Fallback for API errors
+    response_data = response.choices[0].message.content  # Since response_format is JSON, it's already a dict
+    response_data = json.loads(response_data)
+    return response_data.get("gender", "male")  # Default fallback is "male" if anything goes wrong
 
 def clean_text(text):
     """
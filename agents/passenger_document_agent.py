@@ -0,0 +1,79 @@
+import os
+import contextvars
+from memory.session_memory import SessionMemory
+from tools.document_ocr import document_ocr, DOCUMENT_NAMES
+from tools.passenger_extractor import PASSENGER_FIELDS
+from agents.passenger_details_agent import (collect_passenger_details, complete_titles_and_genders,
+                                            required_fields_for, get_total_passengers, passenger_memory,
+                                            flight_memory)
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# ✅ Upload jobs live in the session store, so any worker can answer a status poll
+document_jobs = SessionMemory(os.path.join(DATA_DIR, "document_jobs.json"))
+
+
+def _update_job(job_id, **changes):
+    def apply(jobs):
+        jobs.setdefault(job_id, {"job_id": job_id}).update(changes)
+    document_jobs.update_data(apply)
+
+
+def get_document_job(job_id):
+    """The session's upload job ({job_id, kind, status, passenger_index, response}), or None."""
+    return document_jobs.load_data().get(job_id)
+
+
+def next_passenger_index(flight_type):
+    """The first passenger still missing required details (the last one if everyone is complete)."""
+    required_fields = required_fields_for(flight_type)
+    passengers = passenger_memory.load_data().get("passengers", [])
+    for index, passenger in enumerate(passengers):
+        if not all(passenger.get(field) for field in required_fields):
+            return index
+    return max(min(len(passengers), get_total_passengers() - 1), 0)
+
+
+def upload_passenger_document(kind, file_name, content, content_type=None, passenger_index=None):
+    """
+    Queues a passport ("passport") or national ID ("nid") scan for OCR and returns its job at once.
+
+    When the OCR result arrives (on the OCR worker pool), the fields it found are merged into
+    the passenger record of this session (`passenger_index`, default: the next passenger with
+    missing details) and the job's `response` says what is still missing. Sending the same
+    file again returns the existing job. Raises ValueError for unusable uploads.
+    """
+    flight_type = (flight_memory.load_data() or {}).get("flight_type", "domestic")
+    if passenger_index is None:
+        passenger_index = next_passenger_index(flight_type)
+    job_id = document_ocr.content_hash(kind, content or b"")[:16]
+    existing = get_document_job(job_id)
+    if existing and existing["status"] != "failed" and existing["passenger_index"] == passenger_index:
+        return existing
+
+    _, future = document_ocr.recognize(kind, file_name, content, content_type)
+    name = DOCUMENT_NAMES[kind]
+    _update_job(
+        job_id, kind=kind, file_name=file_name, passenger_index=passenger_index, status="queued",
+        response=f"📄 Reading your {name}… Passenger {passenger_index + 1}'s details will be filled in shortly."
+    )
+    # ✅ The callback runs on the OCR thread (or right here if the result is already cached);
+    # carry this request's session binding over to it
+    context = contextvars.copy_context()
+    future.add_done_callback(lambda done: context.run(_auto_fill_passenger, job_id, kind, passenger_index, flight_type, done))
+    return get_document_job(job_id)
+
+
+def _auto_fill_passenger(job_id, kind, passenger_index, flight_type, future):
+    name = DOCUMENT_NAMES[kind]
+    try:
+        fields = future.result()
+        passenger = complete_titles_and_genders([dict(dict.fromkeys(PASSENGER_FIELDS), **fields)])[0]
+        status = collect_passenger_details(passenger_index, flight_type, **passenger)
+    except Exception as e:
+        print(f"⚠️ {name} OCR failed for job {job_id}: {e}")
+        _update_job(job_id, status="failed",
+                    response=f"❌ There was an issue processing the {name}. Please enter details manually.")
+        return
+    _update_job(job_id, status="done", fields=sorted(fields), response=f"✅ Your {name} has been read. {status}")
@@ -52,18 +52,34 @@
 ################################ Version 2 ######################################
 import json
 import os
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
-from langchain.memory import ChatMessageHistory  # 🧠 Adding memory for context retention
 from dotenv import load_dotenv
+from memory.conversation_memory import assistant_memory, clip_text  # 🧠 Per-user memory with a fixed prompt budget
+from tools.streaming import generate_text
 
 # ✅ Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+RAG_TURN_TOKENS = int(os.getenv("RAG_TURN_TOKENS", "150"))  # longest retrieved turn injected into the prompt
 
-# ✅ Initialize LLM Model & Memory
-llm = ChatOpenAI(model="gpt-4o", openai_api_key=OPENAI_API_KEY)
-memory = ChatMessageHistory()
+
+def recall_past_turns(user_id, user_message):
+    """
+    Long-term memory: this user's earlier turns from the ChromaDB chat history that relate to
+    the message (top-k only), skipping turns still in the recent window.
+    """
+    try:
+        from memory.json_memory import search_conversation  # loads ChromaDB on first use
+        documents = search_conversation(user_message, user_id=user_id)
+    except Exception as e:
+        print(f"⚠️ Conversation retrieval failed: {e}")
+        return []
+    _, recent = assistant_memory.context(user_id)
+    recent_prefixes = [f"User: {message.content} | " for message in recent if message.type == "human"]
+    return [
+        clip_text(document, RAG_TURN_TOKENS) for document in documents
+        if not any(document.startswith(prefix) for prefix in recent_prefixes)
+    ]
 
 
 def smart_assistant_agent(user_message: str, user_id: str, previous_fallback: bool = False):
@@ -71,12 +87,14 @@ def smart_assistant_agent(user_message: str, user_id: str, previous_fallback: bo
     An intelligent assistant that remembers past conversations, provides refined responses,
     and helps users with both general and travel-related queries.
 
-    - Uses memory to track session history.
+    - Uses the user's own memory: a summary of older turns plus the latest ones.
+    - Recalls related turns from earlier sessions via the ChromaDB chat history.
     - Provides better responses based on previous interactions.
     """
 
-    # ✅ Retrieve past conversation history (if any)
-    past_conversations = memory.messages
+    # ✅ Retrieve past conversation history (bounded, so the prompt size stays the same)
+    past_conversations = assistant_memory.render(user_id)
+    relevant_turns = "\n".join(f"- {turn}" for turn in recall_past_turns(user_id, user_message)) or "(none)"
 
     # ✅ Construct System Prompt with Memory Awareness
     system_prompt = f"""
@@ -97,6 +115,9 @@ def smart_assistant_agent(user_message: str, user_id: str, previous_fallback: bo
     **Past Conversation History:**
     {past_conversations}
 
+    **Related Earlier Conversations:**
+    {relevant_turns}
+
     **Guidelines:**
     - Keep responses natural, friendly, and engaging.
     - If you don't understand, ask for clarification while suggesting related topics.
@@ -111,13 +132,10 @@ def smart_assistant_agent(user_message: str, user_id: str, previous_fallback: bo
     """
 
     # ✅ Generate AI response using LLM
-    response = llm.invoke([HumanMessage(content=system_prompt + "\n\n" + user_prompt)])
+    response_text = generate_text([HumanMessage(content=system_prompt + "\n\n" + user_prompt)]).strip()
 
-    # ✅ Save user interaction into memory
-    # memory.save_context({"user_id": user_id}, {"chat_history": response.content.strip()})
-    # ✅ Save user interaction into memory (FIXED)
-    memory.add_message(HumanMessage(content=user_message))  # ✅ Save user input
-    memory.add_message(HumanMessage(content=response.content.strip()))  # ✅ Save bot response
+    # ✅ Save user interaction into this user's memory
+    assistant_memory.add_turn(user_id, user_message, response_text)
     # ✅ Return AI-generated response
-    return response.content.strip()
+    return response_text
 
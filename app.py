@@ -1,15 +1,28 @@
 import os
 import logging
+import threading
+import logging.handlers
 from datetime import datetime
-from flask import Flask, request, jsonify, render_template, session
+from flask import Flask, Response, request, jsonify, render_template, session
 from tools.clear_json_file import clear_json_files
-from memory.json_memory import store_in_vector_db  # Import FAISS storage function
+from memory.conversation_log import conversation_log, LOG_FLUSH_SIZE
+from memory.session_memory import bind_session, session_store
+from memory.conversation_memory import assistant_memory
+from tools.supplier_client import get_supplier_client
+from tools.search_cache import search_cache
+from tools.llm_cache import llm_cache
+from tools.document_ocr import document_ocr
+from tools.streaming import ChatStream, bind_stream
 
 app = Flask(__name__, template_folder="templates")
 app.secret_key = "your_secret_key"  # Required for session management
 
 user_sessions = {}
 
+# ✅ Readiness: set once the worker is warmed up, cleared while it drains on shutdown
+_ready = threading.Event()
+_draining = threading.Event()
+
 # ✅ Define Paths for Logs
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))  # Moves one level up
 LOGS_DIR = os.path.join(BASE_DIR, "logs")  # Store logs inside "logs" directory
@@ -18,14 +31,50 @@ LOG_FILE = os.path.join(LOGS_DIR, "chatbot.log")  # Full path to chatbot log fil
 # ✅ Ensure 'logs' directory exists
 os.makedirs(LOGS_DIR, exist_ok=True)
 
-# ✅ Set up Logging
+# ✅ Set up Logging (buffered; the conversation log worker flushes after every batch)
+log_file_handler = logging.FileHandler(LOG_FILE, encoding="utf-8")
+log_file_handler.setFormatter(logging.Formatter("%(asctime)s - %(message)s", datefmt="%Y-%m-%d %H:%M:%S"))
 logging.basicConfig(
-    filename=LOG_FILE,
     level=logging.INFO,
-    format="%(asctime)s - %(message)s",
-    datefmt="%Y-%m-%d %H:%M:%S"
+    handlers=[logging.handlers.MemoryHandler(LOG_FLUSH_SIZE, flushLevel=logging.ERROR, target=log_file_handler)]
 )
 
+def warm_up():
+    """Builds the agents, shared LLM/OpenAI clients and spaCy pipeline so the first /chat is not slow."""
+    from agents.agent_selector import select_agent  # noqa: F401 (imports every agent module)
+    from tools.registry import get_llm, get_openai_client, get_nlp
+    get_llm()
+    get_openai_client()
+    try:
+        get_nlp()
+    except Exception as e:
+        print(f"⚠️ spaCy pipeline not loaded during warm-up: {e}")
+    _ready.set()
+
+
+def mark_draining():
+    """Fails readiness so the load balancer stops routing new chats to this worker."""
+    _draining.set()
+
+
+@app.route("/healthz", methods=["GET"])
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return jsonify({"status": "ok", "pid": os.getpid()})
+
+
+@app.route("/readyz", methods=["GET"])
+def readyz():
+    """Readiness: warmed up, not draining, and the session store answers."""
+    if _draining.is_set() or not _ready.is_set():
+        return jsonify({"status": "draining" if _draining.is_set() else "starting"}), 503
+    try:
+        session_store.get("readyz", "ping")
+    except Exception as e:
+        return jsonify({"status": "session store unavailable", "error": str(e)}), 503
+    return jsonify({"status": "ready"})
+
+
 @app.route("/")
 def home():
     session["user_id"] = session.get("user_id", os.urandom(16).hex())  # Assign a user_id if not present
@@ -33,13 +82,24 @@ def home():
 
 @app.route("/init", methods=["GET"])
 def init_chat():
-    clear_json_files()
-    """Send initial welcome message when chat loads."""
+    """Session start: clears any state left for this user and sends the welcome message."""
+    with bind_session(session.get("user_id")):
+        clear_json_files()
+    assistant_memory.clear(session.get("user_id"))
     welcome_msg = "### Hello and welcome to Akij Air! 🌟"
     print("Sending Welcome Message:", welcome_msg)  # Debugging
     return jsonify({"response": welcome_msg})
 
 
+@app.route("/reset", methods=["POST"])
+def reset_chat():
+    """Starts over: clears this user's search, passengers, flight list and selection."""
+    with bind_session(session.get("user_id")):
+        clear_json_files()
+    assistant_memory.clear(session.get("user_id"))
+    return jsonify({"response": "🔄 Your conversation has been reset. Where would you like to fly?"})
+
+
 @app.route("/chat", methods=["POST"])
 def chat():
     """Handles chatbot requests."""
@@ -50,26 +110,126 @@ def chat():
 
     chatbot_response = select_agent(user_input, user_id)  # Pass user input to chatbot
 
+    return jsonify({"response": _response_text(chatbot_response)})
+
+
+@app.route("/chat/stream", methods=["POST"])
+def chat_stream():
+    """
+    Same pipeline as /chat, answered as Server-Sent Events: "progress" events for each step,
+    "token" events while the final reply is generated, then "done" with the complete reply.
+    """
+    from agents.agent_selector import select_agent  # Import inside function to prevent circular dependency
+
+    user_id = session.get("user_id")  # Retrieve user_id from session
+    user_input = request.json.get("message")
+    stream = ChatStream()
+    stream.put("progress", {"message": "🤔 Thinking…"})
+
+    def run_turn():
+        with bind_stream(stream):
+            try:
+                stream.done(_response_text(select_agent(user_input, user_id)))
+            except Exception as e:
+                print(f"❌ Streaming chat failed: {e}")
+                stream.error("Sorry, something went wrong. Please try again.")
+
+    # ✅ Own thread, not the shared task pool: the pipeline fans out to that pool itself
+    threading.Thread(target=run_turn, name="chat-stream", daemon=True).start()
+    return Response(
+        stream.sse(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/passengers/bulk", methods=["POST"])
+def passengers_bulk():
+    """
+    Group bookings: adds every passenger at once from an uploaded CSV/XLSX "file" or a pasted
+    "text" block (one passenger per line, or a table with a header row), stored in one write.
+    """
+    from agents.passenger_details_agent import import_passengers  # Import inside function to prevent circular dependency
+
+    user_id = session.get("user_id")
+    upload = request.files.get("file")
+    text = request.form.get("text") or (request.get_json(silent=True) or {}).get("text")
+    with bind_session(user_id):
+        try:
+            if upload:
+                response = import_passengers(file=(upload.filename, upload.read()))
+            else:
+                response = import_passengers(text=text)
+        except ValueError as e:
+            return jsonify({"response": f"❌ {e}"}), 400
+    log_conversation(user_id, f"[bulk passengers] {upload.filename if upload else text}", response)
+    return jsonify({"response": response})
+
+
+@app.route("/passengers/document", methods=["POST"])
+def passenger_document():
+    """
+    Passport/NID upload ("file", "kind": passport|nid, optional "passenger_index"). Answers 202 with
+    the job right away; OCR runs in the background and fills in the passenger's details when done.
+    """
+    from agents.passenger_document_agent import upload_passenger_document  # Import inside function to prevent circular dependency
+
+    user_id = session.get("user_id")
+    upload = request.files.get("file")
+    if upload is None:
+        return jsonify({"response": "❌ Please attach a passport or NID image."}), 400
+    passenger_index = request.form.get("passenger_index", type=int)
+    with bind_session(user_id):
+        try:
+            job = upload_passenger_document(request.form.get("kind", "passport"), upload.filename, upload.read(),
+                                            upload.mimetype, passenger_index)
+        except ValueError as e:
+            return jsonify({"response": f"❌ {e}"}), 400
+    return jsonify(job), 202
+
+
+@app.route("/passengers/document/<job_id>", methods=["GET"])
+def passenger_document_status(job_id):
+    """Status of an upload job: "queued", "done" or "failed", with the reply to show."""
+    from agents.passenger_document_agent import get_document_job
+
+    with bind_session(session.get("user_id")):
+        job = get_document_job(job_id)
+    if job is None:
+        return jsonify({"response": "❌ Unknown upload."}), 404
+    return jsonify(job)
+
+
+def _response_text(chatbot_response):
     if isinstance(chatbot_response, dict):
-        response_text = chatbot_response.get("response", "Sorry, I couldn't process that.")
-    else:
-        response_text = str(chatbot_response)
+        return chatbot_response.get("response", "Sorry, I couldn't process that.")
+    return str(chatbot_response)
+
 
-    return jsonify({"response": response_text})
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    """Exposes internal pipeline counters (queue depth, drops, flush timings, supplier API latency)."""
+    return jsonify({
+        "conversation_log": conversation_log.get_metrics(),
+        "supplier_api": get_supplier_client().metrics(),
+        "search_cache": search_cache.get_metrics(),
+        "assistant_memory": assistant_memory.get_metrics(),
+        "llm_cache": llm_cache.get_metrics(),
+        "document_ocr": document_ocr.get_metrics(),
+    })
 
 
 def log_conversation(user_id, user_message, bot_response):
     """
-    Logs each user-bot conversation turn and stores it in the vector database.
+    Queues each user-bot conversation turn for the log file and the vector database.
+    The write happens on the background conversation log worker, not in the request.
     """
-    log_entry = f"[{user_id}] User: {user_message}\n[{user_id}] Bot: {bot_response}\n"
-    logging.info(log_entry)
-
-    # ✅ Store in FAISS
-    store_in_vector_db(user_id, user_message, bot_response)
+    conversation_log.submit(user_id, user_message, bot_response)
 
 if __name__ == "__main__":
+    # ✅ Development server only; production runs `gunicorn -c gunicorn.conf.py app:app`
     print("### Hello and welcome to Akij Air! 🌟")  # Show in terminal
+    warm_up()
     app.run(host="0.0.0.0", port=80, debug=True)
 
 
@@ -0,0 +1,61 @@
+"""
+Production serving config: gunicorn -c gunicorn.conf.py app:app
+
+A /chat turn spends most of its time waiting on OpenAI and the supplier API, so each worker
+runs many threads (gthread) and the process count only needs to cover the CPU-bound parts.
+"""
+import os
+import signal
+import multiprocessing
+
+# ✅ Sessions must be visible to every worker process, not just the one that created them
+os.environ.setdefault("SESSION_STORE_BACKEND", "sqlite")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '80')}"
+workers = int(os.getenv("WEB_CONCURRENCY", str(min(multiprocessing.cpu_count() * 2 + 1, 8))))
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")  # "gevent" also works if it is installed
+threads = int(os.getenv("GUNICORN_THREADS", "32"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "1000"))  # gevent only
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))  # a turn can chain several LLM and supplier calls
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", "30"))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", "5"))
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "0"))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", "0"))
+
+# ✅ Import the app once in the master; workers fork from it (thread pools, HTTP clients and
+# the conversation log worker are recreated per process on first use)
+preload_app = True
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+loglevel = os.getenv("GUNICORN_LOG_LEVEL", "info")
+
+
+def post_worker_init(worker):
+    """
+    Builds the agents, LLM client and spaCy pipeline before the worker reports ready, and makes
+    SIGTERM (a rolling deploy or scale-down) fail readiness before the worker starts shutting down.
+    """
+    from app import warm_up, mark_draining
+    warm_up()
+
+    handle_exit = signal.getsignal(signal.SIGTERM)  # installed by the worker's init_signals
+
+    def handle_term(signum, frame):
+        mark_draining()
+        if callable(handle_exit):
+            handle_exit(signum, frame)
+
+    signal.signal(signal.SIGTERM, handle_term)
+
+
+def worker_int(worker):
+    from app import mark_draining
+    mark_draining()
+
+
+def worker_exit(server, worker):
+    """Writes any queued conversation turns before the worker goes away."""
+    from app import mark_draining, conversation_log
+    mark_draining()
+    conversation_log.shutdown()
@@ -0,0 +1,160 @@
+import os
+import time
+import queue
+import atexit
+import logging
+import threading
+
+# ✅ Pipeline settings (overridable via environment)
+LOG_QUEUE_SIZE = int(os.getenv("CONVERSATION_LOG_QUEUE_SIZE", "1000"))
+LOG_FLUSH_SIZE = int(os.getenv("CONVERSATION_LOG_FLUSH_SIZE", "32"))
+LOG_FLUSH_INTERVAL = float(os.getenv("CONVERSATION_LOG_FLUSH_INTERVAL", "1.0"))  # seconds
+LOG_ENQUEUE_TIMEOUT = float(os.getenv("CONVERSATION_LOG_ENQUEUE_TIMEOUT", "0.05"))  # seconds
+
+logger = logging.getLogger("chatbot.conversation")
+
+
+def _store_batch(turns):
+    """Default sink: imported lazily so ChromaDB only loads inside the worker."""
+    from memory.json_memory import store_batch_in_vector_db
+    store_batch_in_vector_db(turns)
+
+
+class ConversationLogPipeline:
+    """
+    Moves conversation logging off the request path.
+
+    `submit()` only enqueues the turn. A background worker drains the bounded queue and,
+    every `flush_size` turns or `flush_interval` seconds, writes the batch to the log and
+    stores it in ChromaDB with a single `collection.add`. When the queue is full, `submit()`
+    waits up to `enqueue_timeout` and then drops the turn (counted in the metrics) rather
+    than slowing down the user's reply.
+    """
+
+    def __init__(self, max_queue_size=LOG_QUEUE_SIZE, flush_size=LOG_FLUSH_SIZE,
+                 flush_interval=LOG_FLUSH_INTERVAL, enqueue_timeout=LOG_ENQUEUE_TIMEOUT, store_batch=_store_batch):
+        self.max_queue_size = max_queue_size
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.store_batch = store_batch
+        self._lock = threading.Lock()
+        self._pid = None
+        self._queue = None
+        self._worker = None
+        self._stop = None
+        self.metrics = {
+            "enqueued": 0,
+            "dropped": 0,
+            "flushed_turns": 0,
+            "flushed_batches": 0,
+            "failed_batches": 0,
+            "max_queue_depth": 0,
+            "enqueue_wait_seconds": 0.0,
+            "last_flush_seconds": 0.0,
+        }
+
+    def _ensure_worker(self):
+        """Starts the worker on first use, and again in each forked worker process."""
+        if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+            return
+        with self._lock:
+            if self._worker is not None and self._pid == os.getpid() and self._worker.is_alive():
+                return
+            self._pid = os.getpid()
+            self._queue = queue.Queue(maxsize=self.max_queue_size)
+            self._stop = threading.Event()
+            self._worker = threading.Thread(target=self._run, name="conversation-log", daemon=True)
+            self._worker.start()
+
+    def submit(self, user_id, user_message, bot_response):
+        """Queues one turn for logging. Returns False if it was dropped because the queue stayed full."""
+        self._ensure_worker()
+        started = time.perf_counter()
+        try:
+            self._queue.put((user_id, user_message, bot_response), timeout=self.enqueue_timeout)
+            accepted = True
+        except queue.Full:
+            accepted = False
+
+        with self._lock:
+            self.metrics["enqueue_wait_seconds"] += time.perf_counter() - started
+            if accepted:
+                self.metrics["enqueued"] += 1
+                self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], self._queue.qsize())
+            else:
+                self.metrics["dropped"] += 1
+
+        if not accepted:
+            print(f"⚠️ Conversation log queue full. Dropped turn for user {user_id}.")
+        return accepted
+
+    def _run(self):
+        batch = []
+        deadline = time.monotonic() + self.flush_interval
+        while True:
+            timeout = max(0.0, deadline - time.monotonic())
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                pass
+
+            if len(batch) >= self.flush_size or time.monotonic() >= deadline or self._stop.is_set():
+                # ✅ On shutdown, drain everything that is still queued before exiting
+                if self._stop.is_set():
+                    while True:
+                        try:
+                            batch.append(self._queue.get_nowait())
+                        except queue.Empty:
+                            break
+                if batch:
+                    self._flush(batch)
+                    for _ in batch:
+                        self._queue.task_done()
+                    batch = []
+                deadline = time.monotonic() + self.flush_interval
+                if self._stop.is_set():
+                    return
+
+    def _flush(self, batch):
+        started = time.perf_counter()
+        for user_id, user_message, bot_response in batch:
+            logger.info(f"[{user_id}] User: {user_message}\n[{user_id}] Bot: {bot_response}\n")
+        for handler in logging.getLogger().handlers:
+            handler.flush()
+
+        try:
+            self.store_batch(batch)
+            with self._lock:
+                self.metrics["flushed_turns"] += len(batch)
+                self.metrics["flushed_batches"] += 1
+        except Exception as e:
+            print(f"❌ Error storing conversation batch: {e}")
+            with self._lock:
+                self.metrics["failed_batches"] += 1
+        with self._lock:
+            self.metrics["last_flush_seconds"] = time.perf_counter() - started
+
+    def flush(self):
+        """Blocks until every turn queued so far has been written."""
+        if self._queue is not None and self._pid == os.getpid():
+            self._queue.join()
+
+    def shutdown(self, timeout=10.0):
+        """Flushes the remaining turns and stops the worker."""
+        if self._worker is None or self._pid != os.getpid():
+            return
+        self._stop.set()
+        self._worker.join(timeout)
+
+    def get_metrics(self):
+        """Returns a snapshot of the pipeline counters plus the current queue depth."""
+        with self._lock:
+            snapshot = dict(self.metrics)
+        snapshot["queue_depth"] = self._queue.qsize() if self._queue is not None else 0
+        snapshot["queue_capacity"] = self.max_queue_size
+        return snapshot
+
+
+conversation_log = ConversationLogPipeline()
+atexit.register(conversation_log.shutdown)
@@ -0,0 +1,169 @@
+import os
+import time
+from langchain_core.messages import HumanMessage, AIMessage
+from memory.session_memory import SessionMemory, bind_session
+from tools.concurrency import submit
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# ✅ Prompt budget per user (tokens are estimated, ~4 characters each)
+ASSISTANT_MEMORY_WINDOW_TOKENS = int(os.getenv("ASSISTANT_MEMORY_WINDOW_TOKENS", "1500"))  # recent turns kept verbatim
+ASSISTANT_MEMORY_SUMMARY_TOKENS = int(os.getenv("ASSISTANT_MEMORY_SUMMARY_TOKENS", "300"))  # summary of older turns
+ASSISTANT_MEMORY_MESSAGE_TOKENS = int(os.getenv("ASSISTANT_MEMORY_MESSAGE_TOKENS", "500"))  # longest single stored message
+ASSISTANT_MEMORY_MAX_SESSIONS = int(os.getenv("ASSISTANT_MEMORY_MAX_SESSIONS", "1000"))  # users kept (least recently active dropped)
+ASSISTANT_MEMORY_SUMMARY_TIMEOUT = float(os.getenv("ASSISTANT_MEMORY_SUMMARY_TIMEOUT", "120"))  # seconds before a stuck summary is retried
+
+CHARS_PER_TOKEN = 4
+
+SUMMARY_PROMPT = """Update the running summary of a conversation between a user and a travel assistant.
+Keep facts the assistant should remember (destinations, dates, preferences, open questions).
+Answer with the updated summary only, in at most {max_words} words.
+
+Current summary:
+{summary}
+
+New lines:
+{lines}
+"""
+
+
+def estimate_tokens(text):
+    """Cheap token estimate; good enough for budgeting and needs no tokenizer download."""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def clip_text(text, max_tokens):
+    limit = max_tokens * CHARS_PER_TOKEN
+    return text if len(text) <= limit else text[:limit].rstrip() + "…"
+
+
+def _format_lines(messages):
+    return "\n".join(
+        f"{'User' if isinstance(message, HumanMessage) else 'Assistant'}: {message.content}"
+        for message in messages
+    )
+
+
+def _to_message(message):
+    return (HumanMessage if message["type"] == "human" else AIMessage)(content=message["content"])
+
+
+def summarize_with_llm(summary, messages, max_tokens=ASSISTANT_MEMORY_SUMMARY_TOKENS):
+    """Folds `messages` into `summary` with one LLM call."""
+    from tools.registry import get_llm
+    prompt = SUMMARY_PROMPT.format(
+        max_words=max_tokens * 3 // 4, summary=summary or "(empty)", lines=_format_lines(messages)
+    )
+    return get_llm().invoke([HumanMessage(content=prompt)]).content.strip()
+
+
+class ConversationMemory:
+    """
+    Per-user chat history for the smart assistant with a constant prompt footprint.
+
+    Each user keeps the latest turns up to `window_tokens`; older turns are folded into a
+    summary of at most `summary_tokens` by a background LLM call. The state lives in the
+    session store like the rest of the per-user data, so every worker process sees the same
+    history and a reset on any of them clears it everywhere. Only `max_sessions` users keep a
+    history; the store drops the least recently active one first.
+    """
+
+    def __init__(self, window_tokens=ASSISTANT_MEMORY_WINDOW_TOKENS, summary_tokens=ASSISTANT_MEMORY_SUMMARY_TOKENS,
+                 message_tokens=ASSISTANT_MEMORY_MESSAGE_TOKENS, max_sessions=ASSISTANT_MEMORY_MAX_SESSIONS,
+                 summarize=summarize_with_llm, store=None):
+        self.window_tokens = window_tokens
+        self.summary_tokens = summary_tokens
+        self.message_tokens = min(message_tokens, window_tokens // 2)
+        self.max_sessions = max_sessions
+        self.summarize = summarize
+        # {"summary", "messages": [{"type": "human"|"ai", "content"}], "tokens", "pending", "summarizing_since"}
+        self.memory = SessionMemory(os.path.join(DATA_DIR, "assistant_memory.json"), store=store)
+        self.metrics = {"evicted_sessions": 0, "summaries": 0, "summary_errors": 0}
+
+    def _update(self, user_id, fn):
+        with bind_session(user_id):
+            return self.memory.update_data(fn)
+
+    def context(self, user_id):
+        """Returns (summary, recent messages) for the prompt."""
+        with bind_session(user_id):
+            state = self.memory.load_data()
+        return state.get("summary", ""), [_to_message(message) for message in state.get("messages", [])]
+
+    def render(self, user_id):
+        """The history as prompt text: the summary line (if any) followed by the recent turns."""
+        summary, messages = self.context(user_id)
+        lines = _format_lines(messages)
+        if summary:
+            return f"Summary of earlier conversation: {summary}\n{lines}".rstrip()
+        return lines or "(no previous messages)"
+
+    def add_turn(self, user_id, user_message, response_text):
+        """Stores one exchange and moves turns that no longer fit the window to the summary."""
+        turn = [
+            {"type": "human", "content": clip_text(user_message, self.message_tokens)},
+            {"type": "ai", "content": clip_text(response_text, self.message_tokens)},
+        ]
+
+        def apply(state):
+            messages = state.setdefault("messages", [])
+            pending = state.setdefault("pending", [])
+            messages.extend(turn)
+            state["tokens"] = state.get("tokens", 0) + sum(estimate_tokens(message["content"]) for message in turn)
+            while state["tokens"] > self.window_tokens and len(messages) > 2:
+                evicted = messages[:2]
+                del messages[:2]
+                state["tokens"] -= sum(estimate_tokens(message["content"]) for message in evicted)
+                pending.extend(evicted)
+            # ✅ One summarizer per user across all workers; a stale claim (crashed worker) is taken over
+            summarizing_since = state.get("summarizing_since")
+            if pending and (not summarizing_since or time.time() - summarizing_since > ASSISTANT_MEMORY_SUMMARY_TIMEOUT):
+                state["summarizing_since"] = time.time()
+                return True
+            return False
+
+        if self._update(user_id, apply):
+            submit(self._summarize, user_id)
+        self.metrics["evicted_sessions"] += self.memory.trim(self.max_sessions)
+
+    def _summarize(self, user_id):
+        """Background job: folds pending turns into the summary until none are left."""
+        def take_pending(state):
+            if not state:  # reset or evicted meanwhile: nothing left to summarize, don't recreate it
+                return "", []
+            pending, state["pending"] = state.get("pending", []), []
+            if not pending:
+                state["summarizing_since"] = None
+            else:
+                state["summarizing_since"] = time.time()
+            return state.get("summary", ""), pending
+
+        while True:
+            summary, pending = self._update(user_id, take_pending)
+            if not pending:
+                return
+            try:
+                summary = clip_text(self.summarize(summary, [_to_message(message) for message in pending]),
+                                    self.summary_tokens)
+                self.metrics["summaries"] += 1
+            except Exception as e:
+                # Keep the old summary; the evicted turns are dropped rather than retried forever
+                print(f"⚠️ Conversation summary failed for {user_id}: {e}")
+                self.metrics["summary_errors"] += 1
+            self._update(user_id, lambda state: self._store_summary(state, summary))
+
+    @staticmethod
+    def _store_summary(state, summary):
+        if state.get("summarizing_since"):  # not cleared by a reset while the summary was written
+            state["summary"] = summary
+
+    def clear(self, user_id):
+        with bind_session(user_id):
+            self.memory.clear_data()
+
+    def get_metrics(self):
+        return dict(self.metrics, sessions=self.memory.session_count())
+
+
+assistant_memory = ConversationMemory()
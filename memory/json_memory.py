@@ -1,20 +1,67 @@
 import os
 import json
+import sqlite3
+import threading
+from collections import OrderedDict
 import chromadb
 import numpy as np
+from chromadb.api.types import Documents, EmbeddingFunction
+from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
 from langchain_community.embeddings import OpenAIEmbeddings
 
 # ✅ Define Paths for JSON Memory & ChromaDB Storage
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
 DATA_DIR = os.path.join(BASE_DIR, "data")  # Ensure JSON memory & ChromaDB store here
 CHROMA_DB_PATH = os.path.join(DATA_DIR, "chromadb_store")  # Store ChromaDB inside "data"
+TURN_COUNTER_PATH = os.path.join(CHROMA_DB_PATH, "turn_counters.sqlite3")  # Per-user turn counters
+
+# ✅ Retrieval settings for long-term conversation memory
+EMBEDDING_CACHE_SIZE = int(os.getenv("EMBEDDING_CACHE_SIZE", "2048"))  # texts whose embeddings are kept
+RAG_TOP_K = int(os.getenv("RAG_TOP_K", "3"))  # past turns injected into a prompt
+RAG_MAX_DISTANCE = float(os.getenv("RAG_MAX_DISTANCE", "1.2"))  # squared L2; larger means less related
 
 # ✅ Ensure 'data' directory exists
 os.makedirs(DATA_DIR, exist_ok=True)
 
-# ✅ Initialize ChromaDB with Absolute Path
+
+
+class CachedEmbeddingFunction(EmbeddingFunction[Documents]):
+    """
+    Wraps a ChromaDB embedding function with an LRU cache keyed by the exact text, so a
+    repeated query (or document) is embedded once. Only the misses of a batch are embedded.
+    """
+
+    def __init__(self, embed, max_entries=EMBEDDING_CACHE_SIZE):
+        self.embed = embed
+        self.max_entries = max_entries
+        self._cache = OrderedDict()  # text -> embedding
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "misses": 0}
+
+    def __call__(self, input: Documents):
+        with self._lock:
+            embeddings = [self._cache.get(text) for text in input]
+            missing = [text for text, embedding in zip(input, embeddings) if embedding is None]
+            self.metrics["hits"] += len(input) - len(missing)
+            self.metrics["misses"] += len(missing)
+        if missing:
+            unique = list(dict.fromkeys(missing))
+            computed = dict(zip(unique, self.embed(unique)))
+            with self._lock:
+                for text, embedding in computed.items():
+                    self._cache[text] = embedding
+                    self._cache.move_to_end(text)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+            embeddings = [computed[text] if embedding is None else embedding
+                          for text, embedding in zip(input, embeddings)]
+        return embeddings
+
+
+# ✅ Initialize ChromaDB with Absolute Path (same default model, with repeated texts served from cache)
+embedding_function = CachedEmbeddingFunction(DefaultEmbeddingFunction())
 chroma_client = chromadb.PersistentClient(path=CHROMA_DB_PATH)
-collection = chroma_client.get_or_create_collection(name="chat_history")
+collection = chroma_client.get_or_create_collection(name="chat_history", embedding_function=embedding_function)
 
 
 class JSONMemory:
@@ -67,26 +114,99 @@ class JSONMemory:
         print(f"🗑️ Data in {self.filename} has been cleared.")
 
 
+class TurnCounter:
+    """
+    Allocates per-user, monotonically increasing turn numbers for conversation IDs.
+    Counters live in a small SQLite file next to the ChromaDB store, so allocating an ID
+    costs one indexed row update no matter how many turns the collection already holds.
+    """
+
+    def __init__(self, path, collection):
+        self.collection = collection
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, timeout=10, isolation_level=None, check_same_thread=False)
+        # ✅ WAL + NORMAL sync: commits don't fsync, so an allocation stays sub-millisecond
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS turn_counters (user_id TEXT PRIMARY KEY, next_turn INTEGER NOT NULL)"
+        )
+
+    def _seed(self, user_id):
+        """
+        First turn for a user without a counter: continue after any IDs already stored for them.
+        Runs once per user and only reads that user's IDs.
+        """
+        existing_ids = self.collection.get(where={"user_id": user_id}, include=[])["ids"]
+        turns = [int(i.rsplit("_", 1)[-1]) for i in existing_ids if i.rsplit("_", 1)[-1].isdigit()]
+        return max(turns) + 1 if turns else 0
+
+    def next(self, user_id):
+        """Returns the next turn number for the user and advances the counter."""
+        with self._lock:
+            # ✅ IMMEDIATE takes the write lock up front so concurrent workers never hand out the same turn
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute(
+                    "SELECT next_turn FROM turn_counters WHERE user_id = ?", (user_id,)
+                ).fetchone()
+                turn = row[0] if row else self._seed(user_id)
+                self._conn.execute(
+                    "INSERT INTO turn_counters (user_id, next_turn) VALUES (?, ?) "
+                    "ON CONFLICT(user_id) DO UPDATE SET next_turn = excluded.next_turn",
+                    (user_id, turn + 1)
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+        return turn
+
+
+turn_counter = TurnCounter(TURN_COUNTER_PATH, collection)
+
+
 def store_in_vector_db(user_id, user_message, bot_response):
     """
     Stores user interactions in ChromaDB for retrieval.
     """
-    conversation_text = f"User: {user_message} | Bot: {bot_response}"
+    store_batch_in_vector_db([(user_id, user_message, bot_response)])
 
-    collection.add(
-        documents=[conversation_text],
-        metadatas=[{"user_id": user_id}],
-        ids=[str(user_id) + "_" + str(len(collection.get()["ids"]))]
-    )
-    print(f"✅ Conversation stored in ChromaDB at {CHROMA_DB_PATH}")
+
+def store_batch_in_vector_db(turns):
+    """
+    Stores several (user_id, user_message, bot_response) turns with a single collection.add,
+    so ChromaDB embeds and persists the whole batch in one pass.
+    """
+    if not turns:
+        return
+
+    documents, metadatas, ids = [], [], []
+    for user_id, user_message, bot_response in turns:
+        user_id = str(user_id)
+        turn = turn_counter.next(user_id)
+        documents.append(f"User: {user_message} | Bot: {bot_response}")
+        metadatas.append({"user_id": user_id, "turn": turn})
+        ids.append(f"{user_id}_{turn}")
+
+    collection.add(documents=documents, metadatas=metadatas, ids=ids)
+    print(f"✅ {len(ids)} conversation turn(s) stored in ChromaDB at {CHROMA_DB_PATH}")
 
 
-def search_conversation(query):
+def search_conversation(query, user_id=None, n_results=RAG_TOP_K, max_distance=RAG_MAX_DISTANCE):
     """
     Searches for similar past conversations in ChromaDB.
+    With a user_id only that user's turns are searched; turns farther than max_distance are dropped.
+    Returns the matching documents, closest first.
     """
     results = collection.query(
         query_texts=[query],
-        n_results=3  # Return top 3 similar results
+        n_results=n_results,
+        where={"user_id": str(user_id)} if user_id is not None else None,
+        include=["documents", "distances"],
     )
-    return results["documents"]
+    return [
+        document for document, distance in zip(results["documents"][0], results["distances"][0])
+        if max_distance is None or distance <= max_distance
+    ]
@@ -0,0 +1,290 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+
+# ✅ Define Paths for the persistent session store
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# ✅ "memory" keeps state in-process, "sqlite" persists it across restarts and workers
+SESSION_STORE_BACKEND = os.getenv("SESSION_STORE_BACKEND", "memory").lower()
+SESSION_STORE_PATH = os.getenv("SESSION_STORE_PATH", os.path.join(DATA_DIR, "session_store.sqlite3"))
+
+# ✅ Used by scripts and tests that run agents without a Flask session
+DEFAULT_SESSION_ID = "default"
+
+_current_session_id = contextvars.ContextVar("session_id", default=DEFAULT_SESSION_ID)
+
+# ✅ Serializes read-modify-write updates of the same session key inside one process
+_UPDATE_LOCKS = [threading.RLock() for _ in range(64)]
+
+
+def _update_lock(session_id, key):
+    return _UPDATE_LOCKS[hash((session_id, key)) % len(_UPDATE_LOCKS)]
+
+
+class InMemorySessionStore:
+    """Keeps per-session state in a process-local dictionary."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._recency = {}  # key -> OrderedDict of session ids, least recently written first
+        self._lock = threading.Lock()
+
+    def get(self, session_id, key):
+        """Returns a private copy of the stored value, or None."""
+        with self._lock:
+            value = self._sessions.get(session_id, {}).get(key)
+        return copy.deepcopy(value)
+
+    def set(self, session_id, key, value):
+        """Stores a private copy of the value for the session."""
+        value = copy.deepcopy(value)
+        with self._lock:
+            self._sessions.setdefault(session_id, {})[key] = value
+            recency = self._recency.setdefault(key, OrderedDict())
+            recency[session_id] = None
+            recency.move_to_end(session_id)
+
+    def update(self, session_id, key, fn):
+        """
+        Replaces the value with fn(current value or None) as one step; returns the new value.
+        When fn returns None nothing is written.
+        """
+        with _update_lock(session_id, key):
+            value = fn(self.get(session_id, key))
+            if value is not None:
+                self.set(session_id, key, value)
+            return value
+
+    def delete(self, session_id, key=None):
+        """Deletes one key, or the whole session when no key is given."""
+        with self._lock:
+            if key is None:
+                self._sessions.pop(session_id, None)
+                for recency in self._recency.values():
+                    recency.pop(session_id, None)
+            else:
+                self._sessions.get(session_id, {}).pop(key, None)
+                self._recency.get(key, {}).pop(session_id, None)
+
+    def trim(self, key, max_sessions):
+        """Drops `key` from all but the `max_sessions` most recently written sessions; returns how many."""
+        with self._lock:
+            recency = self._recency.get(key, OrderedDict())
+            evicted = 0
+            while len(recency) > max_sessions:
+                session_id, _ = recency.popitem(last=False)
+                values = self._sessions.get(session_id, {})
+                values.pop(key, None)
+                if not values:
+                    self._sessions.pop(session_id, None)
+                evicted += 1
+            return evicted
+
+    def key_count(self, key):
+        """Number of sessions holding a value for `key`."""
+        with self._lock:
+            return len(self._recency.get(key, ()))
+
+    def session_count(self):
+        with self._lock:
+            return len(self._sessions)
+
+
+UPSERT_SQL = (
+    "INSERT INTO session_state (session_id, key, value, updated_at) VALUES (?, ?, ?, ?) "
+    "ON CONFLICT(session_id, key) DO UPDATE SET value = excluded.value, updated_at = excluded.updated_at"
+)
+
+
+class SQLiteSessionStore:
+    """Persists per-session state in a single SQLite table (one row per session and key)."""
+
+    def __init__(self, path):
+        self.path = path
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._local = threading.local()
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS session_state ("
+                "session_id TEXT NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, "
+                "updated_at REAL NOT NULL, PRIMARY KEY (session_id, key))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS session_state_key_updated ON session_state (key, updated_at)")
+
+    def _connection(self):
+        """
+        One connection per thread (reopened after a fork: with preload_app the store is built in
+        the gunicorn master, and a connection must never be shared across processes); WAL lets
+        readers proceed while a writer commits.
+        """
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get(self, session_id, key):
+        row = self._connection().execute(
+            "SELECT value FROM session_state WHERE session_id = ? AND key = ?", (session_id, key)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set(self, session_id, key, value):
+        with self._connection() as conn:
+            conn.execute(UPSERT_SQL, (session_id, key, json.dumps(value, separators=(",", ":")), time.time()))
+
+    def update(self, session_id, key, fn):
+        """
+        Replaces the value with fn(current value or None) as one step; returns the new value.
+        BEGIN IMMEDIATE takes the database write lock before the read, so a writer in another
+        worker process cannot slip in between; threads of this process queue on a lock first.
+        When fn returns None nothing is written.
+        """
+        with _update_lock(session_id, key):
+            conn = self._connection()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT value FROM session_state WHERE session_id = ? AND key = ?", (session_id, key)
+                ).fetchone()
+                value = fn(json.loads(row[0]) if row else None)
+                if value is not None:
+                    conn.execute(UPSERT_SQL, (session_id, key, json.dumps(value, separators=(",", ":")), time.time()))
+            except BaseException:
+                conn.rollback()
+                raise
+            conn.commit()
+            return value
+
+    def delete(self, session_id, key=None):
+        with self._connection() as conn:
+            if key is None:
+                conn.execute("DELETE FROM session_state WHERE session_id = ?", (session_id,))
+            else:
+                conn.execute("DELETE FROM session_state WHERE session_id = ? AND key = ?", (session_id, key))
+
+    def trim(self, key, max_sessions):
+        """Drops `key` from all but the `max_sessions` most recently written sessions; returns how many."""
+        with self._connection() as conn:
+            return conn.execute(
+                "DELETE FROM session_state WHERE key = ? AND session_id NOT IN ("
+                "SELECT session_id FROM session_state WHERE key = ? ORDER BY updated_at DESC LIMIT ?)",
+                (key, key, max_sessions),
+            ).rowcount
+
+    def key_count(self, key):
+        """Number of sessions holding a value for `key`."""
+        return self._connection().execute("SELECT COUNT(*) FROM session_state WHERE key = ?", (key,)).fetchone()[0]
+
+    def session_count(self):
+        row = self._connection().execute("SELECT COUNT(DISTINCT session_id) FROM session_state").fetchone()
+        return row[0]
+
+
+def create_session_store(backend=SESSION_STORE_BACKEND, path=SESSION_STORE_PATH):
+    """Builds the configured session store backend."""
+    if backend == "sqlite":
+        return SQLiteSessionStore(path)
+    if backend != "memory":
+        print(f"⚠️ Unknown SESSION_STORE_BACKEND '{backend}'. Falling back to in-memory store.")
+    return InMemorySessionStore()
+
+
+session_store = create_session_store()
+
+
+def get_session_id():
+    """Returns the session bound to the current request (or the default session)."""
+    return _current_session_id.get()
+
+
+@contextmanager
+def bind_session(session_id):
+    """Binds all SessionMemory reads/writes inside the block to the given session."""
+    token = _current_session_id.set(str(session_id) if session_id else DEFAULT_SESSION_ID)
+    try:
+        yield
+    finally:
+        _current_session_id.reset(token)
+
+
+def clear_session(session_id=None):
+    """Drops every stored value for the session (defaults to the bound session)."""
+    session_store.delete(session_id or get_session_id())
+
+
+class SessionMemory:
+    """
+    Drop-in replacement for JSONMemory that keeps data per session instead of in shared files.
+    The filename is only used as the key, so `SessionMemory("data/passenger_data.json")`
+    and `JSONMemory("data/passenger_data.json")` address the same logical document.
+    """
+
+    def __init__(self, filename, store=None):
+        self.key = os.path.splitext(os.path.basename(filename))[0]
+        self.store = store
+
+    def _store(self):
+        return self.store or session_store
+
+    def load_data(self):
+        """Loads the session's data, or {} if nothing was saved yet."""
+        data = self._store().get(get_session_id(), self.key)
+        return data if data is not None else {}
+
+    def save_data(self, data):
+        """Saves data for the current session, overwriting the previous value."""
+        self._store().set(get_session_id(), self.key, data)
+
+    def update_data(self, fn):
+        """
+        Loads, changes and saves the session's data as one step, so concurrent writers (e.g.
+        background OCR fills) cannot overwrite each other. `fn(data)` changes `data` (a dict,
+        {} if nothing was saved yet) in place; its return value is returned. If nothing was saved
+        and fn leaves `data` empty, nothing is written.
+        """
+        results = []
+
+        def apply(data):
+            existed = data is not None
+            data = data if existed else {}
+            results.append(fn(data))
+            return data if existed or data else None
+
+        self._store().update(get_session_id(), self.key, apply)
+        return results[-1]
+
+    def save_necessary_data(self, new_data):
+        """Merges new data with existing data and saves it."""
+        existing_data = self.load_data()
+
+        if not isinstance(existing_data, dict):
+            existing_data = {}
+
+        if isinstance(new_data, dict):
+            existing_data.update(new_data)
+
+        self.save_data(existing_data)
+
+    def clear_data(self):
+        """Clears the session's data for this key."""
+        self._store().delete(get_session_id(), self.key)
+
+    def trim(self, max_sessions):
+        """Keeps this key only for the `max_sessions` most recently written sessions; returns how many were dropped."""
+        return self._store().trim(self.key, max_sessions)
+
+    def session_count(self):
+        """Number of sessions that have data for this key."""
+        return self._store().key_count(self.key)
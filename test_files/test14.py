@@ -0,0 +1,78 @@
+"""
+Benchmark: conversation ID allocation cost vs. collection size.
+
+Compares the old `len(collection.get()["ids"])` ID scheme against TurnCounter.
+Uses a throwaway ChromaDB store and a constant embedding function so only the
+ID allocation + add path is measured (no ONNX/OpenAI embedding).
+
+Usage: python -m test_files.test14 [size ...]   (default: 1000 10000 100000 1000000)
+"""
+import os
+import sys
+import time
+import shutil
+import tempfile
+import chromadb
+from memory.json_memory import TurnCounter
+
+SIZES = [int(arg) for arg in sys.argv[1:]] or [1_000, 10_000, 100_000, 1_000_000]
+SAMPLES = 50
+BATCH = 5_000
+
+
+class ConstantEmbedding:
+    """Returns the same tiny vector for every document."""
+
+    def __call__(self, input):
+        return [[0.1, 0.2, 0.3] for _ in input]
+
+
+def fill_to(collection, target):
+    """Bulk-inserts filler turns (spread over 1000 users) until the collection holds `target` items."""
+    count = collection.count()
+    while count < target:
+        n = min(BATCH, target - count)
+        collection.add(
+            documents=["User: hi | Bot: hello"] * n,
+            metadatas=[{"user_id": f"filler{(count + i) % 1000}"} for i in range(n)],
+            ids=[f"filler{(count + i) % 1000}_{count + i}" for i in range(n)],
+        )
+        count += n
+
+
+def time_old(collection, user_id):
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        turn = len(collection.get()["ids"])
+        collection.add(documents=["User: hi | Bot: hello"], metadatas=[{"user_id": user_id}], ids=[f"{user_id}_{turn}"])
+    return (time.perf_counter() - start) / SAMPLES * 1000
+
+
+def time_new(collection, counter, user_id):
+    start = time.perf_counter()
+    for _ in range(SAMPLES):
+        turn = counter.next(user_id)
+        collection.add(documents=["User: hi | Bot: hello"], metadatas=[{"user_id": user_id}], ids=[f"{user_id}_{turn}"])
+    return (time.perf_counter() - start) / SAMPLES * 1000
+
+
+def main():
+    store_dir = tempfile.mkdtemp(prefix="turn_bench_")
+    try:
+        client = chromadb.PersistentClient(path=store_dir)
+        collection = client.get_or_create_collection(name="chat_history", embedding_function=ConstantEmbedding())
+        counter = TurnCounter(os.path.join(store_dir, "turn_counters.sqlite3"), collection)
+
+        print(f"{'stored turns':>14} | {'old ms/turn':>12} | {'new ms/turn':>12}")
+        for size in SIZES:
+            fill_to(collection, size)
+            new_ms = time_new(collection, counter, f"bench_new_{size}")
+            # ✅ The old scheme gets unusably slow on large stores; skip it past 100k
+            old_ms = time_old(collection, f"bench_old_{size}") if size <= 100_000 else float("nan")
+            print(f"{size:>14,} | {old_ms:>12.2f} | {new_ms:>12.2f}")
+    finally:
+        shutil.rmtree(store_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
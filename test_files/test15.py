@@ -0,0 +1,74 @@
+"""
+Held-out evaluation of the embedding intent router (tools.intent_index).
+
+Builds the index from `tools.detect_intent.examples` (no cache) and reports per-intent
+precision on utterances that are NOT in the examples dict, plus classification latency.
+
+Usage: python -m test_files.test15
+"""
+import time
+from tools.detect_intent import examples
+from tools.intent_index import IntentIndex, create_embedder
+
+held_out = {
+    "greeting": ["hey hello", "good afternoon", "hi there, how are you?", "salam alaikum", "hello bot"],
+    "flight_booking": [
+        "book a flight from Dhaka to Dubai", "I need a ticket to Kuala Lumpur",
+        "find me flights from Chittagong to Dhaka", "I want to fly to London next month", "one-way ticket please",
+    ],
+    "providing_date": [
+        "on the 5th of June", "I want to travel on March 22", "departing 12 August",
+        "next Friday works for me", "flying on December 2nd",
+    ],
+    "providing_location": [
+        "from Dhaka", "going to Sylhet", "I am flying out of Chittagong",
+        "my destination is Singapore", "leaving from Cox's Bazar",
+    ],
+    "passenger_details": [
+        "My name is Rahim Uddin", "Passenger: Nusrat Jahan, phone 01812345678",
+        "email is karim@example.com", "passport number B7654321", "her name is Fatema Begum",
+    ],
+    "flight_query": [
+        "which flight is the cheapest?", "how long does the flight take?", "is there a direct flight?",
+        "what airlines fly this route?", "how much baggage is included?",
+    ],
+    "flight_selection": [
+        "I'll go with the second one", "pick the US-Bangla flight", "choose the morning flight",
+        "select the cheapest flight for me", "I want the last option",
+    ],
+    "booking_confirmation": [
+        "yes go ahead", "please confirm the reservation", "book it", "finalize the booking please",
+        "yes, complete my booking",
+    ],
+    "other": [
+        "what is the visa policy for Thailand?", "can I bring my cat?", "tell me about hotels in Dubai",
+        "what's the weather in Sylhet?", "do I need a covid test?",
+    ],
+}
+
+
+def main():
+    started = time.perf_counter()
+    index = IntentIndex(examples, embedder=create_embedder(), cache_path=None)
+    print(f"🧱 Built index over {len(index.labels)} examples in {(time.perf_counter() - started) * 1000:.1f} ms")
+
+    report = index.evaluate(held_out)
+    print(f"\n{'intent':<22} {'precision':>9} {'predicted':>9} {'support':>8}")
+    for intent, row in report["per_intent"].items():
+        precision = f"{row['precision']:.2f}" if row["precision"] is not None else "-"
+        print(f"{intent:<22} {precision:>9} {row['predicted']:>9} {row['support']:>8}")
+    print(f"\n🎯 Accuracy: {report['accuracy']:.2f}   Coverage: {report['coverage']:.2f}")
+
+    queries = [text for utterances in held_out.values() for text in utterances]
+    started = time.perf_counter()
+    for text in queries:
+        index.classify(text)
+    print(f"⚡ Mean classify latency: {(time.perf_counter() - started) / len(queries) * 1000:.3f} ms")
+
+    # ✅ Hot-add a correction and show it takes effect immediately
+    index.add_example("providing_location", "leaving from Cox's Bazar", persist=False)
+    print(f"➕ After hot-add: {index.classify('leaving from Coxs Bazar')}")
+
+
+if __name__ == "__main__":
+    main()
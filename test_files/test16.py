@@ -0,0 +1,100 @@
+"""
+Exercises tools.supplier_client against a local stub supplier (no network, no API keys).
+
+The stub answers /flight/search after two 503s, always fails /flight/validate, and serves
+/flight/booking-details normally. Checks retries, the circuit breaker (including a half-open
+trial that fails before any request is sent) and connection reuse, then prints the per-endpoint
+latency histograms.
+
+Usage: python -m test_files.test16
+"""
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from tools.supplier_client import SupplierClient, SupplierUnavailable, ENDPOINTS
+
+hits = {}
+connections = set()
+
+
+class StubSupplier(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so reused connections are visible
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        hits[self.path] = hits.get(self.path, 0) + 1
+        connections.add(self.client_address)
+        if self.path == "/flight/search" and hits[self.path] <= 2:
+            return self._reply(503, {"status": "error"})
+        if self.path == "/flight/validate":
+            return self._reply(500, {"status": "error"})
+        self._reply(200, {"status": "success", "data": [{"flight_key": "stub"}]})
+
+    def _reply(self, status, body):
+        payload = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+def main():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubSupplier)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    endpoints = {name: (base, path, timeout, idempotent) for name, (_, path, timeout, idempotent) in ENDPOINTS.items()}
+    client = SupplierClient(headers={}, endpoints=endpoints, max_retries=2, backoff=0.01)
+    client.breakers["validate"].threshold = 2
+
+    try:
+        # ✅ Two 503s then success: one logical call, three attempts
+        response = client.post("search", json={"origin": "DAC"})
+        assert response.status_code == 200 and hits["/flight/search"] == 3, hits
+        print("✅ search retried through transient 503s")
+
+        # ✅ Persistent 500s open the breaker; the next call is rejected without a request
+        for _ in range(2):
+            assert client.post("validate", json={}).status_code == 500
+        sent = hits["/flight/validate"]
+        try:
+            client.post("validate", json={})
+            raise AssertionError("breaker did not open")
+        except SupplierUnavailable:
+            assert hits["/flight/validate"] == sent
+        print(f"✅ validate breaker opened after {sent} attempts")
+
+        # ✅ A half-open trial that dies before the request (payload not JSON-serializable) must
+        # not leave the breaker stuck: after the next cooldown a new trial is let through
+        breaker = client.breakers["validate"]
+        breaker.cooldown = 0.05
+        time.sleep(breaker.cooldown)
+        try:
+            client.post("validate", json={"when": object()})
+            raise AssertionError("unserializable payload was sent")
+        except TypeError:
+            pass
+        time.sleep(breaker.cooldown)
+        assert client.post("validate", json={}).status_code == 500 and hits["/flight/validate"] > sent
+        print(f"✅ validate breaker let a new trial through after a failed one (state: {breaker.state})")
+
+        # ✅ Sequential calls reuse the pooled keep-alive connection
+        connections.clear()
+        started = time.perf_counter()
+        for _ in range(50):
+            client.post("booking_details", json={})
+        elapsed = (time.perf_counter() - started) / 50 * 1000
+        print(f"✅ 50 booking-details calls over {len(connections)} connection(s), {elapsed:.2f} ms/call")
+        assert len(connections) == 1
+
+        print(json.dumps(client.metrics(), indent=2))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
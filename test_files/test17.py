@@ -0,0 +1,86 @@
+"""
+Micro-benchmark: search payload build + serialization, old dict/string round trip vs. typed model.
+
+Old path (before tools.supplier_payloads): build a dict, json.dumps it, .replace("None", "null"),
+json.loads it back, and let requests json.dumps it again. New path: build a SearchRequest and
+serialize it once with to_json(). Also checks that the RoundTrip payload has both segments and
+that values containing "None" survive (the old .replace corrupted them).
+
+Usage: python -m test_files.test17 [iterations]   (default: 20000)
+"""
+import sys
+import json
+import time
+from tools.supplier_payloads import SearchRequest, SearchSegment, DEFAULT_TEAM_PROFILE
+
+ITERATIONS = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+
+flight_details = {
+    "origin": "DAC", "destination": "CXB", "date_of_travel": "2025-04-19", "return_date": "2025-04-25",
+    "journey_type": "RoundTrip", "num_adults": 2, "num_children": 1,
+}
+
+
+def old_payload(details):
+    payload = {
+        "journey_type": details.get("journey_type", "OneWay"),
+        "segment": [{
+            "departure_airport_type": "AIRPORT", "departure_airport": details["origin"],
+            "arrival_airport_type": "AIRPORT", "arrival_airport": details["destination"],
+            "departure_date": details["date_of_travel"],
+        }],
+        "travelers_adult": details.get("num_adults", 1), "travelers_child": details.get("num_children", 0),
+        "travelers_child_age": [], "travelers_infants": 0, "travelers_infants_age": [],
+        "fare_type": None, "fare_option": None, "content_type": None, "ptc_option": None,
+        "agency_ethnic_list": None, "preferred_carrier": [], "non_stop_flight": "any", "baggage_option": "any",
+        "booking_class": "Economy", "supplier_uid": "F1TT00041", "partner_id": "78", "language": "en",
+        "short_ref": "12121212121", "version": None,
+    }
+    if details["journey_type"] == "RoundTrip" and details["return_date"]:
+        payload["segment"].append({
+            "departure_airport": details["destination"], "arrival_airport": details["origin"],
+            "departure_date": details["return_date"],
+        })
+    payload = json.dumps(payload).replace("None", "null")
+    return json.dumps(json.loads(payload))  # what requests sends
+
+
+def new_payload(details):
+    round_trip = details.get("journey_type") == "RoundTrip" and details.get("return_date")
+    segments = [SearchSegment(departure_airport=details["origin"], arrival_airport=details["destination"],
+                              departure_date=details["date_of_travel"])]
+    if round_trip:
+        segments.append(SearchSegment(departure_airport=details["destination"], arrival_airport=details["origin"],
+                                      departure_date=details["return_date"]))
+    return SearchRequest(
+        journey_type=details.get("journey_type", "OneWay"), segment=segments,
+        travelers_adult=details.get("num_adults", 1), travelers_child=details.get("num_children", 0),
+        team_profile=None if round_trip else DEFAULT_TEAM_PROFILE,
+    ).to_json()
+
+
+def bench(fn):
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        fn(flight_details)
+    return (time.perf_counter() - start) / ITERATIONS * 1_000_000
+
+
+def main():
+    body = json.loads(new_payload(flight_details))
+    assert len(body["segment"]) == 2 and "team_profile" not in body, body
+    assert body["segment"][1]["departure_airport"] == "CXB"
+    one_way = json.loads(new_payload(dict(flight_details, journey_type="OneWay")))
+    assert len(one_way["segment"]) == 1 and len(one_way["team_profile"]) == 3
+
+    tricky = dict(flight_details, origin="NoneSuch")
+    print(f"old keeps 'NoneSuch': {'NoneSuch' in old_payload(tricky)}")
+    print(f"new keeps 'NoneSuch': {'NoneSuch' in new_payload(tricky).decode()}")
+
+    old_us, new_us = bench(old_payload), bench(new_payload)
+    print(f"{'old dict/string round trip':<28} {old_us:8.1f} µs/payload")
+    print(f"{'typed model, one dump':<28} {new_us:8.1f} µs/payload")
+
+
+if __name__ == "__main__":
+    main()
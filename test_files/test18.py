@@ -0,0 +1,47 @@
+"""
+Import-time profile: how long importing the app takes and which modules dominate.
+
+Runs `python -X importtime -c "import <module>"` in a fresh interpreter, prints the slowest
+imports by cumulative time, and checks that no LLM client, spaCy pipeline or agent was built
+during import (tools.registry creates them on first use).
+
+Usage: python -m test_files.test18 [module] [top_n]   (default: agents.agent_selector 25)
+"""
+import os
+import sys
+import subprocess
+
+MODULE = sys.argv[1] if len(sys.argv) > 1 else "agents.agent_selector"
+TOP_N = int(sys.argv[2]) if len(sys.argv) > 2 else 25
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK = f"import {MODULE}; from tools import registry; print('REGISTRY', registry.loaded())"
+
+
+def main():
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-W", "ignore", "-c", CHECK],
+        cwd=BASE_DIR, capture_output=True, text=True,
+    )
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((int(cumulative_us), int(self_us), name.rstrip()))
+    if result.returncode != 0:
+        print(result.stderr[-2000:])
+        sys.exit(result.returncode)
+
+    total = max((row[0] for row in rows), default=0)
+    print(f"import {MODULE}: {total / 1_000_000:.2f}s cumulative\n")
+    print(f"{'cumulative ms':>14} | {'self ms':>8} | module")
+    for cumulative_us, self_us, name in sorted(rows, reverse=True)[:TOP_N]:
+        print(f"{cumulative_us / 1000:>14.1f} | {self_us / 1000:>8.1f} | {name}")
+
+    built = [line for line in result.stdout.splitlines() if line.startswith("REGISTRY")]
+    print(f"\nBuilt during import: {built[0][len('REGISTRY '):] if built else 'unknown'}  (expected: [])")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Smart assistant memory: prompt history size stays constant, and the history is shared by workers.
+
+Feeds many long conversations through ConversationMemory (with a local summarizer instead of
+the LLM) and prints the rendered history size as sessions grow. Then two ConversationMemory
+instances on one SQLite session store stand in for two gunicorn workers: a turn stored by one
+must be rendered by the other, and a reset on either must clear it for both. Last, USERS users
+talk to a memory capped at MAX_SESSIONS on each store: the resident sessions must stay at the cap,
+with the least recently active users evicted.
+
+Usage: python -m test_files.test19 [users] [turns]   (default: 300 60)
+"""
+import os
+import sys
+import time
+import tempfile
+from memory.conversation_memory import ConversationMemory, estimate_tokens
+from memory.session_memory import InMemorySessionStore, SQLiteSessionStore
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+TURNS = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+MAX_SESSIONS = 50
+
+
+def local_summarize(summary, messages):
+    """Stand-in for the LLM: keeps the last words of the summary plus the new user lines."""
+    words = (summary + " " + " ".join(m.content for m in messages if m.type == "human")).split()
+    return " ".join(words[-150:])
+
+
+def main():
+    memory = ConversationMemory(summarize=local_summarize, store=InMemorySessionStore())
+    largest = {}
+    start = time.perf_counter()
+    for user in range(USERS):
+        user_id = f"user-{user}"
+        for turn in range(TURNS):
+            memory.add_turn(user_id, f"Turn {turn}: any beach trips from Dhaka in May for {user}? " * 3,
+                            f"Here are some ideas for turn {turn}: Cox's Bazar, Maldives, Phuket. " * 6)
+            if turn in (1, 5, 20, TURNS - 1):
+                largest[turn] = max(largest.get(turn, 0), estimate_tokens(memory.render(user_id)))
+    elapsed = time.perf_counter() - start
+
+    time.sleep(0.5)  # let background summaries finish
+    print(f"{USERS} users x {TURNS} turns in {elapsed:.2f}s")
+    print(f"{'after turn':>10} | largest history (est. tokens)")
+    for turn, tokens in sorted(largest.items()):
+        print(f"{turn:>10} | {tokens}")
+    budget = memory.window_tokens + memory.summary_tokens
+    print(f"\nBudget: {budget} tokens  ->  {'OK' if max(largest.values()) <= budget + 50 else 'EXCEEDED'}")
+    print("Metrics:", memory.get_metrics())
+
+    # ✅ Two workers, one session store
+    store = SQLiteSessionStore(os.path.join(tempfile.mkdtemp(prefix="test19-"), "session_store.sqlite3"))
+    worker_a = ConversationMemory(summarize=local_summarize, store=store)
+    worker_b = ConversationMemory(summarize=local_summarize, store=store)
+    worker_a.add_turn("shared-user", "I want to visit Japan in April", "Cherry blossom season, great choice!")
+    shared = "Japan" in worker_b.render("shared-user")
+    worker_b.clear("shared-user")  # /reset handled by the other worker
+    cleared = worker_a.render("shared-user") == "(no previous messages)"
+    print(f"\nShared across workers: {'OK' if shared else 'FAILED'}   Reset seen by every worker: {'OK' if cleared else 'FAILED'}")
+    assert shared and cleared
+
+    # ✅ Resident sessions stay bounded, whatever the number of users
+    print(f"\n{'store':<8} | {'users':>5} | {'resident':>8} | {'evicted':>7}")
+    for name, bounded_store in [("memory", InMemorySessionStore()), ("sqlite", store)]:
+        bounded = ConversationMemory(summarize=local_summarize, store=bounded_store, max_sessions=MAX_SESSIONS)
+        peak = 0
+        for user in range(USERS):
+            for turn in range(3):
+                bounded.add_turn(f"bounded-{user}", f"Turn {turn}: flights to Bangkok? " * 20, "Yes, daily. " * 60)
+            peak = max(peak, bounded.get_metrics()["sessions"])
+        time.sleep(0.2)  # let background summaries finish; they must not bring evicted users back
+        metrics = bounded.get_metrics()
+        print(f"{name:<8} | {USERS:>5} | {metrics['sessions']:>8} | {metrics['evicted_sessions']:>7}")
+        assert peak <= MAX_SESSIONS and metrics["sessions"] == min(USERS, MAX_SESSIONS), (peak, metrics)
+        assert metrics["evicted_sessions"] == max(USERS - MAX_SESSIONS, 0), metrics
+        assert bounded.render(f"bounded-{USERS - 1}") != "(no previous messages)"  # most recent user kept
+        if USERS > MAX_SESSIONS:
+            assert bounded.render("bounded-0") == "(no previous messages)"  # least recent user evicted
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Long-term memory retrieval: per-user top-k search over the chat history with cached embeddings.
+
+Fills an in-memory ChromaDB collection with many users' turns, then runs repeated queries through
+memory.json_memory.search_conversation. Embeddings come from a local hashing function instead of
+the ONNX model, so the script runs offline. Prints retrieval latency, embedding cache hits, whether
+results stay inside the asking user's history, and the size of the injected context.
+
+Usage: python -m test_files.test20 [users] [turns_per_user]   (default: 50 40)
+"""
+import sys
+import time
+import hashlib
+import numpy as np
+import chromadb
+from chromadb.api.types import Documents, EmbeddingFunction
+from memory import json_memory
+from memory.conversation_memory import estimate_tokens
+
+USERS = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+TURNS = int(sys.argv[2]) if len(sys.argv) > 2 else 40
+TOPICS = ["beach holiday in Bali", "visa for Japan", "baggage allowance", "Dubai layover hotel",
+          "flights to London in June", "student fares to Canada", "halal meals on board", "Umrah packages"]
+
+
+class HashingEmbedding(EmbeddingFunction[Documents]):
+    """Bag-of-words hashed into 256 dimensions, L2-normalized."""
+
+    def __call__(self, input: Documents):
+        vectors = []
+        for text in input:
+            vector = np.zeros(256, dtype=np.float32)
+            for word in text.lower().split():
+                vector[int(hashlib.md5(word.encode()).hexdigest(), 16) % 256] += 1
+            vectors.append(vector / (np.linalg.norm(vector) or 1))
+        return vectors
+
+
+def main():
+    embedding_function = json_memory.CachedEmbeddingFunction(HashingEmbedding())
+    client = chromadb.EphemeralClient()
+    json_memory.collection = client.get_or_create_collection("chat_history_demo", embedding_function=embedding_function)
+
+    documents, metadatas, ids = [], [], []
+    for user in range(USERS):
+        for turn in range(TURNS):
+            topic = TOPICS[(user + turn) % len(TOPICS)]
+            documents.append(f"User: tell me about {topic} | Bot: here is what I know about {topic} for user {user}")
+            metadatas.append({"user_id": f"user-{user}", "turn": turn})
+            ids.append(f"user-{user}_{turn}")
+    json_memory.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+    print(f"Stored {len(ids)} turns for {USERS} users")
+
+    queries = [f"what about {topic}?" for topic in TOPICS]
+    timings, leaked, context_tokens = [], 0, []
+    for round_ in range(3):
+        start = time.perf_counter()
+        for user in range(USERS):
+            for query in queries:
+                results = json_memory.search_conversation(query, user_id=f"user-{user}", max_distance=None)
+                leaked += sum(f"for user {user}" not in document for document in results)
+                context_tokens.append(sum(estimate_tokens(document) for document in results))
+        timings.append((time.perf_counter() - start) / (USERS * len(queries)) * 1000)
+        print(f"round {round_ + 1}: {timings[-1]:.2f} ms/query  cache={embedding_function.metrics}")
+
+    print(f"\nResults from other users: {leaked}  (expected: 0)")
+    print(f"Injected context: max {max(context_tokens)} est. tokens for top-{json_memory.RAG_TOP_K}, "
+          f"independent of {TURNS} stored turns per user")
+
+
+if __name__ == "__main__":
+    main()
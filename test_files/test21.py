@@ -0,0 +1,66 @@
+"""
+LLM call cache: repeated and near-duplicate inputs never reach the model twice.
+
+Wraps a slow local stand-in for an LLM call with llm_cached and replays a realistic mix of
+passenger names and chat messages. Prints calls saved, latency, hit ratios, SQLite persistence
+(a fresh cache instance, like another worker, reuses stored answers) and TTL expiry.
+
+Usage: python -m test_files.test21 [requests]   (default: 2000)
+"""
+import os
+import sys
+import time
+import random
+import tempfile
+from tools.llm_cache import LLMCache, llm_cached
+
+REQUESTS = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+LLM_LATENCY = 0.002  # seconds per stand-in call (real calls take ~0.5-2s)
+NAMES = ["Ibrahim", "ibrahim", "IBRAHIM ", "Turin", "Tasmira", "Karim", "Ayesha", "Rahim", "Nusrat", "Sadia"]
+MESSAGES = ["yes confirm", "Yes, confirm!", "YES CONFIRM", "book it", "Book it.", "what's the baggage allowance?",
+            "What's the baggage allowance", "hello", "Hello!!", "option 2"]
+
+calls = {"count": 0}
+
+
+def fake_llm(text):
+    calls["count"] += 1
+    time.sleep(LLM_LATENCY)
+    return f"answer for {text.strip().lower()}"
+
+
+def run(cache, namespace, inputs, ttl=None):
+    cached = llm_cached(namespace, ttl=ttl, cache=cache)(fake_llm)
+    start = time.perf_counter()
+    for text in inputs:
+        cached(text)
+    return time.perf_counter() - start
+
+
+def main():
+    random.seed(7)
+    inputs = [random.choice(NAMES + MESSAGES) for _ in range(REQUESTS)]
+    path = os.path.join(tempfile.mkdtemp(), "llm_cache.sqlite3")
+
+    uncached = REQUESTS * LLM_LATENCY
+    cache = LLMCache(backend="sqlite", path=path)
+    elapsed = run(cache, "demo", inputs)
+    print(f"{REQUESTS} lookups, {calls['count']} model calls ({len(set(inputs))} distinct raw inputs)")
+    print(f"time: {elapsed:.3f}s cached vs ~{uncached:.2f}s uncached")
+    print("metrics:", cache.get_metrics())
+
+    calls["count"] = 0
+    other_worker = LLMCache(backend="sqlite", path=path)
+    run(other_worker, "demo", inputs)
+    print(f"\nFresh instance on the same SQLite file: {calls['count']} model calls (expected: 0)")
+
+    calls["count"] = 0
+    short = LLMCache()
+    run(short, "ttl", ["hello"], ttl=0.05)
+    time.sleep(0.1)
+    run(short, "ttl", ["hello"], ttl=0.05)
+    print(f"After TTL expiry: {calls['count']} model calls for 2 lookups (expected: 2)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Local first-name -> gender/title lookup: coverage and cost compared with two GPT calls per passenger.
+
+Runs tools.name_gender over typical passenger names and prints the local guess, its confidence,
+and which names would still fall back to the LLM (unknown or ambiguous).
+
+Usage: python -m test_files.test22
+"""
+import time
+from tools.name_gender import get_name_gender_index, NAME_GENDER_MIN_CONFIDENCE, TITLE_FOR_GENDER
+
+SAMPLE = ["Ibrahim", "Turin", "Md Rahim", "Mst. Rokeya", "Nusrat", "Tanvir", "Fatema", "Sadia", "Arnab",
+          "Priyanka", "Mohammad", "Syeda", "Kamal", "Ayesha", "Nur Jahan", "John", "Emily", "Alex", "Robin",
+          "Xavier", "Shahin", "Umme", "Karim", "Tasmira"]
+ROUNDS = 10000
+
+
+def main():
+    index = get_name_gender_index()
+    print(f"Table: {len(index.names)} names, threshold {NAME_GENDER_MIN_CONFIDENCE}\n")
+    fallbacks = []
+    for name in SAMPLE:
+        gender, confidence = index.predict(name)
+        local = gender if confidence >= NAME_GENDER_MIN_CONFIDENCE else None
+        if local is None:
+            fallbacks.append(name)
+        print(f"{name:<12} {str(gender):<7} {confidence:>5.3f}  -> {TITLE_FOR_GENDER[local] + ' (local)' if local else 'LLM fallback'}")
+
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for name in SAMPLE:
+            index.predict(name)
+    per_lookup = (time.perf_counter() - start) / (ROUNDS * len(SAMPLE)) * 1_000_000
+    print(f"\nLocal: {len(SAMPLE) - len(fallbacks)}/{len(SAMPLE)} names, {per_lookup:.1f} µs per lookup")
+    print(f"LLM fallback for: {', '.join(fallbacks)}  (previously every name cost 2 GPT-4 calls)")
+
+
+if __name__ == "__main__":
+    main()
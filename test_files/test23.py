@@ -0,0 +1,112 @@
+"""
+Passenger extractor benchmark: single-pass extractor vs the previous per-field re.search version.
+
+Runs both over a corpus of realistic passenger messages with known answers and prints the time per
+message and per-field accuracy. Title/gender name lookups are left out of both, so only the text
+extraction is compared. The legacy extractor is reproduced below exactly as it was.
+
+Usage: python -m test_files.test23 [rounds]   (default: 200)
+"""
+import re
+import sys
+import time
+from tools.passenger_extractor import extract_passengers, get_passenger_extractor
+
+ROUNDS = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+FIELDS = ("gender", "first_name", "last_name", "email", "phone", "dob", "passport_number", "nationality",
+          "date_of_issue", "date_of_expiry")
+
+# (message, expected fields of each passenger)
+CORPUS = [
+    ("My name is Mr Ibrahim khalil ibrahim@ibos.com 01515619886 A12345",
+     [dict(first_name="Ibrahim", last_name="Khalil", email="ibrahim@ibos.com", phone="01515619886", passport_number="A12345")]),
+    ("My name is Turin Tasmira", [dict(first_name="Turin", last_name="Tasmira")]),
+    ("Turin@akij.com 01750671424 A54321", [dict(email="Turin@akij.com", phone="01750671424", passport_number="A54321")]),
+    ("Mr. Ibrahim Khalil, ibrahim@ibos.com, +8801515-619886, passport EB0123456 issued 2020-01-10 expires 10/01/2030, "
+     "DOB 12 May 1990, Bangladeshi, male",
+     [dict(first_name="Ibrahim", last_name="Khalil", email="ibrahim@ibos.com", phone="01515619886", passport_number="EB0123456",
+           date_of_issue="2020-01-10", date_of_expiry="2030-01-10", dob="1990-05-12", nationality="Bangladeshi", gender="male")]),
+    ("date of birth 1988-11-23, female", [dict(dob="1988-11-23", gender="female")]),
+    ("Ms Nusrat Jahan, nusrat.j@gmail.com, 01812345678, born 03/04/1992",
+     [dict(first_name="Nusrat", last_name="Jahan", email="nusrat.j@gmail.com", phone="01812345678", dob="1992-04-03")]),
+    ("passport BX7654321, nationality: Bangladesh, expiry date 2031-06-30",
+     [dict(passport_number="BX7654321", nationality="Bangladeshi", date_of_expiry="2031-06-30")]),
+    ("Mr Kamal Uddin kamal@x.com 01911223344; Mrs Rokeya Begum rokeya@x.com 01611223344",
+     [dict(first_name="Kamal", last_name="Uddin", email="kamal@x.com", phone="01911223344"),
+      dict(first_name="Rokeya", last_name="Begum", email="rokeya@x.com", phone="01611223344")]),
+    ("name: Sadia Islam, email sadia@akij.com, phone 01711-000111, dob May 5th, 1999",
+     [dict(first_name="Sadia", last_name="Islam", email="sadia@akij.com", phone="01711000111", dob="1999-05-05")]),
+    ("Dr Arif Hossain, Indian citizen, passport Z1234567 valid until 12.12.2029",
+     [dict(first_name="Arif", last_name="Hossain", nationality="Indian", passport_number="Z1234567", date_of_expiry="2029-12-12")]),
+    ("my email is rahim@yahoo.com and phone 01555666777", [dict(email="rahim@yahoo.com", phone="01555666777")]),
+    ("I am flying with my wife next week", []),
+]
+
+
+def legacy_extract(text):
+    """The previous extract_passenger_details, minus the GPT title/gender calls."""
+    first_name = last_name = email = phone = passport = gender = dob = nationality = None
+    name_match = re.search(
+        r"(?:my name is\s+)?\b(Mr|Ms|Mrs|Dr)?\b\s*([A-Z][a-z]+)[,\s]+([A-Z][a-z]+)(?:\s+(Mr|Ms|Mrs|Dr))?", text, re.IGNORECASE)
+    if name_match:
+        first_name, last_name = name_match.group(2).strip(), name_match.group(3).strip()
+    email_match = re.search(r"\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,7}\b", text)
+    if email_match:
+        email = email_match.group(0)
+    phone_match = re.search(r"\b01\d{9}\b", text)
+    if phone_match:
+        phone = phone_match.group(0)
+    passport_match = re.search(r"\b[A-Z]\d{5,}\b", text)
+    if passport_match:
+        passport = passport_match.group(0)
+    gender_match = re.search(r"\b(Male|Female|Other)\b", text, re.IGNORECASE)
+    if gender_match:
+        gender = gender_match.group(0)
+    dob_match = re.search(r"\b(\d{4}-\d{2}-\d{2})\b", text)
+    if dob_match:
+        dob = dob_match.group(0)
+    nationality_match = re.search(r"\b[A-Za-z]+\b", text)
+    if nationality_match:
+        nationality = nationality_match.group(0)
+    return [dict(gender=gender, first_name=first_name, last_name=last_name, email=email, phone=phone, dob=dob,
+                 passport_number=passport, nationality=nationality, date_of_issue=None, date_of_expiry=None)]
+
+
+def score(extract):
+    """Correct fields / expected fields, plus fields filled that should have stayed empty."""
+    correct = expected_total = spurious = 0
+    for text, expected in CORPUS:
+        found = extract(text)
+        for position in range(max(len(expected), len(found))):
+            want = expected[position] if position < len(expected) else {}
+            got = found[position] if position < len(found) else {}
+            for field in FIELDS:
+                value = got.get(field)
+                value = value.lower() if field == "gender" and value else value
+                if field in want:
+                    expected_total += 1
+                    correct += value == want[field]
+                elif value:
+                    spurious += 1
+    return correct, expected_total, spurious
+
+
+def timed(extract):
+    start = time.perf_counter()
+    for _ in range(ROUNDS):
+        for text, _ in CORPUS:
+            extract(text)
+    return (time.perf_counter() - start) / (ROUNDS * len(CORPUS)) * 1_000_000
+
+
+def main():
+    get_passenger_extractor()  # compile the spaCy rules before timing
+    print(f"{len(CORPUS)} messages x {ROUNDS} rounds\n")
+    print(f"{'extractor':<14} | {'µs/message':>10} | {'correct fields':>14} | {'spurious':>8}")
+    for name, extract in (("legacy", legacy_extract), ("single-pass", extract_passengers)):
+        correct, total, spurious = score(extract)
+        print(f"{name:<14} | {timed(extract):>10.1f} | {f'{correct}/{total}':>14} | {spurious:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Bulk passenger entry: a 9-passenger international family booking entered turn by turn vs in one paste.
+
+The turn-by-turn flow gives each passenger's details over three chat messages (name, contact,
+passport), and every message reloads and rewrites the passenger document. The bulk path
+(agents.passenger_details_agent.import_passengers) reads the same passengers from one CSV block
+and writes once. Prints chat turns, session store writes and time for both, then shows the
+validation replies for a sheet with a missing and an invalid value.
+
+All first names are in data/first_names.csv, so no title/gender LLM call is made.
+
+Usage: python -m test_files.test24
+"""
+import time
+from memory.session_memory import InMemorySessionStore, bind_session
+from agents import passenger_details_agent as agent
+
+FAMILY = [
+    ("Mr.", "Kamal", "Uddin", "male", "kamal@x.com", "01911223344", "1975-02-10", "EB0123451"),
+    ("Mrs.", "Rokeya", "Begum", "female", "rokeya@x.com", "01611223344", "1980-07-21", "EB0123452"),
+    ("Mr.", "Tanvir", "Uddin", "male", "tanvir@x.com", "01711223345", "2001-01-05", "EB0123453"),
+    ("Ms.", "Sadia", "Uddin", "female", "sadia@x.com", "01711223346", "2003-03-15", "EB0123454"),
+    ("Ms.", "Nusrat", "Uddin", "female", "nusrat@x.com", "01711223347", "2006-09-30", "EB0123455"),
+    ("Mr.", "Imran", "Uddin", "male", "imran@x.com", "01711223348", "2009-12-01", "EB0123456"),
+    ("Ms.", "Fatema", "Uddin", "female", "fatema@x.com", "01711223349", "2012-04-18", "EB0123457"),
+    ("Mr.", "Arif", "Uddin", "male", "arif@x.com", "01711223350", "2015-06-06", "EB0123458"),
+    ("Ms.", "Ayesha", "Uddin", "female", "ayesha@x.com", "01711223351", "2018-11-11", "EB0123459"),
+]
+PASSPORT_DATES = ("2020-01-10", "2030-01-09")
+
+
+class CountingStore(InMemorySessionStore):
+    """In-memory session store that counts writes."""
+
+    def __init__(self):
+        super().__init__()
+        self.writes = 0
+
+    def set(self, session_id, key, value):
+        self.writes += 1
+        super().set(session_id, key, value)
+
+
+def fresh_session(store):
+    agent.passenger_memory.store = agent.flight_memory.store = store
+    agent.flight_memory.save_data({"num_adults": 7, "num_children": 2, "flight_type": "international"})
+    store.writes = 0
+
+
+def turn_by_turn():
+    """The chat flow before bulk entry: three messages per passenger, each one load + one save."""
+    turns = 0
+    for index, (title, first, last, gender, email, phone, dob, passport) in enumerate(FAMILY):
+        for message in (f"My name is {title} {first} {last}, {gender}",
+                        f"{email} {phone} date of birth {dob}",
+                        f"passport {passport}, Bangladeshi, issued {PASSPORT_DATES[0]}, expiry {PASSPORT_DATES[1]}"):
+            details = {field: value for field, value in agent.extract_passenger_details(message).items() if value}
+            reply = agent.collect_passenger_details(index, "international", **details)
+            turns += 1
+    return turns, reply
+
+
+def bulk_csv():
+    header = "title,first name,last name,gender,email,phone,dob,passport no,nationality,issue date,expiry date"
+    rows = [",".join(passenger + ("Bangladesh",) + PASSPORT_DATES) for passenger in FAMILY]
+    return 1, agent.import_passengers(text="\n".join([header] + rows))
+
+
+def main():
+    agent.extract_passenger_details("warm up Mr Kamal Uddin")  # compile the spaCy rules before timing
+    print(f"{'flow':<14} | {'chat turns':>10} | {'store writes':>12} | {'ms':>7} | complete")
+    for name, flow in (("turn-by-turn", turn_by_turn), ("bulk CSV", bulk_csv)):
+        store = CountingStore()
+        with bind_session("test24"):
+            fresh_session(store)
+            start = time.perf_counter()
+            turns, reply = flow()
+            elapsed = (time.perf_counter() - start) * 1000
+            passengers = agent.passenger_memory.load_data()["passengers"]
+        complete = sum(all(p.get(field) for field in agent.INTERNATIONAL_FIELDS) for p in passengers)
+        print(f"{name:<14} | {turns:>10} | {store.writes:>12} | {elapsed:>7.1f} | {complete}/{len(FAMILY)}")
+
+    print("\nValidation replies for a tab-separated paste with gaps:")
+    sheet = ("Passenger Name\tEmail\tMobile\tDate of Birth\tPassport\tCountry\tDOI\tDOE\n"
+             "Mr Rahim Karim\trahim@x.com\t+880 1711-000111\t12/05/1990\teb 1234567\tBangladesh\t10 Jan 2020\t09 Jan 2030\n"
+             "Ms Salma Akter\tsalma(at)x.com\t01811000222\t\tEB7654321\tBangladeshi\t2021-02-01\t2031-01-31\n")
+    with bind_session("test24-validation"):
+        fresh_session(CountingStore())
+        print(agent.import_passengers(text=sheet))
+
+
+if __name__ == "__main__":
+    main()
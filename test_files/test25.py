@@ -0,0 +1,140 @@
+"""
+Passport/NID OCR uploads: blocking request vs background OCR workers, against the local stub OCR service.
+
+Starts tools.ocr_stub (OCR_STUB_DELAY seconds per call) and a 4-passenger international booking,
+then uploads four passports plus one duplicate through POST /passengers/document:
+- time each upload request takes, and the time until every passenger record is filled,
+- OCR calls made (the duplicate must not cause a fifth one),
+- a re-upload of a document already read (answered from the OCR cache),
+- a failing OCR service (job ends "failed" with the manual-entry reply),
+- concurrent fills: STRESS_ROUNDS rounds of four passports finishing at once must leave all four
+  passenger records filled.
+The "blocking" row is the old flow: one OCR POST per document inside the request.
+Runs on the sqlite session store, as gunicorn.conf.py does in production (a temporary database).
+
+Usage: python -m test_files.test25 [delay seconds] [stress rounds]   (default: 1.0 200)
+"""
+import io
+import os
+import sys
+import json
+import time
+import tempfile
+import requests
+
+# ✅ Same session backend as production; must be set before the session store is imported
+os.environ["SESSION_STORE_BACKEND"] = "sqlite"
+os.environ["SESSION_STORE_PATH"] = os.path.join(tempfile.mkdtemp(prefix="test25-"), "session_store.sqlite3")
+from tools.ocr_stub import start_stub_server
+from tools.document_ocr import document_ocr
+from memory.session_memory import bind_session
+from agents.passenger_details_agent import passenger_memory, flight_memory, INTERNATIONAL_FIELDS
+from app import app
+
+DELAY = float(sys.argv[1]) if len(sys.argv) > 1 else 1.0
+STRESS_ROUNDS = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+PASSPORTS = [
+    {"surname": "UDDIN", "given_names": "KAMAL", "sex": "M", "date_of_birth": "10 FEB 1975", "nationality": "BGD",
+     "passport_number": "EB0123451", "date_of_issue": "10 JAN 2020", "date_of_expiry": "09 JAN 2030"},
+    {"surname": "BEGUM", "given_names": "ROKEYA", "sex": "F", "date_of_birth": "21 JUL 1980", "nationality": "BANGLADESHI",
+     "passport_number": "EB0123452", "date_of_issue": "10 JAN 2020", "date_of_expiry": "09 JAN 2030"},
+    {"surname": "UDDIN", "given_names": "TANVIR", "sex": "M", "date_of_birth": "05 JAN 2001", "nationality": "BANGLADESHI",
+     "passport_number": "EB0123453", "date_of_issue": "12 MAR 2021", "date_of_expiry": "11 MAR 2031"},
+    {"surname": "UDDIN", "given_names": "SADIA", "sex": "F", "date_of_birth": "15 MAR 2003", "nationality": "BANGLADESHI",
+     "passport_number": "EB0123454", "date_of_issue": "12 MAR 2021", "date_of_expiry": "11 MAR 2031"},
+]
+
+
+def scan(record):
+    return json.dumps(record).encode()
+
+
+def upload(client, content, index, kind="passport"):
+    start = time.perf_counter()
+    response = client.post("/passengers/document", content_type="multipart/form-data", data={
+        "file": (io.BytesIO(content), f"{kind}-{index + 1}.jpg"), "kind": kind, "passenger_index": str(index)})
+    return response.status_code, response.json, (time.perf_counter() - start) * 1000
+
+
+def wait_for(client, job_ids, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        jobs = [client.get(f"/passengers/document/{job_id}").json for job_id in job_ids]
+        if all(job["status"] != "queued" for job in jobs):
+            return jobs
+        time.sleep(0.02)
+    raise TimeoutError("OCR jobs did not finish")
+
+
+def main():
+    server, base_url = start_stub_server(delay=DELAY)
+    stub_calls = lambda: server.app.config["calls"]
+    document_ocr.urls = {"passport": f"{base_url}/passport_ocr", "nid": f"{base_url}/nid_ocr"}
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session["user_id"] = "test25"
+    with bind_session("test25"):
+        flight_memory.save_data({"num_adults": 4, "num_children": 0, "flight_type": "international"})
+
+    print(f"OCR stub delay {DELAY:.1f}s, {len(PASSPORTS)} passports\n")
+    print(f"{'flow':<10} | {'slowest request ms':>18} | {'all filled ms':>13} | {'OCR calls':>9}")
+
+    start = time.perf_counter()
+    slowest = 0
+    for record in PASSPORTS:  # the old PassengerDetailsAgent.process_passport_ocr: one POST inside the request
+        request_start = time.perf_counter()
+        requests.post(f"{base_url}/passport_ocr", files={"file": ("passport.jpg", scan(record), "image/jpeg")}).json()
+        slowest = max(slowest, (time.perf_counter() - request_start) * 1000)
+    print(f"{'blocking':<10} | {slowest:>18.1f} | {(time.perf_counter() - start) * 1000:>13.1f} | {len(PASSPORTS):>9}")
+
+    calls_before = stub_calls()
+    start = time.perf_counter()
+    uploads = [upload(client, scan(record), index) for index, record in enumerate(PASSPORTS)]
+    uploads.append(upload(client, scan(PASSPORTS[0]), 0))  # double-click on the first upload
+    jobs = wait_for(client, {job["job_id"] for _, job, _ in uploads})
+    elapsed = (time.perf_counter() - start) * 1000
+    print(f"{'queued':<10} | {max(ms for _, _, ms in uploads):>18.1f} | {elapsed:>13.1f} | {stub_calls() - calls_before:>9}")
+    assert all(status == 202 for status, _, _ in uploads) and all(job["status"] == "done" for job in jobs)
+
+    with bind_session("test25"):
+        passengers = passenger_memory.load_data()["passengers"]
+    filled = [passenger.get("passport_number") for passenger in passengers]
+    assert filled == [record["passport_number"] for record in PASSPORTS], filled
+    print("\nFilled from the passports (email and phone still to be asked):")
+    for passenger in passengers:
+        print(" ", {field: passenger.get(field) for field in INTERNATIONAL_FIELDS if passenger.get(field)})
+    print(" ", jobs[0]["response"] if jobs[0]["passenger_index"] == 0 else jobs[-1]["response"])
+
+    # ✅ Same document for another passenger slot: answered from the OCR cache, no new OCR call
+    calls_before = stub_calls()
+    status, job, ms = upload(client, scan(PASSPORTS[1]), 3)
+    print(f"\nCached re-upload: HTTP {status}, {ms:.1f} ms, status '{job['status']}', OCR calls {stub_calls() - calls_before}")
+
+    # ✅ OCR service down: the job fails and the user is asked to type the details
+    document_ocr.urls = {"passport": f"{base_url}/missing", "nid": f"{base_url}/missing"}
+    status, job, _ = upload(client, b"new passport scan", 1)
+    print(f"OCR service failing: HTTP {status}, then '{wait_for(client, [job['job_id']])[0]['response']}'")
+
+    # ✅ Four fills finishing at the same moment must not overwrite each other's passengers
+    server.app.config["delay"] = 0
+    document_ocr.urls = {"passport": f"{base_url}/passport_ocr", "nid": f"{base_url}/nid_ocr"}
+    lost = 0
+    for round_number in range(STRESS_ROUNDS):
+        with bind_session("test25"):
+            passenger_memory.clear_data()
+        records = [dict(record, passport_number=f"EC{round_number:03d}{index:04d}") for index, record in enumerate(PASSPORTS)]
+        job_ids = [upload(client, scan(record), index)[1]["job_id"] for index, record in enumerate(records)]
+        wait_for(client, job_ids)
+        with bind_session("test25"):
+            passengers = passenger_memory.load_data()["passengers"]
+        lost += sum(passenger.get("passport_number") != record["passport_number"]
+                    for passenger, record in zip(passengers, records))
+    print(f"Concurrent fills: {lost} of {STRESS_ROUNDS * len(PASSPORTS)} passenger records lost")
+    assert lost == 0
+
+    print("\nMetrics:", document_ocr.get_metrics())
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""
+Local flight answers stay within the search results: questions about other airlines or routes.
+
+Loads data/flight_list.json (US-Bangla and Biman, Dhaka -> Sylhet) into a FlightIndex and asks
+answer_locally questions the results can and cannot answer. An airline that is not in the results
+or a place off the searched route must get the "not in your current results" reply, never an
+answer about the flights that are there; a comparison with a missing airline goes to the LLM (None).
+
+Usage: python -m test_files.test26
+"""
+import json
+import os
+from tools.flight_index import FlightIndex
+from agents.flight_query_agent import answer_locally
+
+FLIGHT_LIST = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "flight_list.json")
+
+# (question, expected reply: "results" = answered from the flights, "outside" = not in the results, None = LLM)
+CASES = [
+    ("Are there direct Emirates flights?", "outside"),
+    ("what baggage does Qatar Airways allow?", "outside"),
+    ("What is the cheapest flight to Dubai?", "outside"),
+    ("cheapest flight to DXB", "outside"),
+    ("Cheapest flight to the United Arab Emirates?", "outside"),
+    ("fastest flight from Chittagong?", "outside"),
+    ("Emirates or Biman, which is cheapest?", None),
+    ("What is the cheapest flight to Sylhet?", "results"),
+    ("cheapest flight from DAC to ZYL", "results"),
+    ("cheapest biman flight?", "results"),
+    ("baggage on US-Bangla?", "results"),
+    ("are there direct flights?", "results"),
+    ("which airlines fly to Sylhet?", "results"),
+]
+
+
+def kind(answer):
+    if answer is None:
+        return None
+    return "outside" if "your current results" in answer.lower() else "results"
+
+
+def main():
+    with open(FLIGHT_LIST, encoding="utf-8") as f:
+        index = FlightIndex.from_response(json.load(f))
+    print(f"{len(index)} flights: {', '.join(index.airlines())}\n")
+
+    failures = 0
+    for question, expected in CASES:
+        answer = answer_locally(question, index)
+        ok = kind(answer) == expected
+        failures += not ok
+        print(f"{'OK ' if ok else 'BAD'} {question}\n    -> {answer}")
+    print(f"\n{len(CASES) - failures} of {len(CASES)} as expected")
+    assert failures == 0
+
+
+if __name__ == "__main__":
+    main()
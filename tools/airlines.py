@@ -0,0 +1,55 @@
+import re
+
+# ✅ IATA code -> airline name; search results show these names instead of the bare codes
+AIRLINES = {
+    "AA": "American Airlines",
+    "AF": "Air France",
+    "AI": "Air India",
+    "AK": "AirAsia",
+    "BA": "British Airways",
+    "BG": "Biman Bangladesh Airlines",
+    "BR": "EVA Air",
+    "BS": "US-Bangla Airlines",
+    "CA": "Air China",
+    "CX": "Cathay Pacific",
+    "DL": "Delta Air Lines",
+    "EK": "Emirates",
+    "ET": "Ethiopian Airlines",
+    "EY": "Etihad Airways",
+    "FR": "Ryanair",
+    "IB": "Iberia",
+    "JL": "Japan Airlines",
+    "KE": "Korean Air",
+    "KLM": "KLM Royal Dutch Airlines",
+    "LH": "Lufthansa",
+    "MH": "Malaysia Airlines",
+    "QF": "Qantas",
+    "QR": "Qatar Airways",
+    "SQ": "Singapore Airlines",
+    "TK": "Turkish Airlines",
+    "UA": "United Airlines",
+    "VS": "Virgin Atlantic",
+    "WN": "Southwest Airlines"
+}
+
+AIRLINE_SUFFIX = re.compile(r"\s+(airlines|airways|air lines)$")
+
+
+def airline_aliases(name):
+    """
+    Lower-case ways users name an airline: the full name, and without "Airlines"/"Airways" when
+    that still leaves two words ("Biman Bangladesh"). One-word leftovers ("Qatar", "Turkish",
+    "United") are places or ordinary words, so they are not aliases.
+    """
+    name = (name or "").lower().strip()
+    short = AIRLINE_SUFFIX.sub("", name)
+    return {alias for alias in (name, short) if alias and (alias == name or " " in alias)}
+
+
+def find_airlines(text):
+    """[(code, name)] of the airlines in AIRLINES that the text names."""
+    text = (text or "").lower().replace("united arab emirates", " ")  # the country, not the airline
+    return [
+        (code, name) for code, name in AIRLINES.items()
+        if any(re.search(rf"(?<![\w-]){re.escape(alias)}(?![\w-])", text) for alias in airline_aliases(name))
+    ]
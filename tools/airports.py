@@ -0,0 +1,184 @@
+import os
+import csv
+import re
+import threading
+import unicodedata
+from collections import defaultdict, namedtuple
+from functools import lru_cache
+
+from tools.intent_classifier import char_ngrams
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# ✅ Bundled subset in OurAirports format; point AIRPORTS_CSV at the full airports.csv to cover every airport
+AIRPORTS_FILE = os.getenv("AIRPORTS_CSV", os.path.join(DATA_DIR, "airports.csv"))
+FUZZY_MIN_SCORE = float(os.getenv("AIRPORT_FUZZY_MIN_SCORE", "0.6"))
+
+# Preferred airport when a city has several: bigger airports with scheduled service first
+AIRPORT_TYPE_RANK = {"large_airport": 0, "medium_airport": 1, "small_airport": 2}
+
+Airport = namedtuple("Airport", ["iata", "name", "city", "country"])
+
+
+def normalize_place(text):
+    """Lowercases, strips accents/punctuation and collapses whitespace ("Cox's Bazar" -> "coxs bazar")."""
+    text = unicodedata.normalize("NFKD", text or "")
+    text = "".join(ch for ch in text if not unicodedata.combining(ch)).lower()
+    text = text.replace("'", "").replace("’", "")
+    return re.sub(r"[^a-z0-9]+", " ", text).strip()
+
+
+class AirportIndex:
+    """
+    In-memory airport resolver built once from an OurAirports-style CSV.
+
+    - Exact and alias lookups (city, airport name, `keywords`) are a single dict hit.
+    - IATA codes ("DAC") resolve through a second dict.
+    - Typos ("Dhakka", "Chitagong") fall back to a character-trigram inverted index
+      scored with the Dice coefficient, so only keys sharing a trigram are compared.
+    """
+
+    def __init__(self, path=AIRPORTS_FILE, fuzzy_min_score=FUZZY_MIN_SCORE):
+        self.fuzzy_min_score = fuzzy_min_score
+        self.by_iata = {}
+        self.by_name = {}  # normalized city/alias/airport name -> Airport
+        self.grams = {}  # normalized key -> trigram set
+        self.gram_index = defaultdict(list)  # trigram -> [normalized key]
+        self._load(path)
+
+    def _load(self, path):
+        ranked = defaultdict(list)  # normalized key -> [(rank, Airport)]
+        with open(path, newline="", encoding="utf-8") as f:
+            for position, row in enumerate(csv.DictReader(f)):
+                iata = (row.get("iata_code") or "").strip().upper()
+                airport_type = row.get("type", "")
+                if len(iata) != 3 or airport_type not in AIRPORT_TYPE_RANK:
+                    continue  # ✅ Skips heliports, closed fields and airports without an IATA code
+
+                airport = Airport(iata, row.get("name", ""), row.get("municipality", ""), row.get("iso_country", ""))
+                self.by_iata.setdefault(iata, airport)
+
+                rank = (AIRPORT_TYPE_RANK[airport_type], row.get("scheduled_service") != "yes", position)
+                names = [airport.city, airport.name] + (row.get("keywords") or "").split(",")
+                for name in names:
+                    key = normalize_place(name)
+                    if key:
+                        ranked[key].append((rank, airport))
+
+        for key, candidates in ranked.items():
+            self.by_name[key] = min(candidates, key=lambda item: item[0])[1]
+            grams = set(char_ngrams(key))
+            self.grams[key] = grams
+            for gram in grams:
+                self.gram_index[gram].append(key)
+
+        print(f"✅ Loaded {len(self.by_iata)} airports ({len(self.by_name)} names) from {path}")
+
+    def fuzzy(self, key):
+        """Returns (Airport, score) for the closest indexed name, or (None, 0.0)."""
+        query_grams = set(char_ngrams(key))
+        if not query_grams:
+            return None, 0.0
+
+        shared = defaultdict(int)
+        for gram in query_grams:
+            for candidate in self.gram_index.get(gram, ()):
+                shared[candidate] += 1
+
+        best_key, best_score = None, 0.0
+        for candidate, overlap in shared.items():
+            score = 2 * overlap / (len(query_grams) + len(self.grams[candidate]))
+            if score > best_score:
+                best_key, best_score = candidate, score
+
+        if best_key is None or best_score < self.fuzzy_min_score:
+            return None, best_score
+        return self.by_name[best_key], best_score
+
+    def resolve(self, query):
+        """Resolves a city, airport name, alias or IATA code to an Airport (or None)."""
+        key = normalize_place(query)
+        if not key:
+            return None
+
+        airport = self.by_name.get(key)
+        if airport:
+            return airport
+
+        if len(key) == 3:
+            airport = self.by_iata.get(key.upper())
+            if airport:
+                return airport
+
+        airport, score = self.fuzzy(key)
+        if airport:
+            print(f"🔎 Fuzzy airport match: '{query}' -> {airport.city} ({airport.iata}, score {score:.2f})")
+        return airport
+
+
+_airport_index = None
+_airport_index_lock = threading.Lock()
+
+
+def get_airport_index():
+    """Returns the shared index, loading the CSV on first use."""
+    global _airport_index
+    if _airport_index is None:
+        with _airport_index_lock:
+            if _airport_index is None:
+                _airport_index = AirportIndex()
+    return _airport_index
+
+
+@lru_cache(maxsize=4096)
+def resolve_airport(query):
+    """Memoized resolver: repeated lookups of the same text skip normalization entirely."""
+    return get_airport_index().resolve(query)
+
+
+def find_airports(text):
+    """
+    Airports a free-text question names: exact city/alias/airport names of up to three words
+    ("Dubai", "Cox's Bazar") and upper-case IATA codes ("DXB"). No fuzzy matching, so ordinary
+    words are not mistaken for places; one- and two-letter names ("LA") are skipped too.
+    """
+    index = get_airport_index()
+    words = normalize_place(text).split()
+    found = {}
+    for size in (3, 2, 1):
+        for start in range(len(words) - size + 1):
+            key = " ".join(words[start:start + size])
+            airport = index.by_name.get(key) if len(key) > 2 else None
+            if airport:
+                found.setdefault(airport.iata, airport)
+    if text != text.upper():  # in an all-caps message every three-letter word would look like a code
+        for code in re.findall(r"\b[A-Z]{3}\b", text):
+            if code in index.by_iata:
+                found.setdefault(code, index.by_iata[code])
+    return list(found.values())
+
+
+def get_airport_code(city):
+    """Returns the IATA code of the main airport for a city/airport/alias, or None."""
+    airport = resolve_airport(city) if city else None
+    return airport.iata if airport else None
+
+
+def get_country(place):
+    """Returns the ISO country code for a city/airport/alias, or None."""
+    airport = resolve_airport(place) if place else None
+    return airport.country if airport else None
+
+
+def get_flight_type(origin, destination):
+    """
+    'domestic' when both ends resolve to the same country, 'international' otherwise
+    (including when either end cannot be resolved), 'unknown' when one is missing.
+    """
+    if not origin or not destination:
+        return "unknown"
+    origin_country, destination_country = get_country(origin), get_country(destination)
+    if origin_country and origin_country == destination_country:
+        return "domestic"
+    return "international"
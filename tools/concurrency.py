@@ -0,0 +1,119 @@
+import os
+import time
+import threading
+import contextvars
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+
+# ✅ Pool settings (LLM/API calls are I/O bound, so threads are enough)
+TASK_POOL_SIZE = int(os.getenv("TASK_POOL_SIZE", "16"))
+DEFAULT_TASK_TIMEOUT = float(os.getenv("TASK_TIMEOUT", "20"))  # seconds
+
+_executor = None
+_executor_pid = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Returns the shared pool, recreating it after a fork (threads do not survive fork)."""
+    global _executor, _executor_pid
+    if _executor is None or _executor_pid != os.getpid():
+        with _executor_lock:
+            if _executor is None or _executor_pid != os.getpid():
+                _executor = ThreadPoolExecutor(max_workers=TASK_POOL_SIZE, thread_name_prefix="task")
+                _executor_pid = os.getpid()
+    return _executor
+
+
+def submit(fn, *args, **kwargs):
+    """
+    Runs fn on the shared pool inside a copy of the caller's context,
+    so the bound session (and any other context variables) follow the task.
+    """
+    context = contextvars.copy_context()
+    return get_executor().submit(context.run, fn, *args, **kwargs)
+
+
+def run_parallel(tasks, timeout=DEFAULT_TASK_TIMEOUT, timeouts=None, defaults=None):
+    """
+    Runs independent callables concurrently and returns {name: result}.
+
+    - `tasks`: {name: zero-argument callable}
+    - `timeout` / `timeouts`: overall and per-task limits in seconds
+    - `defaults`: {name: value} used when a task times out or raises
+
+    Wall-clock time is that of the slowest task (capped by its timeout) instead of the sum.
+    Timed-out tasks are cancelled if they have not started; a running call cannot be
+    interrupted, so LLM/API calls should also carry their own client timeout.
+    Call this from request threads, not from inside pool tasks, so the pool cannot starve itself.
+    """
+    timeouts = timeouts or {}
+    defaults = defaults or {}
+    if len(tasks) == 1:
+        # ✅ Nothing to overlap: run inline and skip the thread hop
+        name, fn = next(iter(tasks.items()))
+        try:
+            return {name: fn()}
+        except Exception as e:
+            print(f"❌ Task '{name}' failed: {e}")
+            return {name: defaults.get(name)}
+
+    started = time.monotonic()
+    futures = {name: submit(fn) for name, fn in tasks.items()}
+    results = {}
+    for name, future in futures.items():
+        remaining = started + timeouts.get(name, timeout) - time.monotonic()
+        try:
+            results[name] = future.result(timeout=max(remaining, 0))
+        except FutureTimeoutError:
+            future.cancel()
+            print(f"⏱️ Task '{name}' timed out after {timeouts.get(name, timeout)}s. Using default.")
+            results[name] = defaults.get(name)
+        except Exception as e:
+            print(f"❌ Task '{name}' failed: {e}")
+            results[name] = defaults.get(name)
+    return results
+
+
+class FutureCache:
+    """
+    Memoizes results by key, sharing in-flight work: if a value is already being computed
+    (e.g. prefetched while intent detection runs), later callers wait for that computation
+    instead of starting a duplicate call. Failed computations are not cached.
+    `executor` returns the pool to run on (the shared task pool by default).
+    """
+
+    def __init__(self, maxsize=1024, executor=get_executor):
+        self.maxsize = maxsize
+        self.executor = executor
+        self._futures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_submit(self, key, fn, *args):
+        """Returns the Future for key, submitting fn(*args) to the pool if it is not cached."""
+        with self._lock:
+            future = self._futures.get(key)
+            # ✅ A failure can still be here until its eviction callback runs; never hand it out again
+            if future is not None and not (future.done() and (future.cancelled() or future.exception())):
+                self._futures.move_to_end(key)
+                return future
+            future = self.executor().submit(contextvars.copy_context().run, fn, *args)
+            self._futures[key] = future
+            while len(self._futures) > self.maxsize:
+                self._futures.popitem(last=False)
+        future.add_done_callback(lambda done: self._evict_failed(key, done))
+        return future
+
+    def get(self, key, fn, *args, timeout=None):
+        """Returns the (possibly shared) result for key, computing it if needed."""
+        return self.get_or_submit(key, fn, *args).result(timeout=timeout)
+
+    def _evict_failed(self, key, future):
+        if future.cancelled() or future.exception() is not None:
+            with self._lock:
+                if self._futures.get(key) is future:
+                    del self._futures[key]
+
+    def clear(self):
+        with self._lock:
+            self._futures.clear()
@@ -1,17 +1,30 @@
 import json
 import os
 import re
+import threading
 
 from langchain_core.messages import HumanMessage
-from langchain_openai import ChatOpenAI
 from dotenv import load_dotenv
+from tools.intent_classifier import FastIntentClassifier
+from tools.registry import get_llm
+from tools.llm_cache import llm_cached
+from memory.session_memory import SessionMemory
 
 # ✅ Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
-# ✅ Initialize GPT-4 Model
-llm = ChatOpenAI(model="gpt-4o", openai_api_key=OPENAI_API_KEY)
+# ✅ Local classifier confidence needed to skip the LLM (0.85 kept leave-one-out precision at 100% on `examples`)
+INTENT_FAST_PATH_THRESHOLD = float(os.getenv("INTENT_FAST_PATH_THRESHOLD", "0.85"))
+
+# ✅ "llm" escalates uncertain messages to GPT-4o; "embedding" routes them with the local k-NN index instead
+INTENT_ROUTER_MODE = os.getenv("INTENT_ROUTER_MODE", "llm").lower()
+INTENT_EMBEDDING_MIN_CONFIDENCE = float(os.getenv("INTENT_EMBEDDING_MIN_CONFIDENCE", "0.3"))
+INTENT_CACHE_TTL = float(os.getenv("INTENT_CACHE_TTL", "86400"))  # seconds an LLM-classified message is reused
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+selected_flight = SessionMemory(os.path.join(DATA_DIR, "selected_flight.json"))
 
 # ✅ Predefined Examples for Classification
 examples = {
@@ -146,65 +159,100 @@ def clean_json_response(response_text):
         return {"intent": "other"}  # Fallback in case of invalid JSON
 
 
+# ✅ Built once from the examples above
+fast_intent_classifier = FastIntentClassifier(examples)
+_intent_index = None
+_intent_index_lock = threading.Lock()
+
+
+def get_intent_index():
+    """Builds (or loads from the on-disk cache) the embedding intent index on first use."""
+    global _intent_index
+    if _intent_index is None:
+        with _intent_index_lock:
+            if _intent_index is None:
+                from tools.intent_index import IntentIndex, create_embedder
+                _intent_index = IntentIndex(examples, embedder=create_embedder())
+    return _intent_index
+
+
 def detect_intent(user_input):
+    """
+    Classifies user input locally when the fast path is confident enough,
+    otherwise routes it with the embedding index or the GPT-4 classifier (INTENT_ROUTER_MODE).
+    """
+    intent, confidence = fast_intent_classifier.classify(user_input)
+    # ✅ "yes"/"confirm" books and pays only with a flight selected; otherwise let the model read it
+    if intent == "booking_confirmation" and not selected_flight.load_data():
+        confidence = 0.0
+    if intent and confidence >= INTENT_FAST_PATH_THRESHOLD:
+        print(f"⚡ Fast-path intent: {intent} ({confidence:.2f})")
+        return intent
+
+    if INTENT_ROUTER_MODE == "embedding":
+        intent, confidence = get_intent_index().classify(user_input)
+        print(f"🧭 Embedding intent: {intent} ({confidence:.2f})")
+        return intent if intent and confidence >= INTENT_EMBEDDING_MIN_CONFIDENCE else "other"
+
+    return detect_intent_with_llm(user_input)
+
+
+def detect_intent_with_llm(user_input):
     """
     Uses GPT-4 to classify user input into predefined categories with strict JSON formatting.
+    Answers are cached per normalized message, so "Yes, confirm!" and "yes confirm" cost one call.
     """
     try:
-        response = llm.invoke([
-            HumanMessage(
-                content=f"""
-                You are an AI classifier. Your task is to categorize user input into one of these categories:
-
-                - 'greeting': When the user greets (e.g., {json.dumps(examples["greeting"])}).
-                - 'flight_booking': When the user asks to book a flight (e.g., {json.dumps(examples["flight_booking"])}).
-                - 'providing_date': When the user provides a travel date (e.g., {json.dumps(examples["providing_date"])}).
-                - 'providing_location': When the user provides a location (e.g., {json.dumps(examples["providing_location"])}).
-                - 'flight_query': When the user provides a location (e.g., {json.dumps(examples["flight_query"])}).
-                - 'flight_selection': When the user provides a location (e.g., {json.dumps(examples["flight_selection"])}).
-                - 'booking_confirmation': When the user provides a location (e.g., {json.dumps(examples["booking_confirmation"])}).
-                - 'other': When none of the above applies (e.g., {json.dumps(examples["other"])}).
-
-                Additional Rules:
-                - If the user mentions **both origin and destination**, classify as 'flight_booking'.
-                - If the user mentions **only one location**, classify as 'providing_location'.
-                - If the user provides **only a date**, classify as 'providing_date'.
-                - If the user provides **name, email, phone, or passport**, classify as 'passenger_details'.
-                - If the user is asking about **flight details, ticket prices, flight duration, airline options, or availability**, classify as 'flight_query'.
-                - If the user is selecting a flight from a provided list, classify as 'flight_selection'.
-                - If the user confirms their booking, classify as 'booking_confirmation'.
-                - If unsure, classify as 'other'.
-
-                Format your response strictly as JSON:
-                {{"intent": "<category>"}}
-
-                User Input: "{user_input}"
-                """
-            )
-        ])
-
-        if response and hasattr(response, "content"):
-            response_text = response.content.strip()
-
-            # ✅ Ensure response is valid JSON
-            try:
-                intent_data = clean_json_response(response_text)
-                intent = intent_data.get("intent", "other").lower()
-                valid_intents = {
-                    "greeting", "flight_booking", "providing_date",
-                    "providing_location", "passenger_details", "flight_query",
-                    "flight_selection", "booking_confirmation", "other"
-                }
-                return intent if intent in valid_intents else "other"
-
-            except json.JSONDecodeError:
-                print(f"❌ Invalid JSON Response: {response_text}")
-                return "other"
-
-        else:
-            print("❌ GPT-4 Response is Empty")
-            return "other"
-
+        return _classify_intent_with_llm(user_input)
     except Exception as e:
         print(f"❌ GPT-4 Intent Extraction Failed: {e}")
         return "other"
+
+
+@llm_cached("intent", ttl=INTENT_CACHE_TTL, examples=examples)
+def _classify_intent_with_llm(user_input):
+    response = get_llm("gpt-4o").invoke([
+        HumanMessage(
+            content=f"""
+            You are an AI classifier. Your task is to categorize user input into one of these categories:
+
+            - 'greeting': When the user greets (e.g., {json.dumps(examples["greeting"])}).
+            - 'flight_booking': When the user asks to book a flight (e.g., {json.dumps(examples["flight_booking"])}).
+            - 'providing_date': When the user provides a travel date (e.g., {json.dumps(examples["providing_date"])}).
+            - 'providing_location': When the user provides a location (e.g., {json.dumps(examples["providing_location"])}).
+            - 'flight_query': When the user provides a location (e.g., {json.dumps(examples["flight_query"])}).
+            - 'flight_selection': When the user provides a location (e.g., {json.dumps(examples["flight_selection"])}).
+            - 'booking_confirmation': When the user provides a location (e.g., {json.dumps(examples["booking_confirmation"])}).
+            - 'other': When none of the above applies (e.g., {json.dumps(examples["other"])}).
+
+            Additional Rules:
+            - If the user mentions **both origin and destination**, classify as 'flight_booking'.
+            - If the user mentions **only one location**, classify as 'providing_location'.
+            - If the user provides **only a date**, classify as 'providing_date'.
+            - If the user provides **name, email, phone, or passport**, classify as 'passenger_details'.
+            - If the user is asking about **flight details, ticket prices, flight duration, airline options, or availability**, classify as 'flight_query'.
+            - If the user is selecting a flight from a provided list, classify as 'flight_selection'.
+            - If the user confirms their booking, classify as 'booking_confirmation'.
+            - If unsure, classify as 'other'.
+
+            Format your response strictly as JSON:
+            {{"intent": "<category>"}}
+
+            User Input: "{user_input}"
+            """
+        )
+    ])
+
+    if not response or not hasattr(response, "content"):
+        raise ValueError("GPT-4 Response is Empty")  # raised, so the miss is not cached
+    response_text = response.content.strip()
+
+    # ✅ Ensure response is valid JSON
+    intent_data = clean_json_response(response_text)
+    intent = intent_data.get("intent", "other").lower()
+    valid_intents = {
+        "greeting", "flight_booking", "providing_date",
+        "providing_location", "passenger_details", "flight_query",
+        "flight_selection", "booking_confirmation", "other"
+    }
+    return intent if intent in valid_intents else "other"
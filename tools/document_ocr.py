@@ -0,0 +1,94 @@
+import os
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from tools.concurrency import FutureCache
+from tools.passenger_import import passenger_from_record
+
+# ✅ OCR service endpoints (point both at tools.ocr_stub for local runs and tests)
+PASSPORT_OCR_URL = os.getenv("PASSPORT_OCR_URL", "https://ocr.ibos.io/passport_ocr")
+NID_OCR_URL = os.getenv("NID_OCR_URL", "https://ocr.ibos.io/nid_ocr")
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", "4"))  # documents read concurrently per process
+OCR_TIMEOUT = (float(os.getenv("OCR_CONNECT_TIMEOUT", "5")), float(os.getenv("OCR_READ_TIMEOUT", "60")))  # seconds
+OCR_CACHE_MAX_ENTRIES = int(os.getenv("OCR_CACHE_MAX_ENTRIES", "256"))  # OCR results kept by content hash
+OCR_MAX_UPLOAD_BYTES = int(os.getenv("OCR_MAX_UPLOAD_BYTES", str(10 * 1024 * 1024)))
+
+OCR_URLS = {"passport": PASSPORT_OCR_URL, "nid": NID_OCR_URL}
+DOCUMENT_NAMES = {"passport": "passport", "nid": "NID"}
+
+
+class DocumentOCR:
+    """
+    Reads passports and NIDs off the request path.
+
+    `recognize()` hashes the upload and returns a Future right away. OCR runs on a small
+    dedicated pool (slow OCR calls never take threads from the chat task pool), with one
+    pooled HTTP session per process. Results are cached by content hash, and an upload that
+    is already being read shares that call, so a re-sent or double-clicked document is
+    only sent to the OCR service once. Failed reads are not cached.
+    """
+
+    def __init__(self, urls=None, workers=OCR_WORKERS, timeout=OCR_TIMEOUT, max_entries=OCR_CACHE_MAX_ENTRIES):
+        self.urls = urls or OCR_URLS
+        self.workers = workers
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._pid = None
+        self._executor = None
+        self._session = None
+        self._results = FutureCache(maxsize=max_entries, executor=self._get_executor)
+        self.metrics = {"uploads": 0, "ocr_calls": 0, "ocr_errors": 0}
+
+    def _get_executor(self):
+        """The OCR pool and HTTP session, recreated after a fork (threads and sockets do not survive it)."""
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+                    self._session = requests.Session()
+                    self._pid = os.getpid()
+        return self._executor
+
+    @staticmethod
+    def content_hash(kind, content):
+        return hashlib.sha256(kind.encode() + b"\0" + content).hexdigest()
+
+    def recognize(self, kind, file_name, content, content_type=None):
+        """Returns (content hash, Future of the passenger fields read from the document)."""
+        if kind not in self.urls:
+            raise ValueError(f"Unknown document type '{kind}'. Use 'passport' or 'nid'.")
+        if not content:
+            raise ValueError("The uploaded file is empty.")
+        if len(content) > OCR_MAX_UPLOAD_BYTES:
+            raise ValueError(f"The file is too large (max {OCR_MAX_UPLOAD_BYTES // (1024 * 1024)} MB).")
+        digest = self.content_hash(kind, content)
+        with self._lock:
+            self.metrics["uploads"] += 1
+        return digest, self._results.get_or_submit(digest, self._read, kind, file_name, content, content_type)
+
+    def _read(self, kind, file_name, content, content_type):
+        """One OCR call; the response JSON is normalized to passenger fields (unknown keys are dropped)."""
+        with self._lock:
+            self.metrics["ocr_calls"] += 1
+        try:
+            response = self._session.post(
+                self.urls[kind],
+                files={"file": (file_name, content, content_type or "application/octet-stream")},
+                timeout=self.timeout,
+            )
+            response.raise_for_status()
+            record = response.json()
+        except Exception:
+            with self._lock:
+                self.metrics["ocr_errors"] += 1
+            raise
+        return {field: value for field, value in passenger_from_record(record).items() if value}
+
+    def get_metrics(self):
+        with self._lock:
+            # uploads answered from the cache or from a call already in flight
+            return dict(self.metrics, deduplicated=max(self.metrics["uploads"] - self.metrics["ocr_calls"], 0))
+
+
+document_ocr = DocumentOCR()
@@ -0,0 +1,74 @@
+from jinja2 import Environment
+
+NUMBER_EMOJIS = ["1️⃣", "2️⃣", "3️⃣", "4️⃣", "5️⃣", "6️⃣", "7️⃣", "8️⃣", "9️⃣", "🔟"]
+
+# ✅ Same layout the GPT-4 prompt asked for: numbered flights, blank line between them, summary, selection prompt
+FLIGHT_RESULTS_TEMPLATE = """\
+✈️ Here are the available flights:
+{% for flight in flights %}
+{{ flight.number }} {{ flight.airline }}
+   ✈ Flight Date: {{ flight.departure_date }}
+   💰 Price ({{ currency }}): {{ flight.price }}
+   🏢 Airline: {{ flight.airline }}
+   🎟 Cabin Class: {{ flight.cabin_class }}
+   🕒 Departure Time: {{ flight.departure_time }}
+   🛬 Arrival Time: {{ flight.arrival_time }}{% if flight.arrival_date != flight.departure_date %} ({{ flight.arrival_date }}){% endif %}
+   🔗 Connecting Airports: {{ flight.connecting_airport }}
+{% endfor %}
+📌 Summary:
+💰 Lowest Price: {{ lowest.price }} {{ currency }}
+✈️ Airline with Lowest Price: {{ lowest.airline }}
+
+---
+
+✅ Please select a flight from the available options. For example: {{ example.airline }} Departure Time: {{ example.departure_time }}."""
+
+flight_results_template = Environment(keep_trailing_newline=False).from_string(FLIGHT_RESULTS_TEMPLATE)
+
+
+def _number(position):
+    return NUMBER_EMOJIS[position - 1] if position <= len(NUMBER_EMOJIS) else f"{position}."
+
+
+def _price(value):
+    try:
+        return f"{float(value):,.2f}"
+    except (TypeError, ValueError):
+        return str(value)
+
+
+def _connections(value):
+    if isinstance(value, (list, tuple)):
+        return ", ".join(value) if value else "None"
+    return value or "None"
+
+
+def format_flight_results(flight_list, currency="USD"):
+    """
+    Renders the cleaned flight rows (see `clean_data`) as the numbered list shown to the user,
+    with the lowest-price summary and the selection prompt, in the supplier's `currency` (see
+    FlightIndex.currency). Deterministic and local: no LLM call.
+    """
+    if not flight_list:
+        return "❌ No flights available. Please try again later."
+
+    flights = [
+        {
+            "number": _number(position),
+            "airline": flight.get("carrier_operating", "N/A"),
+            "price": _price(flight.get("price", "N/A")),
+            "cabin_class": flight.get("cabin_class", "N/A"),
+            "departure_date": flight.get("departure_date", "N/A"),
+            "departure_time": str(flight.get("departure_time", "N/A"))[:5],
+            "arrival_date": flight.get("arrival_date", "N/A"),
+            "arrival_time": str(flight.get("arrival_time", "N/A"))[:5],
+            "connecting_airport": _connections(flight.get("connecting_airport")),
+            "raw_price": flight.get("price"),
+        }
+        for position, flight in enumerate(flight_list, start=1)
+    ]
+
+    priced = [flight for flight in flights if isinstance(flight["raw_price"], (int, float))]
+    lowest = min(priced, key=lambda flight: flight["raw_price"]) if priced else flights[0]
+
+    return flight_results_template.render(flights=flights, lowest=lowest, example=lowest, currency=currency)
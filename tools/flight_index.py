@@ -0,0 +1,205 @@
+import os
+import re
+
+from memory.session_memory import SessionMemory
+from tools.airlines import find_airlines
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+flight_index_memory = SessionMemory(os.path.join(DATA_DIR, "flight_index.json"))
+flight_list_memory = SessionMemory(os.path.join(DATA_DIR, "flight_list.json"))
+
+# ✅ The only fields the agents need from each ~11 KB supplier entry
+COLUMNS = [
+    "id", "flight_key", "tracking_id", "price", "carrier", "airline", "flight_number",
+    "origin", "destination", "stops", "duration", "departure", "arrival", "departure_slot",
+    "cabin_class", "baggage", "refund", "connecting_airport",
+]
+
+
+def _first_route(entry):
+    groups = entry.get("flight_group") or [{}]
+    routes = groups[0].get("routes") or [{}]
+    return routes[0], routes[-1], routes
+
+
+def _row(entry, tracking_id):
+    flight_filter = entry.get("filter", {})
+    first, last, routes = _first_route(entry)
+    operating = first.get("operating", {})
+    return {
+        "id": flight_filter.get("id"),
+        "flight_key": entry.get("flight_key"),
+        "tracking_id": entry.get("tracking_id") or tracking_id,
+        "price": flight_filter.get("price", (entry.get("price") or {}).get("total")),
+        "carrier": flight_filter.get("carrier_operating") or operating.get("carrier"),
+        "airline": operating.get("carrier_name") or flight_filter.get("carrier_operating"),
+        "flight_number": ", ".join(
+            f"{route.get('operating', {}).get('carrier', '')} {route.get('operating', {}).get('flight_number', '')}".strip()
+            for route in routes if route.get("operating")
+        ),
+        "origin": first.get("origin"),
+        "destination": last.get("destination"),
+        "stops": flight_filter.get("no_of_stops", 0),
+        "duration": flight_filter.get("journey_duration_seconds"),
+        "departure": flight_filter.get("departure_departure_time"),
+        "arrival": flight_filter.get("arrival_departure_time"),
+        "departure_slot": flight_filter.get("departure_timing_slot"),
+        "cabin_class": flight_filter.get("cabin_class"),
+        "baggage": flight_filter.get("baggage_title"),
+        "refund": flight_filter.get("refund"),
+        "connecting_airport": flight_filter.get("connecting_airport") or [],
+    }
+
+
+def format_duration(seconds):
+    """3000 -> '50m', 5400 -> '1h 30m'."""
+    if not isinstance(seconds, (int, float)):
+        return "N/A"
+    hours, minutes = divmod(int(seconds) // 60, 60)
+    return f"{hours}h {minutes}m" if hours and minutes else f"{hours}h" if hours else f"{minutes}m"
+
+
+def format_time(timestamp):
+    """'2025-04-19T07:00:00.000+06:00' -> ('2025-04-19', '07:00')."""
+    if not timestamp or "T" not in timestamp:
+        return timestamp or "N/A", "N/A"
+    date, time = timestamp.split("T", 1)
+    return date, time[:5]
+
+
+class FlightIndex:
+    """
+    Compact columnar view of a flight search response.
+
+    The supplier response is parsed once (at search time) into one list per column, so
+    agents can rank, filter and answer questions without re-reading the nested
+    `flight_group`/`routes` payload or sending it to the LLM.
+    """
+
+    def __init__(self, columns, tracking_id=None, currency=None):
+        self.columns = columns
+        self.tracking_id = tracking_id
+        self.currency = currency or "USD"
+
+    @classmethod
+    def from_response(cls, response_data):
+        data = response_data.get("data", []) if isinstance(response_data, dict) else response_data or []
+        tracking_id = response_data.get("tracking_id") if isinstance(response_data, dict) else None
+        rows = [_row(entry, tracking_id) for entry in data]
+        columns = {name: [row[name] for row in rows] for name in COLUMNS}
+        currency = (data[0].get("price") or {}).get("currency") if data else None
+        return cls(columns, tracking_id=tracking_id, currency=currency)
+
+    @classmethod
+    def from_dict(cls, stored):
+        return cls(stored.get("columns", {}), stored.get("tracking_id"), stored.get("currency"))
+
+    def to_dict(self):
+        return {"tracking_id": self.tracking_id, "currency": self.currency, "columns": self.columns}
+
+    def __len__(self):
+        return len(self.columns.get("id", []))
+
+    def row(self, position):
+        """Returns flight `position` (0-based) as a dict."""
+        return {name: values[position] for name, values in self.columns.items()}
+
+    def rows(self, positions=None):
+        positions = range(len(self)) if positions is None else positions
+        return [dict(self.row(position), position=position) for position in positions]
+
+    # ✅ Column scans (a handful of flights per search, so plain loops beat any extra structure)
+    def positions(self):
+        return list(range(len(self)))
+
+    def sort_by(self, column, positions=None):
+        positions = self.positions() if positions is None else positions
+        values = self.columns[column]
+        return sorted(
+            (p for p in positions if isinstance(values[p], (int, float))),
+            key=lambda p: (values[p], self.columns["price"][p] if column != "price" else 0),
+        )
+
+    def cheapest(self, positions=None):
+        ranked = self.sort_by("price", positions)
+        return ranked[0] if ranked else None
+
+    def fastest(self, positions=None):
+        ranked = self.sort_by("duration", positions)
+        return ranked[0] if ranked else None
+
+    def direct(self, positions=None):
+        positions = self.positions() if positions is None else positions
+        return [p for p in positions if not self.columns["stops"][p]]
+
+    def airlines(self, positions=None):
+        positions = self.positions() if positions is None else positions
+        return list(dict.fromkeys(self.columns["airline"][p] for p in positions))
+
+    def match_airline(self, text, positions=None):
+        """
+        Returns (positions, named): the positions whose airline name, first word ("Biman") or code is
+        mentioned (all positions if none is), and every airline the text names, whether it is in the
+        results or not ("Emirates", see tools.airlines), so callers can tell the two apart.
+        """
+        positions = self.positions() if positions is None else positions
+        words = set(re.findall(r"[a-z0-9-]+", text.lower()))
+        matched, named = [], []
+        for p in positions:
+            airline = (self.columns["airline"][p] or "").lower()
+            carrier = (self.columns["carrier"][p] or "").lower()
+            if (airline and (airline in text.lower() or airline.split()[0] in words)) or (carrier and carrier in words):
+                matched.append(p)
+                named.append(self.columns["airline"][p])
+        carriers = set(self.columns["carrier"]) | set(self.columns["airline"])
+        named.extend(name for code, name in find_airlines(text) if code not in carriers and name not in carriers)
+        return matched or positions, list(dict.fromkeys(named))
+
+    def route_airports(self):
+        """IATA codes the results touch: origins, destinations and connecting airports."""
+        connections = {airport for airports in self.columns["connecting_airport"] for airport in airports}
+        return {code for code in self.columns["origin"] + self.columns["destination"] if code} | connections
+
+    def describe(self, position):
+        """One compact line per flight for prompts and answers."""
+        row = self.row(position)
+        date, departure = format_time(row["departure"])
+        _, arrival = format_time(row["arrival"])
+        stops = "direct" if not row["stops"] else f"{row['stops']} stop(s) via {', '.join(row['connecting_airport'])}"
+        return (
+            f"#{position + 1} {row['airline']} {row['flight_number']} | {row['origin']}->{row['destination']} | "
+            f"{date} {departure}-{arrival} | {format_duration(row['duration'])} | {stops} | "
+            f"{row['price']} {self.currency} | {row['cabin_class']} | baggage {row['baggage']} | {row['refund']}"
+        )
+
+    def summary(self):
+        """Aggregate facts about the whole result set (constant size regardless of flight count)."""
+        prices = [p for p in self.columns["price"] if isinstance(p, (int, float))]
+        return {
+            "flights": len(self),
+            "airlines": self.airlines(),
+            "lowest_price": min(prices) if prices else None,
+            "highest_price": max(prices) if prices else None,
+            "direct_flights": len(self.direct()),
+            "currency": self.currency,
+        }
+
+
+def save_flight_index(response_data):
+    """Builds the index from a search response and stores it for the current session."""
+    index = FlightIndex.from_response(response_data)
+    flight_index_memory.save_data(index.to_dict())
+    return index
+
+
+def load_flight_index():
+    """Returns the session's FlightIndex, rebuilding it from the raw list if only that is stored."""
+    stored = flight_index_memory.load_data()
+    if stored.get("columns"):
+        return FlightIndex.from_dict(stored)
+    flight_data = flight_list_memory.load_data()
+    if not flight_data:
+        return None
+    return save_flight_index(flight_data)
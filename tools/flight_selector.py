@@ -0,0 +1,147 @@
+import re
+
+from tools.flight_index import format_time
+
+ORDINALS = {
+    "first": 1, "1st": 1, "second": 2, "2nd": 2, "third": 3, "3rd": 3, "fourth": 4, "4th": 4,
+    "fifth": 5, "5th": 5, "sixth": 6, "6th": 6, "seventh": 7, "7th": 7, "eighth": 8, "8th": 8,
+    "ninth": 9, "9th": 9, "tenth": 10, "10th": 10, "last": -1,
+}
+
+CABINS = [
+    ("premium economy", re.compile(r"\bpremium economy\b")),
+    ("business", re.compile(r"\bbusiness(?: class)?\b")),
+    ("first", re.compile(r"\bfirst class\b")),
+    ("economy", re.compile(r"\beconomy(?: class)?\b")),
+]
+
+TIME_SLOTS = ["early morning", "morning", "afternoon", "evening", "night"]
+
+ORDINAL_PATTERN = re.compile(rf"\b({'|'.join(ORDINALS)})\b(?! class)")
+NUMBERED_PATTERN = re.compile(r"(?:\b(?:option|flight|number|no\.?)\s*#?|#)\s*(\d{1,2})\b|^\s*(\d{1,2})\s*$")
+TIME_PATTERN = re.compile(r"\b(\d{1,2})(?::(\d{2}))?\s*(am|pm)\b|\b(\d{1,2}):(\d{2})\b")
+CHEAPEST_PATTERN = re.compile(r"\b(cheap\w*|lowest (?:price|fare|cost)|least expensive|budget|best price)\b")
+FASTEST_PATTERN = re.compile(r"\b(fastest|quickest|shortest(?: duration| flight)?)\b")
+EARLIEST_PATTERN = re.compile(r"\b(earliest|first flight of the day)\b")
+LATEST_PATTERN = re.compile(r"\b(latest|last flight of the day)\b")
+FEWEST_STOPS_PATTERN = re.compile(r"\b(direct|non-?stop|fewest stops|least stops|no layovers?)\b")
+
+# A requested departure time matches flights leaving within this many minutes of it
+TIME_TOLERANCE_MINUTES = 60
+
+
+def _minutes(timestamp):
+    _, time = format_time(timestamp)
+    try:
+        hours, minutes = time.split(":")
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return None
+
+
+def _requested_minutes(text):
+    match = TIME_PATTERN.search(text)
+    if not match:
+        return None
+    if match.group(3):
+        hours, minutes = int(match.group(1)) % 12, int(match.group(2) or 0)
+        if match.group(3) == "pm":
+            hours += 12
+    else:
+        hours, minutes = int(match.group(4)), int(match.group(5))
+    return hours * 60 + minutes if hours < 24 and minutes < 60 else None
+
+
+def select_flight(user_message, index):
+    """
+    Resolves a selection request against the flight index without the LLM.
+
+    Filters by airline, cabin class, departure time and time of day, then applies an
+    ordinal ("second option", "#3", "last") or a ranking ("cheapest", "fastest", "direct").
+    Returns `(position, candidates)`: `position` is the chosen 0-based flight or None when
+    the request is ambiguous, and `candidates` are the positions still in play.
+    """
+    text = (user_message or "").lower()
+    candidates = index.positions()
+
+    # ✅ Filters (each one only narrows when it matches something)
+    candidates = index.match_airline(text, candidates)
+
+    for cabin, pattern in CABINS:
+        if pattern.search(text):
+            text = pattern.sub(" ", text)  # so "first class" is not read as an ordinal
+            matched = [p for p in candidates if (index.columns["cabin_class"][p] or "").lower().startswith(cabin)]
+            candidates = matched or candidates
+            break
+
+    requested = _requested_minutes(text)
+    if requested is not None:
+        text = TIME_PATTERN.sub(" ", text)  # "7 am" must not be read as option 7
+        timed = [(abs(_minutes(index.columns["departure"][p]) - requested), p)
+                 for p in candidates if _minutes(index.columns["departure"][p]) is not None]
+        closest = min((gap for gap, _ in timed), default=None)
+        if closest is not None and closest <= TIME_TOLERANCE_MINUTES:
+            candidates = [p for gap, p in timed if gap == closest]
+    else:
+        for slot in TIME_SLOTS:
+            if re.search(rf"\b{slot}\b", text):
+                matched = [p for p in candidates
+                           if (index.columns["departure_slot"][p] or "").lower().replace("-", " ").replace("_", " ") == slot]
+                candidates = matched or candidates
+                break
+
+    # ✅ Rankings
+    if FEWEST_STOPS_PATTERN.search(text):
+        fewest = min(index.columns["stops"][p] or 0 for p in candidates)
+        candidates = [p for p in candidates if (index.columns["stops"][p] or 0) == fewest]
+    if CHEAPEST_PATTERN.search(text):
+        return index.cheapest(candidates), candidates
+    if FASTEST_PATTERN.search(text):
+        return index.fastest(candidates), candidates
+
+    if EARLIEST_PATTERN.search(text) or LATEST_PATTERN.search(text):
+        timed = sorted((p for p in candidates if _minutes(index.columns["departure"][p]) is not None),
+                       key=lambda p: (index.columns["departure"][p], index.columns["price"][p]))
+        if timed:
+            return (timed[0] if EARLIEST_PATTERN.search(text) else timed[-1]), candidates
+
+    # ✅ "#3" / "option 3" refer to the numbering shown in the results list
+    numbered = NUMBERED_PATTERN.search(text)
+    if numbered:
+        number = int(numbered.group(1) or numbered.group(2))
+        return (number - 1 if 1 <= number <= len(index) else None), candidates
+
+    # ✅ Ordinal words count within whatever the filters left ("the second Biman flight")
+    ordinal = ORDINAL_PATTERN.search(text)
+    if ordinal:
+        number = ORDINALS[ordinal.group(1)]
+        if number == -1:
+            return candidates[-1], candidates
+        return (candidates[number - 1] if number <= len(candidates) else None), candidates
+
+    if len(candidates) == 1:
+        return candidates[0], candidates
+
+    # ✅ Same flight sold in several fare buckets: take the cheapest fare
+    if len(candidates) < len(index) and len({
+        (index.columns["flight_number"][p], index.columns["departure"][p]) for p in candidates
+    }) == 1:
+        return index.cheapest(candidates), candidates
+
+    return None, candidates
+
+
+def selected_flight_record(index, position):
+    """The selected-flight document stored for the booking steps."""
+    row = index.row(position)
+    return {
+        "flight_id": row["id"],
+        "tracking_id": row["tracking_id"],
+        "flight_key": row["flight_key"],
+        "price": row["price"],
+        "departure_departure_time": row["departure"],
+        "arrival_departure_time": row["arrival"],
+        "cabin_class": row["cabin_class"],
+        "carrier_operating": row["carrier"],
+        "connecting_airport": row["connecting_airport"],
+    }
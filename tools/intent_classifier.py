@@ -0,0 +1,132 @@
+import re
+import math
+from collections import defaultdict
+
+MONTHS = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*"
+DAY = r"\d{1,2}(?:st|nd|rd|th)?"
+
+# ✅ High-precision rules for the short turns that make up most traffic.
+# Each rule must match the WHOLE normalized message, so longer sentences fall through to the model.
+RULES = [
+    ("greeting", 0.97, re.compile(
+        r"(?:hi|hello|hey|hey there|hiya|howdy|yo|greetings|good (?:morning|afternoon|evening)|"
+        r"assalamu? ?alaikum|salam|namaste|hola|bonjour)(?: (?:there|chatbot|bot|ai|akij air))?"
+    )),
+    ("booking_confirmation", 0.95, re.compile(
+        r"(?:(?:yes|yeah|yep|ok|okay|sure)(?: please)? ?)?"
+        r"(?:confirm(?: it| the booking| my booking| my flight)?|proceed(?: with (?:the )?booking)?|"
+        r"go ahead(?: with (?:the )?booking)?|book it(?: now)?|finalize(?: it)?)(?: please| now)?"
+    )),
+    ("booking_confirmation", 0.9, re.compile(r"yes|yeah|yep|yes please")),
+    ("flight_booking", 0.95, re.compile(
+        r"(?:it'?s )?(?:a )?(?:one ?way|round ?trip|return)(?: trip| ticket| flight)?(?: only)?(?: for me)?"
+    )),
+    ("providing_date", 0.93, re.compile(
+        rf"(?:on |for )?(?:{DAY} {MONTHS}|{MONTHS} {DAY})(?:,? \d{{4}})?|\d{{4}}-\d{{2}}-\d{{2}}|"
+        r"(?:on |for )?(?:today|tomorrow|next (?:monday|tuesday|wednesday|thursday|friday|saturday|sunday|week))"
+    )),
+    ("flight_selection", 0.92, re.compile(
+        r"(?:i(?:'ll| will)? (?:take|choose|select|pick|want)|select|choose|pick|book)(?: the)? "
+        r"(?:first|second|third|fourth|fifth|last|1st|2nd|3rd|4th|5th)(?: one| option| flight)?(?: please)?"
+    )),
+]
+
+# ✅ Contact details and passport numbers are a passenger-details signal (the word "passport" alone is not:
+# "Do I need a passport to fly to Dubai?" is a question for the model)
+PASSENGER_FIELD_PATTERN = re.compile(
+    r"[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,7}|\b(?:\+?88)?01\d{9}\b|\b[a-z]{1,2}\d{5,8}\b"
+)
+# Words that label or join field values ("my email is …, passport no …")
+PASSENGER_FIELD_WORDS = {
+    "my", "his", "her", "name", "is", "and", "email", "e-mail", "mail", "phone", "mobile", "contact", "number",
+    "no", "passport", "nid", "dob", "mr", "mrs", "ms", "miss", "dr",
+}
+PASSENGER_FIELD_SHARE = 0.5  # share of the words that must be field values/labels for a confident guess
+
+
+def normalize(text):
+    """Lowercases, unifies quotes and strips punctuation/whitespace noise."""
+    text = (text or "").lower().replace("’", "'")
+    text = re.sub(r"[^\w@.'+\- ]+", " ", text)
+    text = re.sub(r"[.\s]+$", "", text)
+    return re.sub(r"\s+", " ", text).strip()
+
+
+def char_ngrams(text, n=3):
+    """Character n-grams over each word padded with spaces (robust to typos and inflections)."""
+    grams = defaultdict(int)
+    for word in text.split():
+        padded = f" {word} "
+        for i in range(len(padded) - n + 1):
+            grams[padded[i:i + n]] += 1
+    return grams
+
+
+class FastIntentClassifier:
+    """
+    Local first-stage intent classifier.
+
+    Tries the whole-message rules first, then a TF-IDF character-trigram nearest-neighbour
+    lookup over the labelled `examples`. Returns `(intent, confidence)`; callers escalate
+    to the LLM when the confidence is below their threshold.
+    """
+
+    def __init__(self, examples, rules=RULES):
+        self.rules = rules
+        self.labels = []
+        self.idf = {}
+        self.index = defaultdict(list)  # n-gram -> [(example_idx, weight)]
+
+        documents = []
+        for intent, utterances in examples.items():
+            for utterance in utterances:
+                self.labels.append(intent)
+                documents.append(char_ngrams(normalize(utterance)))
+
+        document_frequency = defaultdict(int)
+        for grams in documents:
+            for gram in grams:
+                document_frequency[gram] += 1
+        total = len(documents)
+        self.idf = {gram: math.log((1 + total) / (1 + df)) + 1 for gram, df in document_frequency.items()}
+
+        for idx, grams in enumerate(documents):
+            for gram, weight in self._weigh(grams).items():
+                self.index[gram].append((idx, weight))
+
+    def _weigh(self, grams):
+        """TF-IDF weights, L2-normalized so dot products are cosine similarities."""
+        weights = {gram: (1 + math.log(tf)) * self.idf.get(gram, 0.0) for gram, tf in grams.items()}
+        norm = math.sqrt(sum(w * w for w in weights.values())) or 1.0
+        return {gram: w / norm for gram, w in weights.items() if w}
+
+    def nearest(self, text):
+        """Returns (intent, cosine similarity) of the closest labelled example."""
+        scores = defaultdict(float)
+        for gram, weight in self._weigh(char_ngrams(text)).items():
+            for idx, example_weight in self.index.get(gram, ()):
+                scores[idx] += weight * example_weight
+        if not scores:
+            return None, 0.0
+        best = max(scores, key=scores.get)
+        return self.labels[best], min(scores[best], 1.0)
+
+    def classify(self, user_input):
+        """Returns the most likely intent and a confidence in [0, 1]."""
+        text = normalize(user_input)
+        if not text:
+            return None, 0.0
+
+        for intent, confidence, pattern in self.rules:
+            if pattern.fullmatch(text):
+                return intent, confidence
+
+        values = PASSENGER_FIELD_PATTERN.findall(text)
+        if values:
+            # ✅ Confident only when the message is mostly field values; a question that merely
+            # contains an email or number ("is a@b.com registered?") goes to the model
+            words = text.split()
+            field_words = len(values) + sum(word in PASSENGER_FIELD_WORDS for word in words)
+            return "passenger_details", 0.9 if field_words >= PASSENGER_FIELD_SHARE * len(words) else 0.6
+
+        return self.nearest(text)
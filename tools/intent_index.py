@@ -0,0 +1,184 @@
+import os
+import json
+import zlib
+import hashlib
+import threading
+from collections import defaultdict
+
+import numpy as np
+
+from tools.intent_classifier import normalize, char_ngrams
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+INTENT_INDEX_FILE = os.path.join(DATA_DIR, "intent_index.npz")
+
+
+class HashingEmbedder:
+    """
+    Local embedder: character trigrams hashed into a fixed-size vector.
+    Needs no model download or network call, so a query embeds in well under a millisecond.
+    """
+
+    def __init__(self, dim=2048):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def embed(self, texts):
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for gram, tf in char_ngrams(normalize(text)).items():
+                matrix[row, zlib.crc32(gram.encode("utf-8")) % self.dim] += 1.0 + np.log(tf)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+
+class OpenAIEmbedder:
+    """OpenAI embeddings (better paraphrase recall, but every query costs an API call)."""
+
+    def __init__(self, model="text-embedding-3-small"):
+        from langchain_openai import OpenAIEmbeddings
+        self.client = OpenAIEmbeddings(model=model)
+        self.name = f"openai-{model}"
+
+    def embed(self, texts):
+        matrix = np.asarray(self.client.embed_documents(list(texts)), dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        return matrix / np.maximum(norms, 1e-9)
+
+
+def create_embedder(kind=None):
+    """Builds the embedder selected by INTENT_EMBEDDER ("hashing" or "openai")."""
+    kind = (kind or os.getenv("INTENT_EMBEDDER", "hashing")).lower()
+    return OpenAIEmbedder() if kind == "openai" else HashingEmbedder()
+
+
+class IntentIndex:
+    """
+    k-NN intent router over the labelled example utterances.
+
+    Example vectors are computed once and cached in a compressed NumPy file; the cache is
+    reused as long as the examples and embedder are unchanged. New labelled examples can be
+    added at runtime with `add_example()` and are persisted alongside the cache.
+    """
+
+    def __init__(self, examples, embedder=None, cache_path=INTENT_INDEX_FILE, k=5):
+        self.embedder = embedder or HashingEmbedder()
+        self.cache_path = cache_path
+        self.k = k
+        self._lock = threading.Lock()
+
+        self.texts = [text for utterances in examples.values() for text in utterances]
+        self.labels = [intent for intent, utterances in examples.items() for _ in utterances]
+        self.fingerprint = hashlib.sha1(
+            json.dumps([self.embedder.name, examples], sort_keys=True).encode("utf-8")
+        ).hexdigest()
+
+        if not self._load_cache():
+            self.matrix = self.embedder.embed(self.texts)
+            self._save_cache()
+
+    def _load_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return False
+        try:
+            with np.load(self.cache_path, allow_pickle=False) as cache:
+                if str(cache["fingerprint"]) != self.fingerprint:
+                    return False
+                self.matrix = cache["matrix"].astype(np.float32)
+                self.texts = cache["texts"].tolist()
+                self.labels = cache["labels"].tolist()
+            print(f"✅ Loaded intent index from {self.cache_path} ({len(self.labels)} examples)")
+            return True
+        except Exception as e:
+            print(f"⚠️ Intent index cache unreadable, rebuilding: {e}")
+            return False
+
+    def _save_cache(self):
+        if not self.cache_path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = self.cache_path + ".tmp.npz"
+            np.savez_compressed(
+                tmp_path,
+                fingerprint=np.array(self.fingerprint),
+                matrix=self.matrix.astype(np.float16),  # ✅ Half precision is plenty for cosine ranking
+                texts=np.array(self.texts),
+                labels=np.array(self.labels),
+            )
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"❌ Error saving intent index: {e}")
+
+    def add_example(self, intent, text, persist=True):
+        """Hot-adds one labelled utterance; it is used by the very next classification."""
+        vector = self.embedder.embed([text])
+        with self._lock:
+            self.matrix = np.vstack([self.matrix, vector])
+            self.texts = self.texts + [text]
+            self.labels = self.labels + [intent]
+            if persist:
+                self._save_cache()
+
+    def classify(self, user_input):
+        """
+        Returns (intent, confidence). Each of the k nearest examples votes with its cosine
+        similarity; confidence is the winner's best similarity scaled by its vote share.
+        """
+        if not normalize(user_input):
+            return None, 0.0
+
+        query = self.embedder.embed([user_input])[0]
+        with self._lock:
+            matrix, labels = self.matrix, self.labels
+        similarities = matrix @ query
+
+        k = min(self.k, len(labels))
+        top = np.argpartition(-similarities, k - 1)[:k]
+
+        votes, best = defaultdict(float), defaultdict(float)
+        for idx in top:
+            score = max(float(similarities[idx]), 0.0)
+            votes[labels[idx]] += score
+            best[labels[idx]] = max(best[labels[idx]], score)
+
+        total = sum(votes.values())
+        if not total:
+            return None, 0.0
+        intent = max(votes, key=votes.get)
+        return intent, best[intent] * votes[intent] / total
+
+    def evaluate(self, held_out, min_confidence=0.0):
+        """
+        Scores the router on a held-out {intent: [utterances]} set.
+        Returns per-intent precision/support plus overall accuracy and coverage.
+        """
+        predicted_counts, correct_counts, support = defaultdict(int), defaultdict(int), defaultdict(int)
+        answered = correct = total = 0
+        for expected, utterances in held_out.items():
+            for text in utterances:
+                total += 1
+                support[expected] += 1
+                intent, confidence = self.classify(text)
+                if intent is None or confidence < min_confidence:
+                    continue
+                answered += 1
+                predicted_counts[intent] += 1
+                if intent == expected:
+                    correct_counts[intent] += 1
+                    correct += 1
+
+        intents = sorted(set(support) | set(predicted_counts))
+        return {
+            "per_intent": {
+                intent: {
+                    "precision": correct_counts[intent] / predicted_counts[intent] if predicted_counts[intent] else None,
+                    "predicted": predicted_counts[intent],
+                    "support": support[intent],
+                }
+                for intent in intents
+            },
+            "accuracy": correct / total if total else 0.0,
+            "coverage": answered / total if total else 0.0,
+        }
@@ -0,0 +1,187 @@
+import os
+import re
+import json
+import time
+import types
+import sqlite3
+import hashlib
+import threading
+import functools
+from collections import OrderedDict
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# ✅ "memory" keeps answers per process, "sqlite" also shares them across workers and restarts
+LLM_CACHE_BACKEND = os.getenv("LLM_CACHE_BACKEND", "memory").lower()
+LLM_CACHE_PATH = os.getenv("LLM_CACHE_PATH", os.path.join(DATA_DIR, "llm_cache.sqlite3"))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("LLM_CACHE_MAX_ENTRIES", "4096"))  # in-memory LRU size
+
+
+def normalize_text(text):
+    """Near-duplicate key: case, punctuation and spacing do not matter ("Yes, confirm!" == "yes confirm")."""
+    text = re.sub(r"[^\w\s@.+-]|(?<!\w)[.+-]|[.+-](?!\w)", " ", str(text).lower())
+    return " ".join(text.split())
+
+
+def _stable_repr(const):
+    if isinstance(const, types.CodeType):
+        return _fingerprint(const)
+    if isinstance(const, frozenset):  # set order depends on the per-process string hash seed
+        return "frozenset(" + ",".join(sorted(_stable_repr(item) for item in const)) + ")"
+    if isinstance(const, tuple):
+        return "(" + ",".join(_stable_repr(item) for item in const) + ")"
+    return repr(const)
+
+
+def _fingerprint(code):
+    """Hash of a function's bytecode and constants (prompt text included), stable across processes."""
+    digest = hashlib.sha256(code.co_code)
+    for const in code.co_consts:
+        digest.update(_stable_repr(const).encode())
+    return digest.hexdigest()[:16]
+
+
+class SQLiteLLMStore:
+    """Persists cached answers in one SQLite table; rows past their expiry are ignored and replaced."""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        self._pid = None
+
+    def _connection(self):
+        """One connection per thread (reopened after a fork); WAL lets workers read while one writes."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._pid != os.getpid():
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_cache ("
+                "key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL)"
+            )
+            self._local.conn = conn
+            self._pid = os.getpid()
+        return conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value, expires_at FROM llm_cache WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None or (row[1] is not None and row[1] <= time.time()):
+            return None
+        return json.loads(row[0]), row[1]
+
+    def set(self, key, value, expires_at):
+        with self._connection() as conn:
+            conn.execute(
+                "INSERT INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(key) DO UPDATE SET value = excluded.value, expires_at = excluded.expires_at",
+                (key, json.dumps(value, separators=(",", ":")), expires_at)
+            )
+
+    def clear(self):
+        with self._connection() as conn:
+            conn.execute("DELETE FROM llm_cache")
+
+
+class LLMCache:
+    """
+    Answers of LLM calls that behave like pure functions of their input.
+
+    Entries live in an in-memory LRU (`max_entries`) and, with the sqlite backend, in a
+    shared SQLite file. Each entry has an optional expiry (wall clock, so it holds across
+    processes). Hits and misses are counted per namespace.
+    """
+
+    def __init__(self, max_entries=LLM_CACHE_MAX_ENTRIES, backend=LLM_CACHE_BACKEND, path=LLM_CACHE_PATH):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self._store = SQLiteLLMStore(path) if backend == "sqlite" else None
+        if backend not in ("memory", "sqlite"):
+            print(f"⚠️ Unknown LLM_CACHE_BACKEND '{backend}'. Falling back to in-memory cache.")
+        self.metrics = {}  # namespace -> {"hits", "misses"}
+
+    def _count(self, namespace, outcome):
+        counters = self.metrics.setdefault(namespace, {"hits": 0, "misses": 0})
+        counters[outcome] += 1
+
+    def _remember(self, key, value, expires_at):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def get(self, namespace, key):
+        """Returns (True, value) on a hit, (False, None) otherwise."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.time()):
+                self._entries.move_to_end(key)
+                self._count(namespace, "hits")
+                return True, entry[1]
+        stored = self._store.get(key) if self._store is not None else None
+        with self._lock:
+            if stored is not None:
+                value, expires_at = stored
+                self._remember(key, value, expires_at)
+                self._count(namespace, "hits")
+                return True, value
+            self._count(namespace, "misses")
+        return False, None
+
+    def set(self, key, value, ttl=None):
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock:
+            self._remember(key, value, expires_at)
+        if self._store is not None:
+            self._store.set(key, value, expires_at)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        if self._store is not None:
+            self._store.clear()
+
+    def get_metrics(self):
+        with self._lock:
+            result = {"entries": len(self._entries)}
+            for namespace, counters in self.metrics.items():
+                lookups = counters["hits"] + counters["misses"]
+                result[namespace] = dict(counters, hit_ratio=round(counters["hits"] / lookups, 3) if lookups else None)
+            return result
+
+
+llm_cache = LLMCache()
+
+
+def llm_cached(namespace, ttl=None, normalize=normalize_text, cache=None, **key_params):
+    """
+    Caches a function `fn(text)` that wraps one LLM call. The key covers the namespace, the
+    function's own code (prompt, model and call parameters written in it, so editing them
+    invalidates old answers), any `key_params` the answer also depends on, and `normalize(text)`;
+    pass `normalize=str` to key on the exact input.
+
+    Only returned values are cached: the function should raise when the call fails,
+    and callers keep their fallbacks outside of it.
+    """
+    def decorator(fn):
+        prefix = json.dumps([namespace, key_params, _fingerprint(fn.__code__)], sort_keys=True)
+
+        @functools.wraps(fn)
+        def wrapper(text):
+            target = cache or llm_cache
+            key = hashlib.sha256(f"{prefix}|{normalize(text)}".encode("utf-8")).hexdigest()
+            hit, value = target.get(namespace, key)
+            if hit:
+                return value
+            value = fn(text)
+            target.set(key, value, ttl)
+            return value
+
+        return wrapper
+
+    return decorator
@@ -1,44 +1,152 @@
 import json
 import re
+import datetime
 from typing import Optional
 
-from langchain_openai import ChatOpenAI
-import spacy
 from dateutil import parser
 import os
 from dotenv import load_dotenv
-import openai
+from tools.concurrency import FutureCache
+from tools.registry import get_nlp, get_openai_client
+from tools.llm_cache import llm_cached
 # ✅ Load environment variables
 load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-# ✅ Load NLP Model (Ensure `en_core_web_sm` is installed)
-nlp = spacy.load("en_core_web_sm")
 
-# ✅ Initialize GPT-4
-llm = ChatOpenAI(model="gpt-4o", openai_api_key=OPENAI_API_KEY)
+FLIGHT_FIELDS = ("origin", "destination", "date_of_travel", "return_date", "num_adults", "num_children", "journey_type")
+FLIGHT_FIELDS_TIMEOUT = float(os.getenv("FLIGHT_FIELDS_TIMEOUT", "10"))  # seconds before falling back to spaCy/regex
+
+# ✅ Memo of structured extractions; concurrent requests for the same text share one GPT call
+flight_fields_cache = FutureCache(maxsize=1024)
 
 
 def extract_location(text, keyword=None):
     """
-    Uses GPT-4 to directly extract 'origin' and 'destination' first.
-    If GPT fails, falls back to NLP (spaCy) for location extraction.
+    Returns the 'origin' ("from") or 'destination' ("to") found in the text.
+    Both lookups share one memoized structured extraction, so asking for both costs one GPT call.
     """
-    # print(f"\n🧠 [Before GPT-4] Raw User Input: {text}")
+    flight_fields = extract_flight_fields(text)
+    if keyword == "from":
+        return flight_fields.get("origin")
+    if keyword == "to":
+        return flight_fields.get("destination")
+    return extract_location_with_nlp(text, keyword)
+
 
-    # ✅ Step 1: Ask GPT-4 to extract structured location details
-    gpt_locations = extract_locations_with_gpt(text)
+def extract_flight_fields(text):
+    """
+    Extracts every flight search field from the text in ONE structured GPT call:
+    origin, destination, date_of_travel, return_date, num_adults, num_children and journey_type.
+    Falls back to spaCy/regex extraction if GPT fails. Missing fields are None.
+    """
+    # ✅ Relative dates ("next Monday") depend on today, so it is part of the memo key
+    today = datetime.date.today().isoformat()
+    try:
+        return dict(flight_fields_cache.get((text, today), extract_flight_fields_with_gpt, text, today))
+    except Exception as e:
+        # ✅ A failed GPT call is not memoized (FutureCache drops failed futures), so the next
+        # request for the same text asks GPT again instead of reusing the spaCy/regex guess
+        print(f"❌ GPT-4 Flight Field Extraction Failed: {e}")
+        return extract_flight_fields_locally(text)
 
-    if gpt_locations:
-        # print(f"🌍 [From GPT] Extracted Locations: {gpt_locations}")
-        if keyword == "from":
-            return gpt_locations.get("origin")
-        elif keyword == "to":
-            return gpt_locations.get("destination")
 
-    # print("❌ GPT-4 Failed to Extract Locations. Falling back to NLP.")
+def prefetch_flight_fields(text):
+    """Starts the structured extraction in the background; a later extract_flight_fields() reuses it."""
+    today = datetime.date.today().isoformat()
+    flight_fields_cache.get_or_submit((text, today), extract_flight_fields_with_gpt, text, today)
 
-    # ✅ Step 2: Use NLP if GPT fails
-    return extract_location_with_nlp(text, keyword)
+
+def extract_flight_fields_with_gpt(text, today):
+    """
+    Uses GPT-4o JSON mode to extract all flight search fields at once.
+    Example: "Dhaka to Madrid on 5 May for 2 adults" →
+    {"origin": "Dhaka", "destination": "Madrid", "date_of_travel": "2025-05-05", "num_adults": 2, ...}
+    Raises if the call fails or the reply is not a JSON object.
+    """
+    prompt = f"""
+    You are a travel assistant. Today is {today}. Extract the flight search details from the user input.
+
+    **User Input:** "{text}"
+
+    Respond with a JSON object with exactly these keys:
+    {{
+        "origin": "<departure city or null>",
+        "destination": "<arrival city or null>",
+        "date_of_travel": "<YYYY-MM-DD or null>",
+        "return_date": "<YYYY-MM-DD or null>",
+        "num_adults": <integer or null>,
+        "num_children": <integer or null>,
+        "journey_type": "<OneWay, RoundTrip or null>"
+    }}
+
+    Use null for anything the user did not state. Resolve relative dates against today.
+    """
+
+    response = get_openai_client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are a helpful travel assistant that replies in JSON."},
+            {"role": "user", "content": prompt},
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=150,
+        temperature=0,
+        timeout=FLIGHT_FIELDS_TIMEOUT,
+    )
+    extracted = json.loads(response.choices[0].message.content)
+    if not isinstance(extracted, dict):
+        raise ValueError(f"expected a JSON object, got {type(extracted).__name__}")
+    return _clean_flight_fields(extracted)
+
+
+def extract_flight_fields_locally(text):
+    """
+    spaCy/regex extraction of the same fields, used when GPT is unavailable.
+    """
+    num_adults = extract_number(text, "adult") or extract_number(text, "adults")
+    num_children = extract_number(text, "child") or extract_number(text, "children")
+    return _clean_flight_fields({
+        "origin": extract_location_with_nlp(text, "from"),
+        "destination": extract_location_with_nlp(text, "to"),
+        "date_of_travel": extract_date(text),
+        "return_date": extract_return_date(text),
+        "num_adults": num_adults or None,
+        "num_children": num_children or None,
+        "journey_type": "RoundTrip" if _mentions_round_trip(text) else None,
+    })
+
+
+def _clean_flight_fields(extracted):
+    """Maps "null"/"unknown" placeholders to None and coerces passenger counts to int."""
+    cleaned = {}
+    for field in FLIGHT_FIELDS:
+        value = extracted.get(field)
+        if isinstance(value, str) and value.strip().lower() in {"", "null", "none", "unknown", "n/a"}:
+            value = None
+        if field in ("num_adults", "num_children") and value is not None:
+            try:
+                value = int(value)
+            except (TypeError, ValueError):
+                value = None
+        if field == "journey_type" and value not in (None, "OneWay", "RoundTrip"):
+            value = "RoundTrip" if _mentions_round_trip(str(value)) else "OneWay"
+        cleaned[field] = value
+    return cleaned
+
+
+def _mentions_round_trip(text):
+    text = text.lower()
+    return any(keyword in text for keyword in ["round trip", "return", "coming back", "two way", "round"])
+
+
+def extract_journey_type(user_input: str) -> str:
+    """
+    Determines the journey type based on keywords.
+    Returns "OneWay" if only one date is mentioned,
+    and "RoundTrip" if words like 'round trip' or a return date is present.
+    """
+    # If no return date and no round trip indicators, assume OneWay
+    return "RoundTrip" if _mentions_round_trip(user_input) else "OneWay"
 
 
 def extract_locations_with_gpt(text):
@@ -46,13 +154,21 @@ def extract_locations_with_gpt(text):
     Uses GPT-4 to extract origin and destination locations in structured JSON format.
     Example: "I want to go to Madrid from Dhaka" → {"origin": "Dhaka", "destination": "Madrid"}
     """
+    try:
+        return _locations_from_llm(text)
+    except Exception as e:
+        print(f"❌ GPT-4 Extraction Failed: {e}")
+        return None  # Fail-safe fallback
+
 
+@llm_cached("locations")
+def _locations_from_llm(text):
     prompt = f"""
     You are a travel assistant. Extract the **origin** and **destination** from the following text.
 
     **User Input:** "{text}"
 
-    Respond in this exact JSON format:
+    Respond with a JSON object in this exact format:
     {{
         "origin": "<extracted_origin>",
         "destination": "<extracted_destination>"
@@ -61,28 +177,22 @@ def extract_locations_with_gpt(text):
     If a location is missing, return `"null"` for that field.
     """
 
-    try:
-        client = openai.Client()  # ✅ Initialize OpenAI client
-        response = client.chat.completions.create(
-            model="gpt-4",
-            messages=[
-                {"role": "system", "content": "You are a helpful travel assistant."},
-                {"role": "user", "content": prompt},
-            ],
-            max_tokens=50,
-            temperature=0.3,
-        )
-
-        response_text = response.choices[0].message.content.strip()
-
-        # ✅ Convert JSON response into a dictionary
-        gpt_locations = eval(response_text)
+    response = get_openai_client().chat.completions.create(
+        model="gpt-4o",
+        messages=[
+            {"role": "system", "content": "You are a helpful travel assistant that replies in JSON."},
+            {"role": "user", "content": prompt},
+        ],
+        response_format={"type": "json_object"},
+        max_tokens=50,
+        temperature=0.3,
+    )
 
-        return gpt_locations if isinstance(gpt_locations, dict) else None
-
-    except Exception as e:
-        print(f"❌ GPT-4 Extraction Failed: {e}")
-        return None  # Fail-safe fallback
+    # ✅ The reply is parsed as data, never executed; anything but a JSON object raises, so it is not cached
+    gpt_locations = json.loads(response.choices[0].message.content)
+    if not isinstance(gpt_locations, dict):
+        raise ValueError(f"expected a JSON object, got {type(gpt_locations).__name__}")
+    return gpt_locations
 
 
 def extract_location_with_nlp(text, keyword=None):
@@ -90,7 +200,7 @@ def extract_location_with_nlp(text, keyword=None):
     Extracts a city name using NLP (Named Entity Recognition) if GPT fails.
     """
 
-    doc = nlp(text)
+    doc = get_nlp()(text)  # ✅ Pipeline is loaded once, on first use (ensure `en_core_web_sm` is installed)
     locations = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]]
 
     origin, destination = None, None
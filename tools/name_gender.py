@@ -0,0 +1,89 @@
+import os
+import re
+import csv
+import bisect
+import threading
+import unicodedata
+from array import array
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))  # Moves one level up
+DATA_DIR = os.path.join(BASE_DIR, "data")
+
+# ✅ Bundled name,male,female table of common Bangladeshi, South Asian, Arabic and English first names;
+# point FIRST_NAMES_CSV at a larger frequency file (same columns) to cover more names
+FIRST_NAMES_FILE = os.getenv("FIRST_NAMES_CSV", os.path.join(DATA_DIR, "first_names.csv"))
+NAME_GENDER_MIN_CONFIDENCE = float(os.getenv("NAME_GENDER_MIN_CONFIDENCE", "0.8"))  # below this, ask the LLM
+
+TITLE_FOR_GENDER = {"male": "Mr.", "female": "Ms."}
+
+
+def normalize_name(name):
+    """Lowercase ASCII letters only ("Fátema" -> "fatema", "Md." -> "md")."""
+    name = unicodedata.normalize("NFKD", name or "")
+    return re.sub(r"[^a-z]", "", "".join(ch for ch in name if not unicodedata.combining(ch)).lower())
+
+
+class NameGenderIndex:
+    """
+    First-name -> gender lookup built once from a name,male,female frequency CSV.
+
+    Names live in one sorted list with parallel count arrays, so a lookup is a binary search
+    and the table costs a few bytes per name. The confidence of a guess is the
+    Laplace-smoothed share of the majority gender: rare or unisex names score low.
+    """
+
+    def __init__(self, path=FIRST_NAMES_FILE):
+        counts = {}
+        with open(path, newline="", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                name = normalize_name(row.get("name"))
+                if not name:
+                    continue
+                male, female = counts.get(name, (0, 0))
+                counts[name] = (male + int(row.get("male") or 0), female + int(row.get("female") or 0))
+        self.names = sorted(counts)
+        self.male = array("I", (counts[name][0] for name in self.names))
+        self.female = array("I", (counts[name][1] for name in self.names))
+
+    def counts(self, name):
+        """Returns (male, female) counts for a normalized name, or None if it is not in the table."""
+        position = bisect.bisect_left(self.names, name)
+        if position < len(self.names) and self.names[position] == name:
+            return self.male[position], self.female[position]
+        return None
+
+    def predict(self, first_name):
+        """
+        Returns (gender, confidence) for the most telling part of the first name
+        ("Md Rahim", "Nur Jahan"), or (None, 0.0) when no part is known.
+        """
+        best = (None, 0.0)
+        for part in re.split(r"[\s.\-]+", first_name or ""):
+            counts = self.counts(normalize_name(part))
+            if counts is None:
+                continue
+            male, female = counts
+            confidence = (max(male, female) + 1) / (male + female + 2)
+            if confidence > best[1]:
+                best = ("male" if male >= female else "female", round(confidence, 3))
+        return best
+
+
+_name_gender_index = None
+_name_gender_index_lock = threading.Lock()
+
+
+def get_name_gender_index():
+    """Loads the first-name table on first use."""
+    global _name_gender_index
+    if _name_gender_index is None:
+        with _name_gender_index_lock:
+            if _name_gender_index is None:
+                _name_gender_index = NameGenderIndex()
+    return _name_gender_index
+
+
+def predict_gender(first_name, min_confidence=NAME_GENDER_MIN_CONFIDENCE):
+    """Local guess ("male"/"female") for a first name, or None when the table is not sure enough."""
+    gender, confidence = get_name_gender_index().predict(first_name)
+    return gender if confidence >= min_confidence else None
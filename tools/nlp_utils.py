@@ -1,16 +1,11 @@
 import re
-import openai
-import spacy
-from config import OPENAI_API_KEY
-
-# Load NLP model (English)
-nlp = spacy.load("en_core_web_sm")
+from tools.registry import get_nlp, get_openai_client
 
 class NLPUtils:
     """Extracts locations using GPT-4 or NLP if GPT fails."""
 
     def __init__(self):
-        self.client = openai.Client(api_key=OPENAI_API_KEY)
+        self.client = get_openai_client()
 
     def extract_locations_with_gpt(self, text):
         """Extracts origin & destination using GPT-4."""
@@ -43,7 +38,7 @@ class NLPUtils:
 
     def extract_location_with_nlp(self, text, keyword=None):
         """Extracts a city name using NLP if GPT fails."""
-        doc = nlp(text)
+        doc = get_nlp()(text)
         locations = [ent.text for ent in doc.ents if ent.label_ in ["GPE", "LOC"]]
 
         from_match = re.search(r"\bfrom\s+([\w\s]+?)(?=\s|$)", text, re.IGNORECASE)
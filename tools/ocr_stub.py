@@ -0,0 +1,71 @@
+"""
+Local stand-in for the passport/NID OCR service, for development and tests.
+
+Serves the same routes as the real service (/passport_ocr, /nid_ocr; multipart "file") and
+"reads" the upload instead of running OCR: a JSON object in the file is returned as is,
+"key: value" lines become fields, and anything else (a real image) gets a fixed sample
+record. OCR_STUB_DELAY seconds of latency are added to every call.
+
+Usage: python -m tools.ocr_stub   then   PASSPORT_OCR_URL=http://127.0.0.1:5005/passport_ocr
+                                        NID_OCR_URL=http://127.0.0.1:5005/nid_ocr
+"""
+import os
+import json
+import time
+import threading
+from flask import Flask, jsonify, request
+from werkzeug.serving import make_server
+
+OCR_STUB_PORT = int(os.getenv("OCR_STUB_PORT", "5005"))
+OCR_STUB_DELAY = float(os.getenv("OCR_STUB_DELAY", "1.0"))  # seconds, like a real OCR call
+
+SAMPLE_RECORDS = {
+    "passport": {"surname": "KHALIL", "given_names": "IBRAHIM", "sex": "M", "date_of_birth": "01 JAN 1990",
+                 "nationality": "BANGLADESHI", "passport_number": "EB0123456",
+                 "date_of_issue": "10 JAN 2020", "date_of_expiry": "09 JAN 2030"},
+    "nid": {"name": "Ibrahim Khalil", "date_of_birth": "01 Jan 1990", "nid_number": "1990123456789"},
+}
+
+
+def read_stub_record(kind, content):
+    """The fields the stub "recognizes" in an uploaded file."""
+    text = content.decode("utf-8", errors="ignore").strip()
+    try:
+        record = json.loads(text)
+        if isinstance(record, dict):
+            return record
+    except ValueError:
+        pass
+    lines = [line.split(":", 1) for line in text.splitlines() if ":" in line]
+    if lines and len(lines) == len(text.splitlines()):
+        return {key.strip(): value.strip() for key, value in lines}
+    return dict(SAMPLE_RECORDS[kind])
+
+
+def create_stub_app(delay=OCR_STUB_DELAY):
+    app = Flask(__name__)
+    app.config["calls"] = 0
+    app.config["delay"] = delay
+
+    def recognize(kind):
+        upload = request.files.get("file")
+        if upload is None:
+            return jsonify({"error": "file is required"}), 400
+        app.config["calls"] += 1
+        time.sleep(app.config["delay"])
+        return jsonify(read_stub_record(kind, upload.read()))
+
+    app.add_url_rule("/passport_ocr", "passport_ocr", lambda: recognize("passport"), methods=["POST"])
+    app.add_url_rule("/nid_ocr", "nid_ocr", lambda: recognize("nid"), methods=["POST"])
+    return app
+
+
+def start_stub_server(port=0, delay=OCR_STUB_DELAY):
+    """Runs the stub in a background thread; returns (server, base URL). Port 0 picks a free port."""
+    server = make_server("127.0.0.1", port, create_stub_app(delay), threaded=True)
+    threading.Thread(target=server.serve_forever, name="ocr-stub", daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_port}"
+
+
+if __name__ == "__main__":
+    create_stub_app().run(host="127.0.0.1", port=OCR_STUB_PORT, threaded=True)
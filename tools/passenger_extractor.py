@@ -0,0 +1,257 @@
+import re
+import datetime
+from collections import namedtuple
+from tools.registry import get_or_create
+
+# ✅ One extracted value with where it was found and how sure the rule that found it is
+Field = namedtuple("Field", ["value", "start", "end", "confidence"])
+
+PASSENGER_FIELDS = ("title", "gender", "first_name", "last_name", "email", "phone", "dob",
+                    "passport_number", "nationality", "date_of_issue", "date_of_expiry")
+
+TITLES = {"mr": "Mr.", "mrs": "Mrs.", "ms": "Ms.", "miss": "Ms.", "dr": "Dr."}
+TITLE_TOKENS = sorted({variant for title in TITLES for variant in (title, title + ".")})
+
+DEMONYMS = ["Bangladeshi", "Indian", "Pakistani", "Nepali", "Nepalese", "Sri Lankan", "Bhutanese", "Maldivian",
+            "Afghan", "Burmese", "Myanmar", "Thai", "Malaysian", "Singaporean", "Indonesian", "Filipino", "Chinese",
+            "Japanese", "Korean", "Saudi", "Emirati", "Qatari", "Kuwaiti", "Omani", "Bahraini", "Turkish",
+            "Iranian", "Iraqi", "Egyptian", "British", "American", "Canadian", "Australian", "German", "French",
+            "Italian", "Spanish"]
+COUNTRIES = {"bangladesh": "Bangladeshi", "india": "Indian", "pakistan": "Pakistani", "nepal": "Nepali",
+             "bhutan": "Bhutanese", "maldives": "Maldivian", "malaysia": "Malaysian", "singapore": "Singaporean",
+             "china": "Chinese", "japan": "Japanese", "uae": "Emirati", "qatar": "Qatari", "kuwait": "Kuwaiti",
+             "oman": "Omani", "uk": "British", "usa": "American", "us": "American", "canada": "Canadian",
+             "australia": "Australian"}
+
+# ✅ Words that look like names (capitalized) but never are one in a passenger message
+NOT_NAME = sorted({
+    "and", "with", "my", "name", "is", "am", "i", "the", "for", "of", "on", "in", "at", "to", "from",
+    "passenger", "passengers", "adult", "child", "infant", "wife", "husband", "son", "daughter",
+    "email", "mail", "phone", "mobile", "contact", "number", "passport", "nid", "dob", "birth", "born", "date",
+    "issue", "issued", "expiry", "expires", "valid", "until", "nationality", "citizen", "gender", "title",
+    "male", "female", "other", "yes", "no", "please", "thanks", "hello", "hi",
+    "january", "february", "march", "april", "may", "june", "july", "august", "september", "october",
+    "november", "december", "jan", "feb", "mar", "apr", "jun", "jul", "aug", "sep", "sept", "oct", "nov", "dec",
+} | {word for demonym in DEMONYMS for word in demonym.lower().split()} | set(COUNTRIES))
+
+NAME_CONFIDENCE = {"title": 0.95, "cue": 0.9, "bare": 0.6}
+
+MONTH = r"(?:jan|feb|mar|apr|may|jun|jul|aug|sep|sept|oct|nov|dec)[a-z]*\.?"
+FIELD_PATTERN = re.compile(r"""(?=[\w+])(?:  # every field starts with a word character or "+"
+    (?P<email>\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,7}\b)
+  | (?P<phone>(?<![\d+])(?:\+?88)?01\d{3}[-\s]?\d{6}\b)
+  | (?P<passport>\b[A-Z]{1,2}\d{5,8}\b)
+  | (?P<date>\b(?:\d{4}-\d{1,2}-\d{1,2}
+              | \d{1,2}[/.-]\d{1,2}[/.-]\d{4}
+              | (?i:\d{1,2}(?:st|nd|rd|th)?\s+""" + MONTH + r""",?\s+\d{4})
+              | (?i:""" + MONTH + r"""\s+\d{1,2}(?:st|nd|rd|th)?,?\s+\d{4}))\b)
+  | (?P<dob_label>(?i:\bd\.?o\.?b\b|date\s+of\s+birth|birth\s*date|\bborn\b|birthday))
+  | (?P<issue_label>(?i:date\s+of\s+issue|issue\s+date|\bissued\b|\bdoi\b))
+  | (?P<expiry_label>(?i:date\s+of\s+expiry|expiry\s+date|\bexpir\w*|\bexp\b|valid\s+(?:until|till|thru|through)|\bdoe\b))
+  | (?P<gender>(?i:\b(?:male|female|other)\b)))
+""", re.VERBOSE)
+
+# ✅ Cheap pre-check: without a capitalized word, title, cue or demonym there is nothing for spaCy to match
+NAME_HINT = re.compile(r"\b[A-Z][a-z]|(?i:\b(?:" + "|".join(
+    [re.escape(title.rstrip(".")) for title in TITLES] + ["name", "nationality", "citizen\\w*"]
+    + [demonym.lower().replace(" ", r"\s+") for demonym in DEMONYMS]) + r")\b)")
+
+NUMERIC_DATE = re.compile(r"(\d{1,4})[-/.](\d{1,2})[-/.](\d{1,4})$")
+DATE_FORMATS = ("%d %B %Y", "%d %b %Y", "%B %d %Y", "%b %d %Y")
+LABEL_REACH = 40  # characters after "DOB", "expiry"... within which a date gets that label
+
+
+def normalize_phone(text):
+    """Local 11-digit form of a Bangladeshi mobile number ("+880 1711-223344" -> "01711223344")."""
+    return "0" + re.sub(r"\D", "", str(text))[-10:]
+
+
+def parse_date(text):
+    """Normalizes the date formats passengers type ("12/05/1990", "12 May 1990", "May 12th, 1990") to YYYY-MM-DD."""
+    numeric = NUMERIC_DATE.match(text)
+    if numeric:  # ✅ ISO or day-first numeric dates skip strptime
+        first, month, last = (int(part) for part in numeric.groups())
+        year, day = (first, last) if len(numeric.group(1)) == 4 else (last, first)
+        try:
+            return datetime.date(year, month, day).isoformat()
+        except ValueError:
+            return None
+    cleaned = re.sub(r"(?<=\d)(st|nd|rd|th)\b", "", text, flags=re.IGNORECASE)
+    if re.search(r"[A-Za-z]", cleaned):  # "May 12, 1990", "12 Sept. 1990"
+        cleaned = re.sub(r"(?i)\bsept\b", "Sep", " ".join(cleaned.replace(",", " ").replace(".", " ").split()))
+    for date_format in DATE_FORMATS:
+        try:
+            return datetime.datetime.strptime(cleaned, date_format).date().isoformat()
+        except ValueError:
+            continue
+    return None
+
+
+def _name_token(**extra):
+    return dict({"IS_ALPHA": True, "IS_STOP": False}, **extra)
+
+
+def build_passenger_matchers():
+    """
+    Lean tokenizer (whitespace and edge punctuation only) plus spaCy Matcher/PhraseMatcher rules
+    for names and nationalities; needs no trained model.
+    """
+    import spacy
+    from spacy.attrs import IS_STOP
+    from spacy.matcher import Matcher, PhraseMatcher
+    from spacy.tokenizer import Tokenizer
+    vocab = spacy.blank("en").vocab
+
+    # ✅ On this private vocab is_stop means "never part of a name": a native flag check per token
+    # instead of a NOT_IN set predicate evaluated for every token and pattern state
+    not_name = frozenset(NOT_NAME) | frozenset(TITLE_TOKENS)
+    vocab.lex_attr_getters[IS_STOP] = lambda text: text.lower() in not_name
+    for lexeme in vocab:
+        lexeme.is_stop = lexeme.lower_ in not_name
+    tokenizer = Tokenizer(
+        vocab,
+        prefix_search=re.compile(r"""^[(\["'“‘]""").search,
+        suffix_search=re.compile(r"""[,.;:!?)\]"'”’]$""").search,
+        infix_finditer=re.compile(r"(?<=[A-Za-z])[,;:/](?=[A-Za-z])").finditer,
+    )
+    for title in TITLE_TOKENS:
+        if title.endswith("."):
+            for variant in {title, title.capitalize(), title.upper()}:
+                tokenizer.add_special_case(variant, [{"ORTH": variant}])  # "Mr." stays one token
+
+    title = {"LOWER": {"IN": TITLE_TOKENS}}
+    name_cue = [{"LOWER": "name"}, {"LOWER": {"IN": ["is", ":", "-"]}}]
+    intro_cue = [{"LOWER": {"IN": ["i", "this"]}}, {"LOWER": {"IN": ["am", "is"]}}]  # "I am ..." needs capitals
+    matcher = Matcher(vocab)
+    matcher.add("PASSENGER_TITLE", [[title, _name_token(OP="{1,4}")]], greedy="LONGEST")
+    matcher.add("PASSENGER_CUE", [name_cue + [dict(title, OP="?"), _name_token(OP="{1,4}")],
+                                  intro_cue + [dict(title, OP="?"), _name_token(IS_TITLE=True, OP="{1,4}")]],
+                greedy="LONGEST")
+    matcher.add("PASSENGER_BARE", [[_name_token(IS_TITLE=True, OP="{2,4}")]], greedy="LONGEST")
+    matcher.add("NATIONALITY_CUE", [[
+        {"LOWER": {"IN": ["nationality", "citizenship", "citizen"]}}, {"IS_PUNCT": True, "OP": "?"},
+        {"LOWER": "of", "OP": "?"}, {"LOWER": {"IN": sorted(COUNTRIES) + [d.lower() for d in DEMONYMS]}}]])
+    phrase_matcher = PhraseMatcher(vocab, attr="LOWER")
+    phrase_matcher.add("NATIONALITY_DEMONYM", [tokenizer(demonym) for demonym in DEMONYMS])
+    return tokenizer, matcher, phrase_matcher
+
+
+class PassengerExtractor:
+    """
+    Pulls every passenger field out of a chat message in one pass.
+
+    Token-shaped fields (email, phone, passport, dates and their "DOB"/"issued"/"expiry"
+    labels, gender) come from a single precompiled alternation scanned once with finditer;
+    names and nationalities come from one spaCy Matcher/PhraseMatcher pass (longest match wins). Findings are then walked
+    in text order: each new name starts a new passenger, so "Mr A B, a@x.com; Ms C D, c@y.com"
+    yields two passengers, and every field carries its span and confidence.
+    """
+
+    def __init__(self, matchers=None):
+        from spacy.util import filter_spans
+        self.tokenizer, self.matcher, self.phrase_matcher = matchers or build_passenger_matchers()
+        self._filter_spans = filter_spans
+
+    def _findings(self, text):
+        findings = []
+        for match in FIELD_PATTERN.finditer(text):
+            findings.append((match.start(), match.end(), match.lastgroup, match.group()))
+        if NAME_HINT.search(text):
+            doc = self.tokenizer(text)
+            spans = self.matcher(doc, as_spans=True) + self.phrase_matcher(doc, as_spans=True)
+            for span in self._filter_spans(spans):
+                findings.append((span.start_char, span.end_char, span.label_.split("_")[0].lower(), span))
+        findings.sort(key=lambda finding: finding[0])
+        return findings
+
+    def extract(self, text):
+        """Returns one {field: Field} dict per passenger mentioned, in order."""
+        passengers = [{}]
+        pending_label, label_end = None, -1
+        for start, end, kind, found in self._findings(text or ""):
+            current = passengers[-1]
+            if kind == "passenger":
+                if "first_name" in current:
+                    current = {}
+                    passengers.append(current)
+                self._add_name(current, found)
+            elif kind.endswith("_label"):
+                pending_label, label_end = kind[:-len("_label")], end
+            elif kind == "date":
+                value = parse_date(found)
+                if value is None:
+                    continue
+                labelled = pending_label is not None and start - label_end <= LABEL_REACH
+                field = {"dob": "dob", "issue": "date_of_issue", "expiry": "date_of_expiry"}[pending_label] if labelled else "date"
+                pending_label = None
+                current.setdefault("_dates", []).append((field, Field(value, start, end, 0.95 if labelled else 0.6)))
+            else:
+                field, value, confidence = self._simple_field(kind, found)
+                if field in current:
+                    current = {}
+                    passengers.append(current)  # ✅ A second email/phone/passport without a name: next passenger
+                current[field] = Field(value, start, end, confidence)
+        for passenger in passengers:
+            self._assign_dates(passenger)
+        return [passenger for passenger in passengers if passenger]
+
+    @staticmethod
+    def _simple_field(kind, found):
+        if kind == "email":
+            return "email", found, 0.99
+        if kind == "phone":
+            return "phone", normalize_phone(found), 0.95
+        if kind == "passport":
+            return "passport_number", found, 0.9
+        if kind == "gender":
+            return "gender", found.lower(), 0.95
+        nationality = found[-1].lower_ if found.label_ == "NATIONALITY_CUE" else found.text.lower()
+        value = COUNTRIES.get(nationality) or next(d for d in DEMONYMS if d.lower() == nationality)
+        return "nationality", value, 0.9
+
+    @staticmethod
+    def _add_name(passenger, span):
+        title, words = None, []
+        for token in span:
+            if token.is_alpha and not token.is_stop:
+                words.append(token)  # is_stop also covers titles and cue words ("my name is")
+            elif title is None and token.lower_ in TITLE_TOKENS:
+                title = token
+        if title is not None:
+            passenger["title"] = Field(TITLES[title.lower_.rstrip(".")], title.idx, title.idx + len(title), 0.99)
+        if not words:
+            return
+        confidence = NAME_CONFIDENCE[span.label_.split("_")[1].lower()]
+        first, rest = words[0], words[1:]
+        passenger["first_name"] = Field(first.text.capitalize(), first.idx, first.idx + len(first), confidence)
+        if rest:
+            passenger["last_name"] = Field(" ".join(token.text.capitalize() for token in rest),
+                                           rest[0].idx, rest[-1].idx + len(rest[-1]), confidence)
+
+    @staticmethod
+    def _assign_dates(passenger):
+        """Labelled dates go to their field; unlabelled future dates are the expiry, past ones DOB then issue."""
+        dates = passenger.pop("_dates", [])
+        for field, found in dates:
+            if field != "date":
+                passenger.setdefault(field, found)
+        unlabelled = sorted((found for field, found in dates if field == "date"), key=lambda found: found.value)
+        today = datetime.date.today().isoformat() if unlabelled else None
+        for found in unlabelled:
+            slots = ("date_of_expiry",) if found.value > today else ("dob", "date_of_issue")
+            slot = next((slot for slot in slots if slot not in passenger), None)
+            if slot:
+                passenger[slot] = found
+
+
+def get_passenger_extractor():
+    """Shared extractor; the spaCy rules are compiled once per process on first use."""
+    return get_or_create("passenger_extractor", PassengerExtractor)
+
+
+def extract_passengers(text):
+    """Plain {field: value} dicts (every PASSENGER_FIELDS key present) for each passenger in the text."""
+    return [
+        {field: found.value if (found := passenger.get(field)) else None for field in PASSENGER_FIELDS}
+        for passenger in get_passenger_extractor().extract(text)
+    ]
@@ -0,0 +1,163 @@
+import io
+import os
+import re
+import csv
+import datetime
+from tools.passenger_extractor import (PASSENGER_FIELDS, TITLES, DEMONYMS, COUNTRIES, extract_passengers,
+                                       normalize_phone, parse_date)
+
+PASSENGER_IMPORT_MAX_ROWS = int(os.getenv("PASSENGER_IMPORT_MAX_ROWS", "50"))  # rows read from one paste/upload
+
+# ✅ Header spellings seen in group-booking sheets -> passenger field ("name" is split into first/last)
+COLUMN_ALIASES = {
+    "title": ("title", "salutation", "prefix"),
+    "first_name": ("first name", "firstname", "given name", "given names", "first"),
+    "last_name": ("last name", "lastname", "surname", "family name", "last"),
+    "name": ("name", "full name", "passenger", "passenger name", "traveller", "traveler"),
+    "gender": ("gender", "sex"),
+    "email": ("email", "e mail", "email address", "mail"),
+    "phone": ("phone", "mobile", "phone number", "mobile number", "contact", "contact number", "cell"),
+    "dob": ("dob", "date of birth", "birth date", "birthdate", "birthday"),
+    "passport_number": ("passport", "passport no", "passport number", "passport num"),
+    "nationality": ("nationality", "citizenship", "country"),
+    "date_of_issue": ("date of issue", "issue date", "issued", "doi", "passport issue date"),
+    "date_of_expiry": ("date of expiry", "expiry date", "expiry", "expires", "valid until", "doe",
+                       "passport expiry", "passport expiry date"),
+}
+HEADER_FIELDS = {alias: field for field, aliases in COLUMN_ALIASES.items() for alias in aliases}
+DELIMITERS = "\t,;|"
+
+EMAIL = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,7}")
+PASSPORT = re.compile(r"[A-Z]{1,2}\d{5,8}")
+GENDERS = {"m": "male", "male": "male", "f": "female", "female": "female", "other": "other", "o": "other"}
+# ✅ Three-letter nationality codes printed on passports (and read back by OCR)
+PASSPORT_COUNTRY_CODES = {
+    "bgd": "Bangladeshi", "ind": "Indian", "pak": "Pakistani", "npl": "Nepali", "lka": "Sri Lankan",
+    "btn": "Bhutanese", "mdv": "Maldivian", "afg": "Afghan", "mmr": "Burmese", "tha": "Thai", "mys": "Malaysian",
+    "sgp": "Singaporean", "idn": "Indonesian", "phl": "Filipino", "chn": "Chinese", "jpn": "Japanese",
+    "kor": "Korean", "sau": "Saudi", "are": "Emirati", "qat": "Qatari", "kwt": "Kuwaiti", "omn": "Omani",
+    "bhr": "Bahraini", "tur": "Turkish", "irn": "Iranian", "irq": "Iraqi", "egy": "Egyptian", "gbr": "British",
+    "usa": "American", "can": "Canadian", "aus": "Australian", "deu": "German", "fra": "French",
+    "ita": "Italian", "esp": "Spanish",
+}
+NATIONALITIES = dict(PASSPORT_COUNTRY_CODES, **COUNTRIES, **{demonym.lower(): demonym for demonym in DEMONYMS})
+
+
+def _header_field(cell):
+    return HEADER_FIELDS.get(" ".join(re.sub(r"[^a-z0-9]+", " ", str(cell or "").lower()).split()))
+
+
+def _split_name(full_name):
+    """"Mr. Rahim Uddin Ahmed" -> (title, first name, last name); the last word is the surname."""
+    words = str(full_name).split()
+    title = TITLES.get(words[0].lower().rstrip(".")) if words else None
+    if title:
+        words = words[1:]
+    if len(words) < 2:
+        return title, (words or [None])[0], None
+    return title, " ".join(words[:-1]), words[-1]
+
+
+def _cell_value(field, value):
+    """Normalizes one spreadsheet cell; values that do not look right come back as None (= still missing)."""
+    if value is None or str(value).strip() == "":
+        return None
+    if isinstance(value, (datetime.datetime, datetime.date)):  # XLSX date cells
+        value = value.date() if isinstance(value, datetime.datetime) else value
+        return value.isoformat() if field in ("dob", "date_of_issue", "date_of_expiry") else None
+    text = " ".join(str(value).split())
+    if field in ("dob", "date_of_issue", "date_of_expiry"):
+        return parse_date(text)
+    if field == "email":
+        return text if EMAIL.fullmatch(text) else None
+    if field == "phone":
+        digits = re.sub(r"\D", "", text)
+        return normalize_phone(digits) if len(digits) >= 10 else None
+    if field == "passport_number":
+        text = text.replace(" ", "").upper()
+        return text if PASSPORT.fullmatch(text) else None
+    if field == "gender":
+        return GENDERS.get(text.lower())
+    if field == "title":
+        return TITLES.get(text.lower().rstrip("."))
+    if field == "nationality":
+        return NATIONALITIES.get(text.lower(), text.title())
+    if field in ("first_name", "last_name") and text.isupper():  # passport MRZ / OCR output
+        return text.title()
+    return text
+
+
+def passengers_from_rows(rows):
+    """
+    Turns table rows (header row first) into passenger dicts with every PASSENGER_FIELDS key.
+    Unknown columns are ignored; empty rows are skipped. Raises ValueError without a usable header.
+    """
+    rows = iter(rows)
+    header = [_header_field(cell) for cell in next(rows, [])]
+    if sum(field is not None for field in header) < 2:
+        raise ValueError("The first row must name the columns (e.g. first name, last name, email, phone, dob).")
+    passengers = []
+    for row in rows:
+        if not any(str(cell or "").strip() for cell in row):
+            continue
+        if len(passengers) == PASSENGER_IMPORT_MAX_ROWS:
+            raise ValueError(f"Too many rows: at most {PASSENGER_IMPORT_MAX_ROWS} passengers per upload.")
+        passengers.append(_passenger_from_cells(header, row))
+    return passengers
+
+
+def _passenger_from_cells(header, row):
+    passenger = dict.fromkeys(PASSENGER_FIELDS)
+    for field, value in zip(header, row):
+        if field == "name" and value:
+            title, first_name, last_name = _split_name(value)
+            passenger["title"] = passenger["title"] or title
+            passenger["first_name"] = passenger["first_name"] or first_name
+            passenger["last_name"] = passenger["last_name"] or last_name
+        elif field is not None:
+            passenger[field] = _cell_value(field, value) or passenger[field]
+    return passenger
+
+
+def passenger_from_record(record):
+    """One passenger dict from a {column: value} mapping (e.g. an OCR result), normalized like a table row."""
+    return _passenger_from_cells([_header_field(key) for key in record], record.values())
+
+
+def _table_delimiter(first_line):
+    """The delimiter that splits the line into known column names, or None if it is not a header row."""
+    for delimiter in DELIMITERS:
+        cells = first_line.split(delimiter)
+        if len(cells) > 1 and sum(_header_field(cell) is not None for cell in cells) >= 2:
+            return delimiter
+    return None
+
+
+def parse_passenger_block(text):
+    """
+    Passengers from pasted text in one pass: a table with a header row (CSV, tab-separated from a
+    spreadsheet, ";" or "|") is read column by column; anything else goes to the free-text extractor.
+    """
+    text = (text or "").strip()
+    delimiter = _table_delimiter(text.splitlines()[0]) if text else None
+    if delimiter is None:
+        return extract_passengers(text)
+    return passengers_from_rows(csv.reader(io.StringIO(text), delimiter=delimiter))
+
+
+def read_passenger_file(file_name, content):
+    """Passengers from an uploaded .csv/.txt or .xlsx file (first sheet, header row first)."""
+    extension = os.path.splitext(file_name or "")[1].lower()
+    if extension in (".csv", ".txt", ".tsv"):
+        return parse_passenger_block(content.decode("utf-8-sig", errors="replace"))
+    if extension == ".xlsx":
+        try:
+            from openpyxl import load_workbook  # optional: only needed for Excel uploads
+        except ImportError:
+            raise ValueError("Excel uploads are not available on this server. Please upload a CSV file.")
+        workbook = load_workbook(io.BytesIO(content), read_only=True, data_only=True)
+        try:
+            return passengers_from_rows(workbook.worksheets[0].iter_rows(values_only=True))
+        finally:
+            workbook.close()
+    raise ValueError("Unsupported file type. Please upload a .csv or .xlsx file.")
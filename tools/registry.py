@@ -0,0 +1,66 @@
+import os
+import threading
+from dotenv import load_dotenv
+
+# ✅ Load environment variables
+load_dotenv()
+OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
+
+SPACY_MODEL = os.getenv("SPACY_MODEL", "en_core_web_sm")
+
+_instances = {}
+_instances_pid = None
+_instances_lock = threading.RLock()  # factories may build their own dependencies
+
+
+def get_or_create(key, factory):
+    """
+    Returns the shared instance for key, calling factory() on first use only.
+
+    Heavy objects (LLM clients, spaCy pipelines, LangChain agents) are built lazily instead of
+    at import, so importing the app stays fast and a worker only pays for what it uses.
+    Instances are dropped after a fork, since pooled HTTP connections must not be shared.
+    """
+    global _instances_pid
+    if _instances_pid != os.getpid():
+        with _instances_lock:
+            if _instances_pid != os.getpid():
+                _instances.clear()
+                _instances_pid = os.getpid()
+    instance = _instances.get(key)
+    if instance is None:
+        with _instances_lock:
+            instance = _instances.get(key)
+            if instance is None:
+                instance = factory()
+                _instances[key] = instance
+    return instance
+
+
+def get_llm(model="gpt-4o"):
+    """Shared LangChain chat model (one per model name)."""
+    def create():
+        from langchain_openai import ChatOpenAI
+        return ChatOpenAI(model=model, openai_api_key=OPENAI_API_KEY)
+    return get_or_create(("llm", model), create)
+
+
+def get_openai_client():
+    """Shared OpenAI SDK client."""
+    def create():
+        import openai
+        return openai.OpenAI(api_key=OPENAI_API_KEY)
+    return get_or_create(("openai",), create)
+
+
+def get_nlp(name=SPACY_MODEL):
+    """Shared spaCy pipeline (loaded once per process, on first use)."""
+    def create():
+        import spacy
+        return spacy.load(name)
+    return get_or_create(("spacy", name), create)
+
+
+def loaded():
+    """Keys of the instances built so far in this process."""
+    return list(_instances) if _instances_pid == os.getpid() else []
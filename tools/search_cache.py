@@ -0,0 +1,134 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from tools.concurrency import submit
+
+# ✅ Cache settings (supplier fares stay valid for a few minutes)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))  # seconds a response is served as fresh
+SEARCH_CACHE_STALE_TTL = float(os.getenv("SEARCH_CACHE_STALE_TTL", "0"))  # extra seconds served stale while refreshing
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+# ✅ Payload fields that do not change the search result
+IGNORED_FIELDS = {"short_ref"}
+
+
+def _normalize(value, key=""):
+    if isinstance(value, dict):
+        return {name: _normalize(item, name) for name, item in value.items() if name not in IGNORED_FIELDS}
+    if isinstance(value, list):
+        return [_normalize(item, key) for item in value]
+    if isinstance(value, str):
+        return value.strip().upper() if key.endswith("_airport") else value.strip()
+    return value
+
+
+def search_key(payload):
+    """Canonical hash of a search payload: key order, IATA-code case and whitespace do not matter."""
+    if hasattr(payload, "to_dict"):
+        payload = payload.to_dict()
+    canonical = json.dumps(_normalize(payload), sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class SearchCache:
+    """
+    TTL-bounded LRU cache of supplier search responses, keyed by `search_key(payload)`.
+
+    Entries expire after `ttl` seconds. With `stale_ttl` > 0 an expired entry is still
+    returned for that long while a single background refresh replaces it
+    (stale-while-revalidate). The least recently used entries are evicted once either
+    `max_entries` or `max_bytes` (JSON size of the cached responses) is exceeded.
+    """
+
+    def __init__(self, ttl=SEARCH_CACHE_TTL, stale_ttl=SEARCH_CACHE_STALE_TTL,
+                 max_entries=SEARCH_CACHE_MAX_ENTRIES, max_bytes=SEARCH_CACHE_MAX_BYTES):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()  # key -> (stored_at, size, response)
+        self._refreshing = set()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.metrics = {"hits": 0, "stale_hits": 0, "misses": 0, "refreshes": 0, "evictions": 0}
+
+    def get_or_fetch(self, payload, fetch):
+        """
+        Returns the cached response for `payload`, or calls `fetch(payload)` and caches its
+        result. Results without flight data are returned but not cached; errors propagate.
+        """
+        key = search_key(payload)
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                age = now - entry[0]
+                if age < self.ttl:
+                    self._entries.move_to_end(key)
+                    self.metrics["hits"] += 1
+                    return entry[2]
+                if age < self.ttl + self.stale_ttl:
+                    self._entries.move_to_end(key)
+                    self.metrics["stale_hits"] += 1
+                    if key not in self._refreshing:
+                        self._refreshing.add(key)
+                        submit(self._refresh, key, payload, fetch)
+                    return entry[2]
+                self._remove(key)
+            self.metrics["misses"] += 1
+
+        response = fetch(payload)
+        self._store(key, response)
+        return response
+
+    def _refresh(self, key, payload, fetch):
+        try:
+            self._store(key, fetch(payload))
+            with self._lock:
+                self.metrics["refreshes"] += 1
+        except Exception as e:
+            print(f"❌ Background search refresh failed: {e}")
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def _store(self, key, response):
+        if not isinstance(response, dict) or not response.get("data"):
+            return
+        size = len(json.dumps(response))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (time.monotonic(), size, response)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.metrics["evictions"] += 1
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def get_metrics(self):
+        with self._lock:
+            lookups = self.metrics["hits"] + self.metrics["stale_hits"] + self.metrics["misses"]
+            return dict(
+                self.metrics,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hit_ratio=round((self.metrics["hits"] + self.metrics["stale_hits"]) / lookups, 3) if lookups else None,
+            )
+
+
+search_cache = SearchCache()
@@ -0,0 +1,94 @@
+import json
+import queue
+import contextvars
+from contextlib import contextmanager
+from tools.registry import get_llm, get_openai_client
+
+# ✅ Stream bound to the current /chat/stream request (None for plain /chat calls)
+_current_stream = contextvars.ContextVar("chat_stream", default=None)
+
+# ✅ Seconds between keep-alive comments while the pipeline is busy (keeps proxies from timing out)
+STREAM_HEARTBEAT_SECONDS = 10
+
+
+class ChatStream:
+    """
+    Events produced while one chat turn is processed: "progress" (status text),
+    "token" (a piece of the reply as the LLM generates it) and finally "done" or "error".
+    """
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, event, data):
+        self._queue.put((event, data))
+
+    def done(self, response):
+        self.put("done", {"response": response})
+
+    def error(self, message):
+        self.put("error", {"response": message})
+
+    def sse(self, heartbeat=STREAM_HEARTBEAT_SECONDS):
+        """Yields the events as Server-Sent Events until the turn is done."""
+        while True:
+            try:
+                event, data = self._queue.get(timeout=heartbeat)
+            except queue.Empty:
+                yield ": keep-alive\n\n"
+                continue
+            yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+            if event in ("done", "error"):
+                return
+
+
+@contextmanager
+def bind_stream(stream):
+    """Sends progress and token events from everything called inside the block to `stream`."""
+    token = _current_stream.set(stream)
+    try:
+        yield stream
+    finally:
+        _current_stream.reset(token)
+
+
+def emit_progress(message):
+    """Reports a pipeline step ("Searching flights…") to the bound stream, if any."""
+    stream = _current_stream.get()
+    if stream is not None:
+        stream.put("progress", {"message": message})
+
+
+def _emit_token(text):
+    stream = _current_stream.get()
+    if stream is not None and text:
+        stream.put("token", {"text": text})
+
+
+def generate_text(messages):
+    """
+    Runs the final LangChain LLM call of a turn and returns its text.
+    When a stream is bound, tokens are forwarded as they arrive instead of after the whole reply.
+    """
+    llm = get_llm()
+    if _current_stream.get() is None:
+        return llm.invoke(messages).content
+    parts = []
+    for chunk in llm.stream(messages):
+        parts.append(chunk.content)
+        _emit_token(chunk.content)
+    return "".join(parts)
+
+
+def generate_chat_completion(**kwargs):
+    """Same as generate_text for OpenAI SDK chat completions; returns the message content."""
+    client = get_openai_client()
+    if _current_stream.get() is None:
+        return client.chat.completions.create(**kwargs).choices[0].message.content
+    parts = []
+    for chunk in client.chat.completions.create(stream=True, **kwargs):
+        text = chunk.choices[0].delta.content if chunk.choices else None
+        if text:
+            parts.append(text)
+            _emit_token(text)
+    return "".join(parts)
@@ -0,0 +1,231 @@
+import os
+import time
+import random
+import bisect
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# ✅ Base URLs (overridable so the client can be pointed at a local stub server)
+SUPPLIER_API_URL = os.getenv("SUPPLIER_API_URL", "https://serviceapi.innotraveltech.com").rstrip("/")
+SUPPLIER_CHECKOUT_URL = os.getenv("SUPPLIER_CHECKOUT_URL", "https://checkout.innotraveltech.com").rstrip("/")
+
+# ✅ Pool / retry / breaker settings
+SUPPLIER_POOL_SIZE = int(os.getenv("SUPPLIER_POOL_SIZE", "20"))
+SUPPLIER_MAX_RETRIES = int(os.getenv("SUPPLIER_MAX_RETRIES", "2"))
+SUPPLIER_BACKOFF = float(os.getenv("SUPPLIER_BACKOFF", "0.5"))  # seconds, doubled per attempt
+SUPPLIER_BACKOFF_MAX = float(os.getenv("SUPPLIER_BACKOFF_MAX", "4"))
+SUPPLIER_BREAKER_THRESHOLD = int(os.getenv("SUPPLIER_BREAKER_THRESHOLD", "5"))  # consecutive failures
+SUPPLIER_BREAKER_COOLDOWN = float(os.getenv("SUPPLIER_BREAKER_COOLDOWN", "30"))  # seconds
+
+RETRY_STATUSES = {500, 502, 503, 504}
+
+# ✅ name: (base, path, (connect timeout, read timeout), safe to retry after the request was sent)
+# Booking and payment calls are not idempotent, so they are only retried when the connection failed.
+ENDPOINTS = {
+    "search": (SUPPLIER_API_URL, "/flight/search", (3.05, 30), True),
+    "validate": (SUPPLIER_API_URL, "/flight/validate", (3.05, 15), True),
+    "update_travellers": (SUPPLIER_API_URL, "/flight/update-travellers", (3.05, 15), True),
+    "create_booking": (SUPPLIER_API_URL, "/flight/create-booking", (3.05, 30), False),
+    "booking_details": (SUPPLIER_API_URL, "/flight/booking-details", (3.05, 15), True),
+    "payment_request": (SUPPLIER_CHECKOUT_URL, "/request", (3.05, 20), False),
+}
+
+# ✅ Latency histogram bucket upper bounds (seconds); the last bucket is +Inf
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30]
+
+
+class SupplierUnavailable(requests.exceptions.RequestException):
+    """Raised without calling the supplier while the endpoint's circuit breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Opens after `threshold` consecutive failures and rejects calls for `cooldown` seconds.
+    After the cooldown a single trial call is let through (half-open): success closes the
+    breaker, failure opens it again.
+    """
+
+    def __init__(self, threshold=SUPPLIER_BREAKER_THRESHOLD, cooldown=SUPPLIER_BREAKER_COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self._trial_running:
+                self._trial_running = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_running or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial_running = False
+
+
+class LatencyHistogram:
+    """Cumulative latency counts per bucket, plus total count and sum (Prometheus-style)."""
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = list(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.errors = 0
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, error=False):
+        with self._lock:
+            self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+            self.errors += int(error)
+
+    def snapshot(self):
+        with self._lock:
+            running, cumulative = 0, {}
+            for bound, count in zip(self.buckets + ["+Inf"], self.counts):
+                running += count
+                cumulative[str(bound)] = running
+            return {
+                "count": self.count,
+                "errors": self.errors,
+                "avg_seconds": round(self.total / self.count, 4) if self.count else None,
+                "buckets": cumulative,
+            }
+
+
+class SupplierClient:
+    """
+    Shared client for the InnoTravelTech API.
+
+    One pooled `requests.Session` keeps connections alive across turns, so only the first
+    call per worker pays DNS/TCP/TLS setup. Every call gets its endpoint's timeout, bounded
+    exponential-backoff retries on connection errors and 5xx, a per-endpoint circuit breaker
+    and a latency histogram. `post()` returns the `requests.Response` like `requests.post`.
+    """
+
+    def __init__(self, headers=None, endpoints=None, max_retries=SUPPLIER_MAX_RETRIES,
+                 backoff=SUPPLIER_BACKOFF, backoff_max=SUPPLIER_BACKOFF_MAX, pool_size=SUPPLIER_POOL_SIZE):
+        self.endpoints = dict(ENDPOINTS if endpoints is None else endpoints)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size, max_retries=0)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update(headers if headers is not None else {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+            "apikey": os.getenv("API_KEY"),
+            "secretecode": os.getenv("SECRET_CODE"),
+        })
+        self.breakers = {name: CircuitBreaker() for name in self.endpoints}
+        self.latency = {name: LatencyHistogram() for name in self.endpoints}
+
+    def url(self, endpoint):
+        base, path, _, _ = self.endpoints[endpoint]
+        return base + path
+
+    def _sleep_before_retry(self, attempt):
+        delay = min(self.backoff * (2 ** attempt), self.backoff_max)
+        time.sleep(delay * random.uniform(0.5, 1))  # jitter so workers don't retry in lockstep
+
+    def post(self, endpoint, json=None, timeout=None):
+        """
+        POSTs `json` to a named endpoint (see ENDPOINTS) with timeout, retries and breaker.
+        `json` may be a dict or a typed payload (tools.supplier_payloads), which is serialized once.
+        """
+        _, _, default_timeout, idempotent = self.endpoints[endpoint]
+        body = json.to_json() if hasattr(json, "to_json") else None
+        if body is not None:
+            json = None
+        breaker, histogram = self.breakers[endpoint], self.latency[endpoint]
+        if not breaker.allow():
+            raise SupplierUnavailable(f"Supplier endpoint '{endpoint}' is temporarily unavailable (circuit open).")
+
+        attempt = 0
+        try:
+            while True:
+                started = time.perf_counter()
+                try:
+                    response = self.session.post(self.url(endpoint), json=json, data=body, timeout=timeout or default_timeout)
+                except requests.exceptions.RequestException as e:
+                    histogram.observe(time.perf_counter() - started, error=True)
+                    # ✅ Only a failed connect proves the supplier never saw the request
+                    not_sent = isinstance(e, (requests.exceptions.ConnectTimeout, requests.exceptions.SSLError))
+                    if attempt < self.max_retries and (idempotent or not_sent):
+                        print(f"🔁 Supplier '{endpoint}' failed ({e}); retrying.")
+                        self._sleep_before_retry(attempt)
+                        attempt += 1
+                        continue
+                    breaker.record_failure()
+                    raise
+
+                failed = response.status_code in RETRY_STATUSES
+                histogram.observe(time.perf_counter() - started, error=failed)
+                if failed and idempotent and attempt < self.max_retries:
+                    print(f"🔁 Supplier '{endpoint}' returned {response.status_code}; retrying.")
+                    self._sleep_before_retry(attempt)
+                    attempt += 1
+                    continue
+                if failed:
+                    breaker.record_failure()
+                else:
+                    breaker.record_success()
+                return response
+        except requests.exceptions.RequestException:
+            raise  # already counted above (after the retries)
+        except BaseException:
+            # ✅ Anything else (a payload that cannot be serialized, an interrupt) must still end a
+            # half-open trial, or the breaker would reject every later call for the life of the worker
+            breaker.record_failure()
+            raise
+
+    def metrics(self):
+        """Per-endpoint latency histograms and breaker states."""
+        return {
+            name: dict(self.latency[name].snapshot(), breaker=self.breakers[name].state)
+            for name in self.endpoints
+        }
+
+
+_client = None
+_client_pid = None
+_client_lock = threading.Lock()
+
+
+def get_supplier_client():
+    """Returns the process-wide client, recreating it after a fork (pooled sockets must not be shared)."""
+    global _client, _client_pid
+    if _client is None or _client_pid != os.getpid():
+        with _client_lock:
+            if _client is None or _client_pid != os.getpid():
+                _client = SupplierClient()
+                _client_pid = os.getpid()
+    return _client
@@ -0,0 +1,146 @@
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, ConfigDict
+
+
+class PayloadModel(BaseModel):
+    # ✅ Phone numbers and IDs may come back from the LLM as ints; the supplier wants strings
+    model_config = ConfigDict(coerce_numbers_to_str=True)
+
+
+class SupplierPayload(PayloadModel):
+    """Base for InnoTravelTech request bodies; `to_json()` is the single serialization to the wire."""
+
+    def to_json(self) -> bytes:
+        return self.model_dump_json(exclude=self._excluded()).encode("utf-8")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return self.model_dump(mode="json", exclude=self._excluded())
+
+    def _excluded(self):
+        return None
+
+
+# ✅ /flight/search
+class SearchSegment(PayloadModel):
+    departure_airport_type: str = "AIRPORT"
+    departure_airport: Optional[str]
+    arrival_airport_type: str = "AIRPORT"
+    arrival_airport: Optional[str]
+    departure_date: Optional[str]
+
+
+class TeamMember(PayloadModel):
+    member_id: str
+    pax_type: str
+
+
+DEFAULT_TEAM_PROFILE = [
+    TeamMember(member_id="1", pax_type="ADT"),
+    TeamMember(member_id="2", pax_type="CNN"),
+    TeamMember(member_id="3", pax_type="INF"),
+]
+
+
+class SearchRequest(SupplierPayload):
+    journey_type: str = "OneWay"
+    segment: List[SearchSegment]
+    travelers_adult: int = 1
+    travelers_child: int = 0
+    travelers_child_age: List[int] = []  # Can be populated if ages are collected
+    travelers_infants: int = 0  # Defaulted to 0, can be updated dynamically
+    travelers_infants_age: List[int] = []  # Can be populated if ages are collected
+    fare_type: Optional[str] = None
+    fare_option: Optional[str] = None
+    content_type: Optional[str] = None
+    ptc_option: Optional[str] = None
+    agency_ethnic_list: Optional[List[str]] = None
+    preferred_carrier: List[str] = []
+    non_stop_flight: str = "any"
+    baggage_option: str = "any"
+    booking_class: str = "Economy"
+    supplier_uid: str = "F1TT00041"  # Replace with actual supplier UID if dynamic
+    partner_id: str = "78"  # Replace with actual partner ID if dynamic
+    language: str = "en"
+    short_ref: str = "12121212121"  # Replace with a dynamic reference if needed
+    version: Optional[str] = None
+    team_profile: Optional[List[TeamMember]] = None  # Only sent with one-way searches
+
+    def _excluded(self):
+        return {"team_profile"} if self.team_profile is None else None
+
+
+# ✅ /flight/validate
+class ValidateItem(PayloadModel):
+    tracking_id: Optional[str]
+    flight_key: Optional[str]
+    brand_option: str = ""
+
+
+class ValidateRequest(SupplierPayload):
+    member_id: str = "2"
+    result_type: str = "general"
+    data: List[ValidateItem]
+
+
+# ✅ /flight/update-travellers
+class Traveller(PayloadModel):
+    pax_id: int
+    pax_type: str
+    title: Optional[str]
+    gender: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    email: Optional[str]
+    contact_number: Optional[str]
+    dob: Optional[str]
+    doc_country: str
+    doc_no: Optional[str]
+    doc_dateofexpiry: Optional[str]
+    doc_dateofissue: Optional[str]
+    passport_copy: Optional[str]
+
+
+class UpdateTravellersRequest(SupplierPayload):
+    booking_tracking_id: str
+    member_id: str = "2"
+    save_pax: str = "yes"
+    flight_details: Dict[str, Any]
+    passenger: List[Traveller]
+
+
+# ✅ /flight/create-booking
+class CreateBookingRequest(SupplierPayload):
+    booking_tracking_id: str
+    member_id: str = "2"
+    isd_code: str = "880"
+    contact_no: Optional[str]
+    email_address: Optional[str]
+    payment_type: str = "onlinepayment"
+    isPartialPay: str = "yes"
+    redirect_url: str
+
+
+# ✅ /flight/booking-details
+class BookingDetailsRequest(SupplierPayload):
+    tracking_id: str
+    booking_id: str = ""
+    member_id: str = "1"
+
+
+# ✅ checkout /request
+class PaymentRequest(SupplierPayload):
+    ftm_partner_id: str = "1"
+    member_id: str = "1"
+    tracking_id: str
+    collection_type: str = "payment_link"
+    payment_link_valid: str
+    payment_link_base_url: str
+    currency: str = "USD"
+    amount: str
+    redirect_url: str
+    email: Optional[str]
+    name: Optional[str]
+    isd_code: str = "880"
+    contact_number: Optional[str]
+    service_details: str
+    booking_data: Dict[str, Any] = {}